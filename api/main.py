@@ -3,15 +3,26 @@ from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 from fastapi.middleware.cors import CORSMiddleware
-from api.routes import jobs, orchestrate, apply, download, report, suggestions
-from storage.db import Base, engine
+from api.routes import jobs, orchestrate, apply, download, report, suggestions, uploads
+from storage.db import create_schema
+from core.config import settings
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Initialize database tables on application startup"""
-    Base.metadata.create_all(bind=engine)
+    """
+    Initialize database tables on application startup, and start the worker
+    processes that run queued pipeline phases unless they run separately
+    """
+    create_schema()
+    pool = None
+    if settings.WORKER_EMBEDDED:
+        from services.worker import WorkerPool
+        pool = WorkerPool()
+        pool.start()
     yield
+    if pool is not None:
+        pool.stop()
 
 
 app = FastAPI(
@@ -40,6 +51,7 @@ app.include_router(apply.router)
 app.include_router(download.router)
 app.include_router(report.router)
 app.include_router(suggestions.router)
+app.include_router(uploads.router)
 
 # Serve static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
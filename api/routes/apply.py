@@ -1,11 +1,11 @@
-from fastapi import APIRouter, Depends, BackgroundTasks, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 import pandas as pd
 import os
 
 from api.deps import get_db
-from services.apply_service import ApplyService
-from storage.db.repository import JobRepository
+from storage.db.repository import JobRepository, TaskRepository
+from services.dialect_service import read_csv_options
 from services.job_service import can_transition
 from services.transform_service import apply_transformations
 from core.constants import DATA_DIR
@@ -18,14 +18,16 @@ router = APIRouter(
 
 
 @router.post("", status_code=202)
-def apply_transformations(
-    job_id: str,
-    bg: BackgroundTasks,
-    db: Session = Depends(get_db),
-):
-    service = ApplyService(db)
-    bg.add_task(service.run, job_id)
-    return {"job_id": job_id, "status": "applying"}
+def apply_transformations(job_id: str, db: Session = Depends(get_db)):
+    job = JobRepository(db).get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status != "applying" and not can_transition(job.status, "applying"):
+        raise HTTPException(status_code=400, detail="Invalid job state")
+
+    # Run by a worker process
+    task = TaskRepository(db).enqueue(job_id, "apply")
+    return {"job_id": job_id, "status": "applying", "task_id": task.id}
 
 
 @router.post("")
@@ -49,7 +51,7 @@ def apply_cleaning(job_id: str, db: Session = Depends(get_db)):
 
     os.makedirs(output_dir, exist_ok=True)
 
-    df = pd.read_csv(input_path)
+    df = pd.read_csv(input_path, **read_csv_options(job.csv_dialect))
 
     # 🔒 For now, suggestions are read from MCP output already applied
     # We assume suggestions were validated earlier
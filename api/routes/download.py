@@ -1,9 +1,15 @@
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import FileResponse, JSONResponse
+from pathlib import Path
+from typing import Literal
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse, JSONResponse, Response
 import os
 import json
 
 from core.constants import DATA_DIR
+from services.download_service import content_digest, etag_matches, negotiate_encoding
+from services.export_service import EXPORT_MEDIA_TYPES, ensure_export
+from storage.object_store import encoded_path, CSV_ENCODINGS
 
 router = APIRouter(
     prefix="/jobs/{job_id}/download",
@@ -12,16 +18,58 @@ router = APIRouter(
 
 
 @router.get("")
-def download_cleaned(job_id: str):
+def download_cleaned(
+    job_id: str,
+    request: Request,
+    format: Literal["csv", "parquet", "feather", "arrow"] = "csv",
+):
+    """
+    Download the cleaned dataset. parquet, feather (Arrow IPC file) and arrow
+    (Arrow IPC stream) keep the cleaned dtypes and are zstd-compressed.
+
+    The CSV is sent zstd- or gzip-encoded when Accept-Encoding allows it.
+    Responses carry a strong ETag (If-None-Match answers 304 Not Modified)
+    and support Range requests for resuming interrupted downloads.
+    """
     path = f"{DATA_DIR}/cleaned/{job_id}.csv"
 
     if not os.path.exists(path):
         raise HTTPException(status_code=404, detail="Cleaned file not found")
 
+    headers = {}
+    if format == "csv":
+        headers["Vary"] = "Accept-Encoding"
+        encoding = negotiate_encoding(
+            request.headers.get("accept-encoding"),
+            [encoding for encoding in CSV_ENCODINGS if encoded_path(job_id, encoding).exists()],
+        )
+        if encoding:
+            headers["Content-Encoding"] = encoding
+            file_path = encoded_path(job_id, encoding)
+        else:
+            file_path = Path(path)
+        media_type = "text/csv"
+        filename = f"{job_id}_cleaned.csv"
+    else:
+        try:
+            file_path = ensure_export(job_id, format)
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="Cleaned file not found")
+        media_type = EXPORT_MEDIA_TYPES[format]
+        filename = f"{job_id}_cleaned{file_path.suffix}"
+
+    # Revalidate on every use: a re-apply rewrites the files in place
+    headers["Cache-Control"] = "no-cache"
+    headers["ETag"] = f'"{content_digest(job_id, file_path)}"'
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    # FileResponse answers Range (and If-Range against the ETag) itself
     return FileResponse(
-        path,
-        media_type="text/csv",
-        filename=f"{job_id}_cleaned.csv"
+        file_path,
+        media_type=media_type,
+        filename=filename,
+        headers=headers,
     )
 
 
@@ -30,7 +78,8 @@ def get_dtypes(job_id: str):
     """
     Get dtype information for the cleaned dataset.
     CSV format doesn't preserve data types (especially datetime64).
-    Use this endpoint to understand the intended data types.
+    Use this endpoint to understand the intended data types, or download
+    format=parquet, feather or arrow, which keep them.
     
     To read the CSV with proper dtypes:
     ```python
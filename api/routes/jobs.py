@@ -1,27 +1,137 @@
-from fastapi import APIRouter, Depends, BackgroundTasks, HTTPException, UploadFile, File
+from datetime import datetime
+import base64
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
-from pathlib import Path
+from starlette.concurrency import run_in_threadpool
 
 from api.deps import get_db
-from storage.db.models import JobModel
-from storage.db.repository import JobRepository, ProfilingRepository
-from services.profiling_service import ProfilingService
-from core.constants import DATA_DIR
+from api.schemas.domain import JobStatus
+from api.schemas.response import JobListResponse, JobStatusesResponse
+from api.upload_stream import receive_upload
+from core.config import settings
+from storage.db.repository import JobRepository, ProfilingRepository, TaskRepository
+from services.upload_service import ALL_SHEETS, UploadService, UploadTooLargeError, UploadWriter
 
 router = APIRouter(prefix="/jobs", tags=["jobs"])
 
+# Most jobs answered by one bulk status request
+MAX_STATUS_IDS = 500
+
+# Multipart framing allowed on top of MAX_UPLOAD_BYTES before Content-Length
+# alone is reason to refuse an upload
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+def _encode_cursor(job) -> str:
+    key = json.dumps([job.created_at.isoformat(), job.id])
+    return base64.urlsafe_b64encode(key.encode()).decode()
 
-@router.post("/upload")
-def upload_file(file: UploadFile = File(...), db: Session = Depends(get_db)):
-    job = JobRepository(db).create(
-        JobModel(original_filename=file.filename)
+
+def _decode_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        created_at, job_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(created_at), job_id
+    except (ValueError, TypeError):
+        raise HTTPException(400, "Invalid cursor")
+
+
+def _upload_result(job) -> dict:
+    result = {"job_id": job.id, "status": job.status, "upload_cache": job.upload_cache}
+    if job.sheet_name is not None:
+        result["sheet"] = job.sheet_name
+    return result
+
+
+@router.post("/upload", openapi_extra={"requestBody": {"required": True, "content": {
+    "multipart/form-data": {"schema": {
+        "type": "object",
+        "required": ["file"],
+        "properties": {
+            "file": {"type": "string", "format": "binary"},
+            "sheet": {"type": "string"},
+        },
+    }},
+}}})
+async def upload_file(
+    request: Request,
+    profile: bool | None = None,
+    db: Session = Depends(get_db),
+):
+    """
+    Upload a CSV or Excel (.xlsx) file. For workbooks, sheet selects the
+    worksheet to clean (default: the first); sheet="*" creates one job per
+    sheet with data and returns them all under "jobs".
+
+    The file is streamed to disk as it arrives, so memory use does not grow
+    with its size. Uploads over MAX_UPLOAD_BYTES are answered 413, before the
+    body is read when Content-Length already says so.
+
+    With profile=true (default: PROFILE_DURING_UPLOAD) a CSV is profiled as
+    it streams in; its profile is ready when this returns and the profiling
+    phase skips reading the file again.
+    """
+    limit = settings.MAX_UPLOAD_BYTES
+    content_length = request.headers.get("content-length", "")
+    if limit and content_length.isdigit() and int(content_length) > limit + MULTIPART_OVERHEAD_BYTES:
+        raise HTTPException(413, f"Upload exceeds the limit of {limit} bytes")
+
+    # Identical uploads reuse the results of an earlier completed job
+    service = UploadService(db)
+    try:
+        if profile is None:
+            profile = settings.PROFILE_DURING_UPLOAD
+        with UploadWriter(profile=profile) as upload:
+            filename, fields = await receive_upload(request, upload)
+            await run_in_threadpool(upload.finish)
+            sheet = fields.get("sheet") or None
+            if sheet == ALL_SHEETS:
+                jobs = await run_in_threadpool(service.store_upload_sheets, upload, filename)
+                return {"jobs": [_upload_result(job) for job in jobs]}
+            job = await run_in_threadpool(service.store_upload, upload, filename, sheet)
+    except UploadTooLargeError as e:
+        raise HTTPException(413, str(e))
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+    return _upload_result(job)
+
+
+@router.get("", response_model=JobListResponse)
+def list_jobs(
+    status: list[JobStatus] | None = Query(None),
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: str | None = None,
+    db: Session = Depends(get_db),
+):
+    """Jobs newest first, a page at a time; pass next_cursor to get the next page"""
+    jobs = JobRepository(db).list_jobs(
+        statuses=[s.value for s in status] if status else None,
+        created_after=created_after,
+        created_before=created_before,
+        limit=limit,
+        after=_decode_cursor(cursor) if cursor else None,
     )
+    next_cursor = _encode_cursor(jobs[-1]) if len(jobs) == limit else None
+    return {"jobs": jobs, "next_cursor": next_cursor}
+
 
-    Path(DATA_DIR).mkdir(exist_ok=True)
-    with open(Path(DATA_DIR) / f"{job.id}.csv", "wb") as f:
-        f.write(file.file.read())
+@router.get("/status", response_model=JobStatusesResponse)
+def get_job_statuses(ids: list[str] = Query(...), db: Session = Depends(get_db)):
+    """
+    Statuses of many jobs in one query, for dashboards polling a batch of
+    jobs. ids can be repeated or comma-separated.
+    """
+    job_ids = list(dict.fromkeys(i for value in ids for i in value.split(",") if i))
+    if len(job_ids) > MAX_STATUS_IDS:
+        raise HTTPException(400, f"At most {MAX_STATUS_IDS} ids per request")
 
-    return {"job_id": job.id, "status": job.status}
+    rows = JobRepository(db).get_statuses(job_ids)
+    jobs = {row.id: {"status": row.status, "completed_at": row.completed_at} for row in rows}
+    return {"jobs": jobs, "missing": [i for i in job_ids if i not in jobs]}
 
 
 @router.get("/{job_id}")
@@ -32,6 +142,24 @@ def get_job(job_id: str, db: Session = Depends(get_db)):
     return job
 
 
+@router.get("/{job_id}/history")
+def get_status_history(job_id: str, db: Session = Depends(get_db)):
+    """When the job entered each status, and how long it stayed there"""
+    repo = JobRepository(db)
+    if not repo.get(job_id):
+        raise HTTPException(404, "Job not found")
+
+    events = repo.get_status_history(job_id)
+    history = []
+    for event, following in zip(events, events[1:] + [None]):
+        history.append({
+            "status": event.status,
+            "at": event.at,
+            "seconds": (following.at - event.at).total_seconds() if following else None,
+        })
+    return {"job_id": job_id, "history": history}
+
+
 @router.get("/{job_id}/profile")
 def get_profile(job_id: str, db: Session = Depends(get_db)):
     profile = ProfilingRepository(db).get_by_job_id(job_id)
@@ -41,27 +169,29 @@ def get_profile(job_id: str, db: Session = Depends(get_db)):
 
 
 @router.post("/{job_id}/profile", status_code=202)
-def start_profiling(
-    job_id: str,
-    bg: BackgroundTasks,
-    db: Session = Depends(get_db),
-):
+def start_profiling(job_id: str, db: Session = Depends(get_db)):
+    # A reused upload is already done; there is nothing to run
+    job = JobRepository(db).get(job_id)
+    if job and job.upload_cache == "hit" and job.status == "done":
+        return {"job_id": job_id, "status": job.status}
+
+    # Worker processes run the phases (see services/worker.py)
     try:
-        JobRepository(db).update_status(job_id, "profiling")
+        task = TaskRepository(db).enqueue(job_id, "profile", status="profiling")
     except ValueError as e:
         raise HTTPException(400, str(e))
-
-    bg.add_task(ProfilingService(db).run, job_id)
-    return {"job_id": job_id, "status": "profiling"}
+    return {"job_id": job_id, "status": "profiling", "task_id": task.id}
 
 
 @router.post("/{job_id}/retry", status_code=202)
-def retry(job_id: str, bg: BackgroundTasks, db: Session = Depends(get_db)):
+def retry(job_id: str, db: Session = Depends(get_db)):
     job = JobRepository(db).get(job_id)
     if not job or job.status != "failed":
         raise HTTPException(400, "Job not retryable")
 
-    JobRepository(db).update_status(job_id, "profiling")
-    bg.add_task(ProfilingService(db).run, job_id)
+    try:
+        task = TaskRepository(db).enqueue(job_id, "profile", status="profiling")
+    except ValueError as e:
+        raise HTTPException(400, str(e))
 
-    return {"job_id": job_id, "status": "profiling"}
+    return {"job_id": job_id, "status": "profiling", "task_id": task.id}
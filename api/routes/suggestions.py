@@ -1,9 +1,8 @@
-from fastapi import APIRouter, Depends, BackgroundTasks, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
 from api.deps import get_db
-from storage.db.repository import SuggestionRepository, JobRepository, ProfilingRepository
-from services.suggestion_service import SuggestionService
+from storage.db.repository import SuggestionRepository, JobRepository, ProfilingRepository, TaskRepository
 from services.job_service import can_transition
 
 
@@ -14,14 +13,16 @@ router = APIRouter(
 
 
 @router.post("", status_code=202)
-def start_suggestions(
-    job_id: str,
-    bg: BackgroundTasks,
-    db: Session = Depends(get_db),
-):
-    service = SuggestionService(db, None)
-    bg.add_task(service.run, job_id)
-    return {"job_id": job_id, "status": "suggesting"}
+def start_suggestions(job_id: str, db: Session = Depends(get_db)):
+    job = JobRepository(db).get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status != "suggesting" and not can_transition(job.status, "suggesting"):
+        raise HTTPException(status_code=400, detail="Invalid job state")
+
+    # Run by a worker process, which queues the applying phase afterwards
+    task = TaskRepository(db).enqueue(job_id, "suggest")
+    return {"job_id": job_id, "status": "suggesting", "task_id": task.id}
 
 
 @router.get("")
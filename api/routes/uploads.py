@@ -0,0 +1,94 @@
+from fastapi import APIRouter, Depends, HTTPException, Path, Request
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from api.deps import get_db
+from api.routes.jobs import _upload_result
+from api.schemas.request import CreateUploadRequest
+from api.schemas.response import UploadSessionResponse
+from services.upload_service import ALL_SHEETS, UploadTooLargeError
+from services.upload_session_service import UploadSessionService, MAX_PARTS
+
+router = APIRouter(prefix="/uploads", tags=["uploads"])
+
+
+@router.post("", status_code=201, response_model=UploadSessionResponse)
+def create_upload(body: CreateUploadRequest, db: Session = Depends(get_db)):
+    """
+    Start a resumable upload. Send the file as part_count parts of part_size
+    bytes with PUT /uploads/{id}/parts/{n}, in any order and in parallel,
+    then POST /uploads/{id}/complete to create the job.
+    """
+    try:
+        return UploadSessionService(db).create(
+            body.filename, body.size, body.sheet, body.part_size, body.profile
+        )
+    except UploadTooLargeError as e:
+        raise HTTPException(413, str(e))
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+
+@router.get("/{upload_id}", response_model=UploadSessionResponse)
+def get_upload(upload_id: str, db: Session = Depends(get_db)):
+    """Which parts have arrived; after an interruption, send the missing ones"""
+    status = UploadSessionService(db).status(upload_id)
+    if status is None:
+        raise HTTPException(404, "Upload session not found")
+    return status
+
+
+@router.put("/{upload_id}/parts/{number}")
+async def put_part(
+    upload_id: str,
+    request: Request,
+    number: int = Path(ge=1, le=MAX_PARTS),
+    db: Session = Depends(get_db),
+):
+    """
+    Send one part as the raw request body. A part is stored only once it has
+    arrived whole, so an interrupted part is simply sent again.
+    """
+    try:
+        with UploadSessionService(db).open_part(upload_id, number) as part:
+            # Straight to disk, one network chunk at a time
+            async for chunk in request.stream():
+                await run_in_threadpool(part.write, chunk)
+    except (KeyError, FileNotFoundError):
+        raise HTTPException(404, "Upload session not found")
+    except UploadTooLargeError as e:
+        raise HTTPException(413, str(e))
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+    return {"upload_id": upload_id, "part": number, "size": part.size}
+
+
+@router.post("/{upload_id}/complete")
+def complete_upload(upload_id: str, db: Session = Depends(get_db)):
+    """
+    Assemble the parts and create the job; answers like POST /jobs/upload.
+    Fails with 400 while parts are missing; any later failure uses up the
+    session and the upload has to be sent again.
+    """
+    service = UploadSessionService(db)
+    session = service.status(upload_id)
+    if session is None:
+        raise HTTPException(404, "Upload session not found")
+    try:
+        jobs = service.complete(upload_id)
+    except KeyError:
+        raise HTTPException(404, "Upload session not found")
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+    if session["sheet"] == ALL_SHEETS:
+        return {"jobs": [_upload_result(job) for job in jobs]}
+    return _upload_result(jobs[0])
+
+
+@router.delete("/{upload_id}", status_code=204)
+def abort_upload(upload_id: str, db: Session = Depends(get_db)):
+    """Discard a session and the parts received so far"""
+    if not UploadSessionService(db).abort(upload_id):
+        raise HTTPException(404, "Upload session not found")
@@ -0,0 +1,14 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+
+
+class CreateUploadRequest(BaseModel):
+    filename: str
+    # Total bytes of the file to be sent in parts
+    size: int = Field(ge=0)
+    # Workbook sheet to clean; "*" creates one job per sheet
+    sheet: Optional[str] = None
+    # Bytes per part (the last one may be shorter); defaults to UPLOAD_PART_SIZE
+    part_size: Optional[int] = Field(None, ge=64 * 1024)
+    # Profile the upload as it is assembled; defaults to PROFILE_DURING_UPLOAD
+    profile: Optional[bool] = None
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from datetime import datetime
 from .domain import Job, JobStatus
 
@@ -10,6 +10,18 @@ class CreateJobResponse(BaseModel):
 
 class JobListResponse(BaseModel):
     jobs: List[Job]
+    # Pass as cursor to fetch the next page; None on the last page
+    next_cursor: Optional[str] = None
+
+
+class JobStatusSummary(BaseModel):
+    status: JobStatus
+    completed_at: Optional[datetime] = None
+
+
+class JobStatusesResponse(BaseModel):
+    jobs: Dict[str, JobStatusSummary]
+    missing: List[str]
 
 
 class ProfilingResponse(BaseModel):
@@ -22,3 +34,19 @@ class ProfilingResponse(BaseModel):
 
 class SuggestionResponse(BaseModel):
     suggestions: List[Dict[str, Any]]
+
+
+class UploadSessionResponse(BaseModel):
+    upload_id: str
+    filename: str
+    sheet: Optional[str] = None
+    # Whether the upload is profiled as it is assembled
+    profile: bool = False
+    size: int
+    part_size: int
+    part_count: int
+    received_parts: List[int]
+    missing_parts: List[int]
+    received_bytes: int
+    # The session and its parts are deleted if no part arrives before then
+    expires_at: datetime
@@ -0,0 +1,101 @@
+"""
+Streaming multipart/form-data parsing for POST /jobs/upload.
+
+Starlette's request.form() spools file parts to temporary files before the
+route runs; where /tmp is memory-backed (Cloud Run) that costs about twice
+the upload's size in RAM. Here the file part goes straight into an
+UploadWriter as the body arrives, one network chunk at a time.
+"""
+from fastapi import Request
+from python_multipart.multipart import MultipartParser, parse_options_header
+from starlette.concurrency import run_in_threadpool
+
+from services.upload_service import UploadWriter
+
+# Form field carrying the uploaded file
+FILE_FIELD = "file"
+
+# Bytes kept in memory for each of the other form fields, at most
+MAX_FIELD_BYTES = 64 * 1024
+
+
+def _file_part(parts: list[tuple[str, str | None]]) -> int | None:
+    return next(
+        (i for i, (name, filename) in enumerate(parts) if name == FILE_FIELD and filename is not None),
+        None,
+    )
+
+
+async def receive_upload(request: Request, upload: UploadWriter) -> tuple[str, dict[str, str]]:
+    """
+    Stream the file part of a multipart request body into upload.
+
+    Returns:
+        The uploaded file's name, and the other form fields
+
+    Raises:
+        UploadTooLargeError: As soon as the file grows past the upload limit
+        ValueError: If the body is not multipart/form-data or has no file part
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise ValueError("Expected a multipart/form-data body")
+
+    parts = []  # (field name, filename or None) of each part seen so far
+    headers = {}
+    header = {"field": b"", "value": b""}
+    received = []  # (part index, data) parsed from the current chunk
+
+    def on_header_field(data, start, end):
+        header["field"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        header["value"] += data[start:end]
+
+    def on_header_end():
+        headers[header["field"].lower()] = header["value"]
+        header["field"] = header["value"] = b""
+
+    def on_headers_finished():
+        _, options = parse_options_header(headers.pop(b"content-disposition", b""))
+        filename = options.get(b"filename")
+        parts.append((
+            options.get(b"name", b"").decode("utf-8"),
+            filename.decode("utf-8") if filename is not None else None,
+        ))
+        headers.clear()
+
+    def on_part_data(data, start, end):
+        received.append((len(parts) - 1, data[start:end]))
+
+    parser = MultipartParser(params[b"boundary"], {
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+    })
+
+    fields = {}
+    async for chunk in request.stream():
+        parser.write(chunk)
+        file_data = []
+        for index, data in received:
+            name, filename = parts[index]
+            if name == FILE_FIELD and filename is not None:
+                # Only the first file part is kept
+                if index == _file_part(parts):
+                    file_data.append(data)
+                continue
+            fields[name] = fields.get(name, b"") + data
+            if len(fields[name]) > MAX_FIELD_BYTES:
+                raise ValueError(f"Form field {name!r} is too large")
+        received.clear()
+        if file_data:
+            await run_in_threadpool(upload.write, b"".join(file_data))
+    parser.finalize()
+
+    index = _file_part(parts)
+    if index is None:
+        raise ValueError(f"No {FILE_FIELD!r} file in the upload")
+    return parts[index][1], {name: value.decode("utf-8") for name, value in fields.items()}
@@ -21,6 +21,7 @@ def cleanup_old_files(days_old: int = 7) -> dict:
     stats = {
         "uploaded_deleted": 0,
         "cleaned_deleted": 0,
+        "artifacts_deleted": 0,
         "reports_deleted": 0
     }
     
@@ -35,10 +36,19 @@ def cleanup_old_files(days_old: int = 7) -> dict:
     # Clean cleaned files
     cleaned_dir = data_path / "cleaned"
     if cleaned_dir.exists():
-        for csv_file in cleaned_dir.glob("*.csv"):
-            if csv_file.stat().st_mtime < cutoff_time.timestamp():
-                csv_file.unlink()
-                stats["cleaned_deleted"] += 1
+        for pattern in ("*.csv", "*.csv.gz", "*.csv.zst", "*_digests.json", "*.parquet", "*.feather", "*.arrow"):
+            for cleaned_file in cleaned_dir.glob(pattern):
+                if cleaned_file.stat().st_mtime < cutoff_time.timestamp():
+                    cleaned_file.unlink()
+                    stats["cleaned_deleted"] += 1
+    
+    # Clean columnar artifacts written at ingest
+    artifacts_dir = data_path / "artifacts"
+    if artifacts_dir.exists():
+        for artifact_file in artifacts_dir.glob("*.parquet"):
+            if artifact_file.stat().st_mtime < cutoff_time.timestamp():
+                artifact_file.unlink()
+                stats["artifacts_deleted"] += 1
     
     # Clean reports
     reports_dir = data_path / "reports"
@@ -55,6 +65,10 @@ def cleanup_job_files(job_id: str) -> bool:
     """
     Remove all files associated with a specific job
     
+    Files shared with jobs that reused an identical upload are hard links
+    (see storage.object_store.link_file), so the data is only freed once the
+    last job referencing it is cleaned up.
+    
     Args:
         job_id: The job ID to clean up
         
@@ -76,6 +90,31 @@ def cleanup_job_files(job_id: str) -> bool:
         cleaned_file.unlink()
         deleted = True
     
+    # Remove typed exports, precompressed copies and their content hashes
+    for extension in (".parquet", ".feather", ".arrow", ".csv.gz", ".csv.zst", "_digests.json"):
+        export_file = data_path / "cleaned" / f"{job_id}{extension}"
+        if export_file.exists():
+            export_file.unlink()
+            deleted = True
+    
+    # Remove dtype metadata
+    dtypes_file = data_path / "cleaned" / f"{job_id}_dtypes.json"
+    if dtypes_file.exists():
+        dtypes_file.unlink()
+        deleted = True
+    
+    # Remove executed plan
+    plan_file = data_path / "cleaned" / f"{job_id}_plan.json"
+    if plan_file.exists():
+        plan_file.unlink()
+        deleted = True
+    
+    # Remove columnar artifact
+    artifact_file = data_path / "artifacts" / f"{job_id}.parquet"
+    if artifact_file.exists():
+        artifact_file.unlink()
+        deleted = True
+    
     # Remove report
     report_file = data_path / "reports" / f"{job_id}.md"
     if report_file.exists():
@@ -4,6 +4,76 @@ from pydantic_settings import BaseSettings
 class Settings(BaseSettings):
     MCP_URL: str = "http://mcp:9000"
 
+    # Rows held in memory at once when transformations are applied chunk by chunk
+    APPLY_CHUNK_SIZE: int = 100_000
+    # Uploads at least this large (in bytes) are applied chunk by chunk
+    APPLY_STREAMING_THRESHOLD_BYTES: int = 256 * 1024 * 1024
+    # Largest accepted upload in bytes; bigger ones are answered 413 (0 is unlimited)
+    MAX_UPLOAD_BYTES: int = 1024 * 1024 * 1024
+    # Part size offered to resumable uploads, and how long an upload session
+    # may sit idle before its parts are deleted
+    UPLOAD_PART_SIZE: int = 8 * 1024 * 1024
+    UPLOAD_SESSION_TTL_SECONDS: int = 24 * 60 * 60
+    # Profile CSV uploads while they stream in, so the profiling phase does
+    # not read them again (per upload: ?profile= / the session's profile)
+    PROFILE_DURING_UPLOAD: bool = False
+    # Rows of an Excel sheet converted to CSV at a time on upload
+    EXCEL_BATCH_ROWS: int = 10_000
+    # Workers applying independent column chains (0 uses one per CPU, 1 is serial)
+    APPLY_WORKERS: int = 0
+    # "thread" or "process"; processes avoid the GIL but copy each column
+    APPLY_EXECUTOR: str = "thread"
+
+    # Rule-based suggestions are decided from a stratified sample of this many
+    # rows on larger datasets (0 always scans every row)
+    SUGGESTION_SAMPLE_ROWS: int = 200_000
+    # Workers analyzing columns concurrently (0 uses one per CPU, 1 is serial)
+    SUGGESTION_WORKERS: int = 0
+    # "thread" or "process"; processes avoid the GIL but copy each column
+    SUGGESTION_EXECUTOR: str = "thread"
+
+    # Suggestions are cached by schema/profile fingerprint for this long (0 disables)
+    SUGGESTION_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    # Least recently used cache entries beyond this many are evicted
+    SUGGESTION_CACHE_MAX_ENTRIES: int = 1000
+
+    # Datasets with at least this many rows (counted from line breaks) are
+    # profiled chunk by chunk into fixed-size sketches instead of exact
+    # per-column counts (0 never does)
+    PROFILING_SKETCH_ROWS: int = 1_000_000
+    # Rows profiled at once in sketch mode
+    PROFILING_CHUNK_SIZE: int = 100_000
+
+    # Connections kept open per process, and extra ones allowed under load
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    # Seconds a SQLite connection waits for the write lock before failing
+    DB_BUSY_TIMEOUT_SECONDS: float = 30.0
+    # SQLite journal and sync modes; use DELETE where WAL is unsupported
+    # (e.g. network filesystems)
+    DB_SQLITE_JOURNAL_MODE: str = "WAL"
+    DB_SQLITE_SYNCHRONOUS: str = "NORMAL"
+
+    # Write gzip and zstd copies of the cleaned CSV at apply time, served to
+    # clients that send a matching Accept-Encoding
+    DOWNLOAD_PRECOMPRESS: bool = True
+
+    # Record when each job entered each status (GET /jobs/{id}/history)
+    JOB_STATUS_HISTORY: bool = True
+
+    # Worker processes running queued pipeline phases
+    WORKER_CONCURRENCY: int = 2
+    # Seconds a claimed task stays leased; running workers renew the lease, so
+    # it only expires (and the task is claimed again) when a worker dies
+    WORKER_VISIBILITY_TIMEOUT_SECONDS: int = 300
+    # Claims of one task (crash recoveries included) before it is failed
+    WORKER_MAX_ATTEMPTS: int = 3
+    # Seconds an idle worker waits before polling the queue again
+    WORKER_POLL_INTERVAL_SECONDS: float = 1.0
+    # The API starts the worker processes itself; set false when running
+    # `python -m services.worker` separately
+    WORKER_EMBEDDED: bool = True
+
     class Config:
         env_file = ".env"
 
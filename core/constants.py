@@ -9,5 +9,8 @@ JOB_STATUS_TRANSITIONS = {
     "failed": ["profiling"],  # 👈 retry allowed
 }
 
+# Statuses that end a pipeline run; reaching one stamps completed_at
+TERMINAL_STATUSES = {"done", "failed"}
+
 # Use /tmp for Cloud Run compatibility (filesystem is read-only except /tmp)
 DATA_DIR = os.getenv("DATA_DIR", "/tmp/data")
@@ -0,0 +1,347 @@
+"""
+Fixed-size, mergeable summaries of a column for profiling large datasets.
+
+Each sketch is built from chunks with add() and combined with merge(), so
+chunked or parallel scans can combine partial results: merged HyperLogLog
+registers and count-min tables equal those of a single scan, while the
+heavy-hitter candidates and t-digest centroids are equivalent approximations.
+Error bounds:
+
+- HyperLogLog (distinct count): relative standard error 1.04 / sqrt(2**precision),
+  about 1.6% at the default precision of 12 (4096 registers, 4 KiB).
+- CountMinSketch (value frequencies): estimates never undercount; with
+  probability 1 - exp(-depth) each one overcounts by at most
+  e / width * total rows, i.e. 0.13% of the rows at the default width of 2048
+  and depth of 5 (99.3%). Heavy hitters come from a best-effort list of at
+  most capacity candidates, trimmed by estimated count as chunks arrive and
+  sketches merge: trimming can drop a value that ends up frequent overall,
+  so the list may miss a true heavy hitter. The counts reported for the values it
+  does hold follow the count-min bound.
+- TDigest (quantiles): keeps at most about compression / 2 centroids, finer
+  at the tails. There is no hard bound; rank error is typically well below
+  1 / compression (0.5% at the default of 200) and smaller near the extremes.
+  min and max are exact.
+
+Numeric values are hashed as float64 (so 4 and 4.0 are one value) and other
+values by their string representation.
+"""
+import base64
+import math
+import zlib
+
+import numpy as np
+import pandas as pd
+
+
+def _hash_keys(keys: pd.Index) -> np.ndarray:
+    """64-bit hashes of distinct values"""
+    if pd.api.types.is_numeric_dtype(keys) and not pd.api.types.is_bool_dtype(keys):
+        keys = pd.Series(keys.to_numpy(dtype=np.float64))
+    else:
+        keys = pd.Series(keys.astype(str), dtype=object)
+    return pd.util.hash_pandas_object(keys, index=False).to_numpy()
+
+
+def _encode(array: np.ndarray) -> str:
+    return base64.b64encode(zlib.compress(array.tobytes())).decode("ascii")
+
+
+def _decode(data: str, dtype) -> np.ndarray:
+    return np.frombuffer(zlib.decompress(base64.b64decode(data)), dtype=dtype).copy()
+
+
+class HyperLogLog:
+    """Approximate distinct count"""
+
+    def __init__(self, precision: int = 12, registers: np.ndarray | None = None):
+        self.precision = precision
+        self.registers = (
+            registers if registers is not None else np.zeros(1 << precision, dtype=np.uint8)
+        )
+
+    def add_hashes(self, hashes: np.ndarray):
+        if len(hashes) == 0:
+            return
+        hashes = hashes.astype(np.uint64, copy=False)
+        suffix_bits = 64 - self.precision
+        index = (hashes >> np.uint64(suffix_bits)).astype(np.intp)
+        suffix = hashes & np.uint64((1 << suffix_bits) - 1)
+        # Position of the leftmost 1-bit of the suffix; suffixes fit a float64 mantissa
+        bit_length = np.frexp(suffix.astype(np.float64))[1]
+        rank = (suffix_bits - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches of different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.exp2(-self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities
+            raw = m * math.log(m / zeros)
+        return int(round(raw))
+
+    def to_dict(self) -> dict:
+        return {"precision": self.precision, "registers": _encode(self.registers)}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "HyperLogLog":
+        return cls(data["precision"], _decode(data["registers"], np.uint8))
+
+
+class CountMinSketch:
+    """Approximate value frequencies, with likely frequent values kept as candidates"""
+
+    def __init__(
+        self,
+        width: int = 2048,
+        depth: int = 5,
+        capacity: int = 50,
+        table: np.ndarray | None = None,
+        total: int = 0,
+        candidates: dict | None = None,
+    ):
+        self.width = width
+        self.depth = depth
+        self.capacity = capacity
+        self.table = table if table is not None else np.zeros((depth, width), dtype=np.int64)
+        self.total = total
+        self.candidates = candidates or {}  # key -> hash
+
+    def _positions(self, hashes: np.ndarray) -> np.ndarray:
+        """(depth, n) cells for each hash, derived from its two 32-bit halves"""
+        hashes = hashes.astype(np.uint64, copy=False)
+        low = hashes & np.uint64(0xFFFFFFFF)
+        high = hashes >> np.uint64(32)
+        rows = np.arange(self.depth, dtype=np.uint64)[:, None]
+        return ((low + rows * high) % np.uint64(self.width)).astype(np.intp)
+
+    def estimate_hashes(self, hashes: np.ndarray) -> np.ndarray:
+        positions = self._positions(hashes)
+        return self.table[np.arange(self.depth)[:, None], positions].min(axis=0)
+
+    def add(self, keys: pd.Index, hashes: np.ndarray, counts: np.ndarray):
+        """Count values (distinct within the batch) seen counts times"""
+        if len(keys) == 0:
+            return
+        positions = self._positions(hashes)
+        for row in range(self.depth):
+            np.add.at(self.table[row], positions[row], counts)
+        self.total += int(counts.sum())
+
+        top = np.argsort(-counts, kind="stable")[:self.capacity]
+        for i in top:
+            self.candidates.setdefault(str(keys[i]), int(hashes[i]))
+        self._trim_candidates()
+
+    def merge(self, other: "CountMinSketch") -> "CountMinSketch":
+        if (other.width, other.depth) != (self.width, self.depth):
+            raise ValueError("Cannot merge count-min sketches of different shape")
+        self.table += other.table
+        self.total += other.total
+        for key, key_hash in other.candidates.items():
+            self.candidates.setdefault(key, key_hash)
+        self._trim_candidates()
+        return self
+
+    def _trim_candidates(self):
+        if len(self.candidates) <= self.capacity:
+            return
+        self.candidates = dict(self.heavy_hitters(self.capacity, with_hashes=True))
+
+    def heavy_hitters(self, k: int = 10, with_hashes: bool = False) -> list:
+        """The k candidates with the highest estimated counts, as [key, count] pairs"""
+        if not self.candidates:
+            return []
+        keys = list(self.candidates)
+        hashes = np.array([self.candidates[key] for key in keys], dtype=np.uint64)
+        estimates = self.estimate_hashes(hashes)
+        order = np.argsort(-estimates, kind="stable")[:k]
+        if with_hashes:
+            return [(keys[i], int(hashes[i])) for i in order]
+        return [[keys[i], int(estimates[i])] for i in order]
+
+    def to_dict(self) -> dict:
+        return {
+            "width": self.width,
+            "depth": self.depth,
+            "capacity": self.capacity,
+            "total": self.total,
+            "table": _encode(self.table),
+            # Hashes are stored as strings: JSON numbers lose uint64 precision
+            "candidates": {key: str(key_hash) for key, key_hash in self.candidates.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CountMinSketch":
+        table = _decode(data["table"], np.int64).reshape(data["depth"], data["width"])
+        return cls(
+            data["width"],
+            data["depth"],
+            data["capacity"],
+            table,
+            data["total"],
+            {key: int(key_hash) for key, key_hash in data["candidates"].items()},
+        )
+
+
+class TDigest:
+    """Approximate quantiles of numeric values"""
+
+    def __init__(
+        self,
+        compression: float = 200,
+        means: np.ndarray | None = None,
+        weights: np.ndarray | None = None,
+        min: float | None = None,
+        max: float | None = None,
+    ):
+        self.compression = compression
+        self.means = means if means is not None else np.empty(0)
+        self.weights = weights if weights is not None else np.empty(0)
+        self.min = min
+        self.max = max
+
+    @property
+    def count(self) -> float:
+        return float(self.weights.sum())
+
+    def add(self, values: np.ndarray):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        self._update_range(float(values.min()), float(values.max()))
+        self._compress(
+            np.concatenate([self.means, values]),
+            np.concatenate([self.weights, np.ones(len(values))]),
+        )
+
+    def merge(self, other: "TDigest") -> "TDigest":
+        if other.count == 0:
+            return self
+        self._update_range(other.min, other.max)
+        self._compress(
+            np.concatenate([self.means, other.means]),
+            np.concatenate([self.weights, other.weights]),
+        )
+        return self
+
+    def _update_range(self, low: float, high: float):
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+
+    def _compress(self, means: np.ndarray, weights: np.ndarray):
+        """
+        Merge sorted centroids that fall in the same unit of the k1 scale
+        function k(q) = compression / (2 pi) * asin(2q - 1), which keeps
+        centroids small near q = 0 and q = 1.
+        """
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+        cumulative = np.cumsum(weights)
+        q_left = (cumulative - weights) / cumulative[-1]
+        k = self.compression / (2 * np.pi) * np.arcsin(2 * q_left - 1)
+        bucket = np.floor(k).astype(np.int64)
+        starts = np.flatnonzero(np.diff(bucket, prepend=bucket[0] - 1))
+        merged_weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / merged_weights
+        self.weights = merged_weights
+
+    def quantile(self, q: float) -> float | None:
+        if self.count == 0:
+            return None
+        total = self.count
+        centers = np.cumsum(self.weights) - self.weights / 2
+        return float(np.interp(
+            q * total,
+            np.concatenate([[0.0], centers, [total]]),
+            np.concatenate([[self.min], self.means, [self.max]]),
+        ))
+
+    def to_dict(self) -> dict:
+        return {
+            "compression": self.compression,
+            "means": self.means.tolist(),
+            "weights": self.weights.tolist(),
+            "min": self.min,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TDigest":
+        return cls(
+            data["compression"],
+            np.array(data["means"], dtype=np.float64),
+            np.array(data["weights"], dtype=np.float64),
+            data["min"],
+            data["max"],
+        )
+
+
+# Quantiles reported in a column sketch summary
+SUMMARY_QUANTILES = [0.01, 0.25, 0.5, 0.75, 0.99]
+
+
+class ColumnSketch:
+    """Distinct count, heavy hitters and (for numeric columns) quantiles of one column"""
+
+    def __init__(
+        self,
+        distinct: HyperLogLog | None = None,
+        frequent: CountMinSketch | None = None,
+        quantiles: TDigest | None = None,
+    ):
+        self.distinct = distinct or HyperLogLog()
+        self.frequent = frequent or CountMinSketch()
+        self.quantiles = quantiles or TDigest()
+
+    def add(self, series: pd.Series):
+        """Add a chunk of the column"""
+        counts = series.value_counts(dropna=True, sort=False)
+        if counts.empty:
+            return
+        hashes = _hash_keys(counts.index)
+        self.distinct.add_hashes(hashes)
+        self.frequent.add(counts.index, hashes, counts.to_numpy())
+        if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            self.quantiles.add(series.to_numpy(dtype=np.float64, na_value=np.nan))
+
+    def merge(self, other: "ColumnSketch") -> "ColumnSketch":
+        self.distinct.merge(other.distinct)
+        self.frequent.merge(other.frequent)
+        self.quantiles.merge(other.quantiles)
+        return self
+
+    def summary(self, top_k: int = 10) -> dict:
+        summary = {
+            "approx_distinct_count": self.distinct.estimate(),
+            "heavy_hitters": self.frequent.heavy_hitters(top_k),
+        }
+        if self.quantiles.count:
+            summary["quantiles"] = {
+                f"p{round(q * 100):02d}": self.quantiles.quantile(q) for q in SUMMARY_QUANTILES
+            }
+        return summary
+
+    def to_dict(self) -> dict:
+        return {
+            "summary": self.summary(),
+            "distinct": self.distinct.to_dict(),
+            "frequent": self.frequent.to_dict(),
+            "quantiles": self.quantiles.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ColumnSketch":
+        return cls(
+            HyperLogLog.from_dict(data["distinct"]),
+            CountMinSketch.from_dict(data["frequent"]),
+            TDigest.from_dict(data["quantiles"]),
+        )
@@ -0,0 +1,148 @@
+"""
+Benchmark many simultaneous jobs against the shared SQLite database.
+
+Queues --jobs uploads, runs them with --workers worker processes while
+--pollers threads poll job status the way the landing page does, and reports
+throughput, poll latency and "database is locked" errors. Each configuration
+runs in a fresh process and database:
+
+- rollback journal, synchronous=FULL and a 5 s busy timeout (the previous
+  SQLite defaults)
+- WAL, synchronous=NORMAL and DB_BUSY_TIMEOUT_SECONDS (the current defaults)
+
+Usage:
+    python scripts/benchmark_concurrency.py --jobs 100 --workers 4
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+CONFIGURATIONS = {
+    "rollback journal": {
+        "DB_SQLITE_JOURNAL_MODE": "DELETE",
+        "DB_SQLITE_SYNCHRONOUS": "FULL",
+        "DB_BUSY_TIMEOUT_SECONDS": "5",
+    },
+    "WAL": {},
+}
+
+
+def make_csv(rows: int, seed: int) -> bytes:
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "Transaction ID": [f"TXN_{seed}_{i}" for i in range(rows)],
+        "Item": rng.choice(["Coffee", "Cake", "Cookie", "ERROR"], rows),
+        "Quantity": rng.integers(1, 6, rows),
+        "Total Spent": rng.choice(["4.0", "12.0", "ERROR", "10.0"], rows),
+        "Payment Method": rng.choice(["Credit Card", "Cash", "UNKNOWN"], rows),
+    }).to_csv(index=False).encode()
+
+
+def run(args):
+    """One configuration; DATA_DIR and DATABASE_URL are set by the parent"""
+    import io
+
+    import numpy as np
+    from sqlalchemy.exc import OperationalError
+
+    from storage.db import create_schema, session_scope
+    from storage.db.repository import JobRepository, TaskRepository
+    from services.upload_service import UploadService
+    from services.worker import WorkerPool
+
+    create_schema()
+    job_ids = []
+    with session_scope() as db:
+        for i in range(args.jobs):
+            job = UploadService(db).store(io.BytesIO(make_csv(args.rows, i)), f"job_{i}.csv")
+            JobRepository(db).update_status(job.id, "profiling")
+            TaskRepository(db).enqueue(job.id, "profile")
+            job_ids.append(job.id)
+
+    latencies, errors = [], []
+    finished = threading.Event()
+
+    def poll(offset: int):
+        i = offset
+        while not finished.is_set():
+            start = time.perf_counter()
+            try:
+                with session_scope() as db:
+                    JobRepository(db).get(job_ids[i % len(job_ids)])
+                latencies.append(time.perf_counter() - start)
+            except OperationalError as e:
+                errors.append(str(e))
+            i += 1
+            time.sleep(0.01)
+
+    pool = WorkerPool(args.workers)
+    start = time.perf_counter()
+    pool.start()
+    pollers = [threading.Thread(target=poll, args=(i,)) for i in range(args.pollers)]
+    for thread in pollers:
+        thread.start()
+
+    statuses = {}
+    while time.perf_counter() - start < args.timeout:
+        with session_scope() as db:
+            statuses = {job_id: JobRepository(db).get(job_id).status for job_id in job_ids}
+        if all(status in ("done", "failed") for status in statuses.values()):
+            break
+        time.sleep(0.2)
+    elapsed = time.perf_counter() - start
+
+    finished.set()
+    for thread in pollers:
+        thread.join()
+    pool.stop()
+
+    done = sum(status == "done" for status in statuses.values())
+    latencies = np.array(latencies) * 1000
+    print(f"  jobs done:     {done}/{len(job_ids)} in {elapsed:.1f}s ({done / elapsed:.1f} jobs/s)")
+    print(f"  status polls:  {len(latencies)}, p50 {np.percentile(latencies, 50):.1f} ms, "
+          f"p95 {np.percentile(latencies, 95):.1f} ms, max {latencies.max():.1f} ms")
+    print(f"  locked errors: {len(errors)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--jobs", type=int, default=50)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--pollers", type=int, default=8)
+    parser.add_argument("--timeout", type=float, default=600)
+    parser.add_argument("--run", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run(args)
+        return
+
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    print(f"{args.jobs} jobs x {args.rows} rows, {args.workers} workers, {args.pollers} pollers")
+    for name, overrides in CONFIGURATIONS.items():
+        tmp_dir = tempfile.mkdtemp(prefix="bench_concurrency_")
+        env = {
+            **os.environ,
+            **overrides,
+            "DATA_DIR": tmp_dir,
+            "DATABASE_URL": f"sqlite:///{tmp_dir}/bench.db",
+            "PYTHONPATH": project_root,
+        }
+        print(f"{name}:", flush=True)
+        try:
+            subprocess.run([sys.executable, __file__, "--run", *sys.argv[1:]], env=env, check=True)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
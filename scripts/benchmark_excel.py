@@ -0,0 +1,98 @@
+"""
+Benchmark conversion time and peak memory of Excel uploads.
+
+Writes a synthetic --rows workbook, then converts it to CSV in a fresh
+process per method: with the streaming read-only conversion used on upload,
+and by loading the whole sheet with pandas.read_excel (a regular openpyxl
+workbook) before writing it out. Peak memory is the child's maximum RSS.
+
+Usage:
+    python scripts/benchmark_excel.py --rows 200000
+"""
+import argparse
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Ensure project root is in sys.path for imports
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import numpy as np
+from openpyxl import Workbook
+
+METHODS = ["read_only", "read_excel"]
+
+
+def make_workbook(path: str, rows: int):
+    """Write-only mode keeps generating the benchmark input cheap"""
+    rng = np.random.default_rng(42)
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Sales")
+    sheet.append(["Transaction ID", "Item", "Quantity", "Price Per Unit", "Transaction Date"])
+    items = rng.choice(["Coffee", "Cake", "Cookie", "Salad", "ERROR"], rows)
+    quantities = rng.integers(1, 6, rows)
+    prices = rng.choice([1.0, 2.0, 3.0, 5.0], rows)
+    start = datetime(2023, 1, 1)
+    for i in range(rows):
+        sheet.append([
+            f"TXN_{i}", items[i], int(quantities[i]), float(prices[i]),
+            start + timedelta(days=i % 365),
+        ])
+    workbook.save(path)
+
+
+def convert(method: str, workbook_path: str, csv_path: str):
+    if method == "read_only":
+        from services.excel_service import convert_sheet
+
+        convert_sheet(workbook_path, "Sales", csv_path)
+    else:
+        import pandas as pd
+
+        pd.read_excel(workbook_path, sheet_name="Sales").to_csv(csv_path, index=False)
+
+
+def run_child(method: str, workbook_path: str, csv_path: str):
+    start = time.perf_counter()
+    convert(method, workbook_path, csv_path)
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is in KiB on Linux
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{elapsed} {peak_mb}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--child", nargs=3, metavar=("METHOD", "XLSX", "CSV"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(*args.child)
+        return
+
+    tmp_dir = tempfile.mkdtemp(prefix="bench_excel_")
+    workbook_path = os.path.join(tmp_dir, "bench.xlsx")
+    make_workbook(workbook_path, args.rows)
+    print(f"Workbook: {args.rows} rows, {os.path.getsize(workbook_path) / 1e6:.1f} MB")
+
+    for method in METHODS:
+        output = subprocess.run(
+            [sys.executable, __file__, "--child", method, workbook_path, os.path.join(tmp_dir, f"{method}.csv")],
+            check=True, capture_output=True, text=True,
+        ).stdout.split()
+        elapsed, peak_mb = float(output[-2]), float(output[-1])
+        print(f"{method:<11} {elapsed:6.2f}s  peak RSS {peak_mb:7.1f} MB")
+
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark end-to-end job latency with and without the columnar ingest artifact.
+
+Runs the full profile -> suggest -> apply chain on a synthetic CSV twice:
+once with every phase parsing the CSV (the previous behaviour) and once with
+the phases sharing the Parquet artifact written at ingest.
+
+Usage:
+    python scripts/benchmark_ingest.py --rows 1000000
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# Point storage at a throwaway directory before any project module is imported
+_tmp_dir = tempfile.mkdtemp(prefix="bench_ingest_")
+os.environ["DATA_DIR"] = _tmp_dir
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp_dir}/bench.db"
+
+# Ensure project root is in sys.path for imports
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import numpy as np
+import pandas as pd
+from storage.db import engine, Base, SessionLocal
+from storage.db.models import JobModel
+from storage.db.repository import JobRepository
+from storage.object_store import raw_path
+from services import apply_service, suggestion_service
+from services.profiling_service import ProfilingService
+
+
+def make_dataset(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(42)
+    return pd.DataFrame({
+        "Transaction ID": [f"TXN_{i}" for i in range(rows)],
+        "Item": rng.choice(["Coffee", "Cake", "Cookie", "Salad", "ERROR"], rows),
+        "Quantity": rng.integers(1, 6, rows),
+        "Price Per Unit": rng.choice([1.0, 2.0, 3.0, 5.0], rows),
+        "Total Spent": rng.choice(["4.0", "12.0", "ERROR", "10.0"], rows),
+        "Payment Method": rng.choice(["Credit Card", "Cash", "UNKNOWN"], rows),
+        "Location": rng.choice(["Takeaway", "In-store", "UNKNOWN"], rows),
+    })
+
+
+def run_job(session_factory, csv_bytes: bytes) -> float:
+    db = session_factory()
+    try:
+        job = JobRepository(db).create(JobModel(original_filename="bench.csv"))
+        raw_path(job.id).write_bytes(csv_bytes)
+        JobRepository(db).update_status(job.id, "profiling")
+
+        start = time.perf_counter()
+        ProfilingService(db).run(job.id)
+        return time.perf_counter() - start
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    session_factory = SessionLocal
+    csv_bytes = make_dataset(args.rows).to_csv(index=False).encode()
+    print(f"Dataset: {args.rows} rows, {len(csv_bytes) / 1e6:.1f} MB CSV")
+
+    shared = min(run_job(session_factory, csv_bytes) for _ in range(args.repeat))
+
+    # Emulate the previous behaviour: every phase parses the raw CSV itself
+    def parse_csv(job_id):
+        return pd.read_csv(raw_path(job_id))
+
+    suggestion_service.load_dataframe = parse_csv
+    apply_service.load_dataframe = parse_csv
+    reparsed = min(run_job(session_factory, csv_bytes) for _ in range(args.repeat))
+
+    print(f"CSV parsed in every phase: {reparsed:.2f}s")
+    print(f"Shared columnar artifact:  {shared:.2f}s")
+    print(f"Speedup: {reparsed / shared:.2f}x")
+
+    engine.dispose()
+    shutil.rmtree(_tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark per-job database time of status transitions.
+
+Moves --jobs jobs through pending -> profiling -> suggesting -> applying ->
+done with the previous update_status (SELECT, check in Python, UPDATE, COMMIT,
+refresh SELECT) and with the current single conditional UPDATE, and reports
+the statements and the time spent per job.
+
+Usage:
+    python scripts/benchmark_status_updates.py --jobs 2000
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# Ensure project root is in sys.path for imports
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from core.config import settings
+from core.constants import JOB_STATUS_TRANSITIONS
+from storage.db import create_schema, make_engine
+from storage.db.models import JobModel
+from storage.db.repository import JobRepository
+
+TRANSITIONS = ["profiling", "suggesting", "applying", "done"]
+
+
+def update_status_select_then_update(db, job_id: str, new_status: str):
+    """The previous implementation, kept here as the baseline"""
+    job = db.query(JobModel).filter_by(id=job_id).first()
+    if not job:
+        raise ValueError("Job not found")
+    if new_status not in JOB_STATUS_TRANSITIONS.get(job.status, []):
+        raise ValueError(f"Invalid transition {job.status} → {new_status}")
+    job.status = new_status
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def measure(engine, job_ids, transition) -> tuple[float, float]:
+    """Seconds and statements per job"""
+    statements = 0
+
+    def count(*args):
+        nonlocal statements
+        statements += 1
+
+    event.listen(engine, "before_cursor_execute", count)
+    db = sessionmaker(bind=engine)()
+    start = time.perf_counter()
+    for job_id in job_ids:
+        for status in TRANSITIONS:
+            transition(db, job_id, status)
+    elapsed = time.perf_counter() - start
+    db.close()
+    event.remove(engine, "before_cursor_execute", count)
+    return elapsed / len(job_ids), statements / len(job_ids)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--jobs", type=int, default=1000)
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix="bench_status_")
+    engine = make_engine(f"sqlite:///{tmp_dir}/bench.db")
+    create_schema(bind=engine)
+    # The previous implementation kept no history; compare like with like
+    settings.JOB_STATUS_HISTORY = False
+
+    def new_jobs():
+        db = sessionmaker(bind=engine)()
+        ids = [JobRepository(db).create(JobModel(original_filename="bench.csv")).id
+               for _ in range(args.jobs)]
+        db.close()
+        return ids
+
+    baseline = measure(engine, new_jobs(), update_status_select_then_update)
+    current = measure(
+        engine, new_jobs(), lambda db, job_id, status: JobRepository(db).update_status(job_id, status)
+    )
+
+    print(f"{args.jobs} jobs x {len(TRANSITIONS)} transitions")
+    print(f"SELECT + UPDATE + refresh: {baseline[0] * 1000:.2f} ms/job, {baseline[1]:.0f} statements/job")
+    print(f"Conditional UPDATE:        {current[0] * 1000:.2f} ms/job, {current[1]:.0f} statements/job")
+    print(f"Speedup: {baseline[0] / current[0]:.2f}x")
+
+    engine.dispose()
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark standardize_case against the previous per-cell implementation.
+
+The previous version called _to_snake_case once per row through Series.apply;
+the current one factorizes the column and transforms each distinct value once.
+
+Usage:
+    python scripts/benchmark_string_ops.py --rows 1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+# Ensure project root is in sys.path for imports
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import numpy as np
+import pandas as pd
+
+from transformations.operations import _to_snake_case, standardize_case
+
+
+def standardize_case_per_cell(df: pd.DataFrame, column: str) -> pd.DataFrame:
+    """The previous implementation, kept here as the baseline"""
+    df[column] = df[column].apply(
+        lambda x: _to_snake_case(x) if isinstance(x, str) and pd.notna(x) else x
+    )
+    return df
+
+
+def best_of(repeat: int, func, df: pd.DataFrame, column: str) -> float:
+    timings = []
+    for _ in range(repeat):
+        frame = df.copy()
+        start = time.perf_counter()
+        func(frame, column)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    columns = {
+        "Payment Method": ["Credit Card", "Cash", "Digital Wallet", None],
+        "Location": ["In-store", "Takeaway", "  Drive Thru ", None],
+        "Customer": [f"Customer {i}" for i in range(args.rows // 10)],
+    }
+    df = pd.DataFrame({
+        name: rng.choice(np.array(values, dtype=object), args.rows)
+        for name, values in columns.items()
+    })
+
+    expected = standardize_case_per_cell(df.copy(), "Location")
+    pd.testing.assert_frame_equal(standardize_case(df.copy(), "Location"), expected)
+
+    print(f"{args.rows} rows")
+    for column in columns:
+        distinct = df[column].nunique()
+        per_cell = best_of(args.repeat, standardize_case_per_cell, df, column)
+        factorized = best_of(args.repeat, standardize_case, df, column)
+        print(
+            f"{column:<16} {distinct:>8} distinct  "
+            f"per-cell {per_cell:.3f}s  factorized {factorized:.3f}s  "
+            f"speedup {per_cell / factorized:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
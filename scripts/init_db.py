@@ -7,10 +7,10 @@ if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
 from storage.db.models import JobModel, ProfilingResult, SuggestionModel
-from storage.db import engine, Base
+from storage.db import create_schema
 
 def init_db():
-    Base.metadata.create_all(bind=engine)
+    create_schema()
 
 if __name__ == "__main__":
     init_db()
\ No newline at end of file
@@ -1,24 +1,43 @@
 import pandas as pd
 import json
-from pathlib import Path
 from sqlalchemy.orm import Session
 
 from storage.db.repository import (
     JobRepository,
+    ProfilingRepository,
     SuggestionRepository,
 )
-from transformations.registry import TRANSFORMATION_REGISTRY
+from transformations.executor import execute_plan
+from transformations.planner import input_columns, optimize_plan
+from transformations.streaming import ChunkedPipeline
 from services.job_service import can_transition
-from core.constants import DATA_DIR
+from services.ingest_service import load_dataframe, iter_chunks, merge_dtypes
+from services.profiling_service import build_read_schema
+from services.download_service import remove_encoded_copies, write_encoded_copies
+from services.export_service import remove_exports, write_parquet_export
+from storage.object_store import raw_path, cleaned_path, dtypes_path, plan_path
+from core.config import settings
 
 
 class ApplyService:
     def __init__(self, db: Session):
         self.db = db
         self.job_repo = JobRepository(db)
+        self.profile_repo = ProfilingRepository(db)
         self.suggestion_repo = SuggestionRepository(db)
 
-    def run(self, job_id: str):
+    def run(self, job_id: str, chunked: bool | None = None):
+        """
+        Apply the stored suggestions and write the cleaned CSV, its
+        compressed copies, and its Parquet export when the data is cleaned in
+        memory.
+
+        Args:
+            job_id: The job to apply
+            chunked: Stream the data in chunks of settings.APPLY_CHUNK_SIZE rows
+                instead of loading it whole. None picks chunked mode for uploads
+                of at least settings.APPLY_STREAMING_THRESHOLD_BYTES.
+        """
         try:
             job = self.job_repo.get(job_id)
             if not job:
@@ -33,26 +52,52 @@ class ApplyService:
             if not suggestions:
                 raise ValueError("Suggestions missing")
 
-            input_path = Path(DATA_DIR) / f"{job_id}.csv"
-            output_dir = Path(DATA_DIR) / "cleaned"
-            output_dir.mkdir(exist_ok=True)
-            output_path = output_dir / f"{job_id}.csv"
+            output_path = cleaned_path(job_id)
+            output_dir = output_path.parent
+            output_dir.mkdir(parents=True, exist_ok=True)
+            remove_exports(job_id)
+            remove_encoded_copies(job_id)
+
+            if chunked is None:
+                chunked = (
+                    raw_path(job_id).stat().st_size
+                    >= settings.APPLY_STREAMING_THRESHOLD_BYTES
+                )
 
-            df = pd.read_csv(input_path)
+            # Fuse, reorder and prune the suggested steps; the result is identical
+            profiling = self.profile_repo.get_by_job_id(job_id)
+            steps, optimizations = optimize_plan(
+                suggestions.suggestions,
+                profiling.column_types if profiling else None,
+            )
 
-            for step in suggestions.suggestions:
-                op_name = step.get("operation")
-                params = step.get("params", {})
+            # Typed reads of only the columns the plan keeps or uses
+            schema, columns = None, None
+            if profiling:
+                schema = profiling.read_schema or build_read_schema(
+                    profiling.column_types, profiling.column_stats or {}
+                )
+                columns = input_columns(steps, list(profiling.column_types))
+            # load_dataframe / iter_chunks arguments
+            read = {"dialect": job.csv_dialect, "schema": schema, "columns": columns}
 
-                operation = TRANSFORMATION_REGISTRY.get(op_name)
-                if not operation:
-                    continue  # silently skip unsupported ops
+            if chunked:
+                df = self._apply_chunked(job_id, steps, output_path, read)
+            else:
+                df = self._apply_in_memory(job_id, steps, output_path, read)
 
-                df = operation(df, **params)
+            # Record what actually ran so the report can show it
+            try:
+                plan = {
+                    "steps": steps,
+                    "optimizations": optimizations,
+                    "suggested_step_count": len(suggestions.suggestions),
+                }
+                with open(plan_path(job_id), "w", encoding="utf-8") as f:
+                    json.dump(plan, f, indent=2)
+            except (IOError, OSError) as e:
+                print(f"Warning: Could not write executed plan file: {e}")
 
-            # Save the cleaned DataFrame to CSV
-            df.to_csv(output_path, index=False)
-            
             # Save dtype metadata to help users understand the data types
             # (CSV format doesn't preserve dtypes like datetime64)
             try:
@@ -65,12 +110,15 @@ class ApplyService:
                         datetime_columns.append(col)
                 
                 # Save metadata file
-                metadata_path = output_dir / f"{job_id}_dtypes.json"
+                metadata_path = dtypes_path(job_id)
                 metadata = {
                     "dtypes": dtype_info,
                     "datetime_columns": datetime_columns,
-                    "note": "CSV format converts datetime to strings. Use parse_dates parameter when reading."
+                    "note": "CSV format converts datetime to strings. Use parse_dates parameter when reading, or download format=parquet for typed data."
                 }
+                # Memory saved per column by optimize_dtypes, if it ran
+                if df.attrs.get("bytes_saved"):
+                    metadata["bytes_saved"] = df.attrs["bytes_saved"]
                 with open(metadata_path, 'w', encoding='utf-8') as f:
                     json.dump(metadata, f, indent=2)
             except (IOError, OSError) as e:
@@ -78,7 +126,78 @@ class ApplyService:
                 # The cleaned CSV is still valid
                 print(f"Warning: Could not write dtype metadata file: {e}")
 
+            # Precompressed copies for downloads with Accept-Encoding
+            if settings.DOWNLOAD_PRECOMPRESS:
+                try:
+                    write_encoded_copies(job_id)
+                except (IOError, OSError) as e:
+                    # Downloads fall back to the uncompressed CSV
+                    print(f"Warning: Could not write compressed copies: {e}")
+
             self.job_repo.update_status(job_id, "done")
         except Exception:
             self.job_repo.update_status(job_id, "failed")
             raise
+
+    def _apply_in_memory(
+        self, job_id: str, steps: list[dict], output_path, read: dict
+    ) -> pd.DataFrame:
+        df = load_dataframe(job_id, **read)
+
+        # Independent per-column chains run concurrently between barrier steps
+        df = execute_plan(
+            df,
+            steps,
+            workers=settings.APPLY_WORKERS,
+            executor=settings.APPLY_EXECUTOR,
+        )
+
+        # Save the cleaned DataFrame to CSV
+        df.to_csv(output_path, index=False)
+
+        # Typed columnar copy for GET /download?format=parquet (feather and
+        # arrow are derived from it on request)
+        try:
+            write_parquet_export(job_id, df)
+        except (IOError, OSError, ValueError, TypeError, NotImplementedError) as e:
+            # Built from the CSV on first request instead
+            print(f"Warning: Could not write Parquet export: {e}")
+        return df
+
+    def _apply_chunked(
+        self, job_id: str, steps: list[dict], output_path, read: dict
+    ) -> pd.DataFrame:
+        """
+        Stream the dataset through the plan so peak memory is bounded by
+        settings.APPLY_CHUNK_SIZE rather than by file size. Cleaned chunks are
+        appended to a temporary file that replaces the output once complete.
+
+        Returns:
+            An empty frame with the output dtypes, merged across all chunks
+        """
+        pipeline = ChunkedPipeline(steps)
+
+        def chunks():
+            return iter_chunks(job_id, settings.APPLY_CHUNK_SIZE, **read)
+
+        # Steps that read what an earlier global step rewrites need another pass
+        while pipeline.needs_planning:
+            for chunk in chunks():
+                pipeline.observe(chunk)
+            pipeline.finalize()
+
+        tmp_path = output_path.with_suffix(".csv.tmp")
+        dtypes = {}
+        with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+            for chunk in chunks():
+                cleaned = pipeline.transform(chunk)
+                cleaned.to_csv(f, header=f.tell() == 0, index=False)
+                # A chunk with missing values may come out as float64 where
+                # the others are int64; record the dtype that holds them all
+                dtypes = merge_dtypes(dtypes, cleaned)
+        tmp_path.replace(output_path)
+
+        df = pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype in dtypes.items()})
+        if pipeline.bytes_saved:
+            df.attrs["bytes_saved"] = pipeline.bytes_saved
+        return df
@@ -0,0 +1,130 @@
+"""
+CSV dialect sniffing.
+
+Exports from spreadsheets and regional tools are not always UTF-8 and
+comma-separated. The first DIALECT_SAMPLE_BYTES of an upload are inspected
+once, when its job is created, for the encoding, delimiter, quote character,
+header row and decimal separator. The result is stored on the job
+(JobModel.csv_dialect) and every later read of the upload passes it to
+pd.read_csv through read_csv_options, instead of assuming pandas' defaults.
+"""
+import codecs
+import csv
+import re
+
+# Leading bytes of an upload inspected to tell its dialect
+DIALECT_SAMPLE_BYTES = 64 * 1024
+
+# Lines of the sample the delimiter and header are decided from
+SAMPLE_LINES = 100
+
+DELIMITERS = ",;\t|"
+
+# Fields that are numbers with a comma or a point as decimal separator
+COMMA_DECIMAL = re.compile(r"\s*[+-]?\d+,\d+\s*")
+POINT_DECIMAL = re.compile(r"\s*[+-]?\d+\.\d+\s*")
+NUMBER = re.compile(r"\s*[+-]?(\d+([.,]\d*)?|[.,]\d+)([eE][+-]?\d+)?\s*")
+
+DEFAULT_DIALECT = {
+    "encoding": "utf-8",
+    "delimiter": ",",
+    "quotechar": '"',
+    "header": True,
+    "decimal": ".",
+}
+
+
+def _detect_encoding(sample: bytes) -> str:
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16"
+    try:
+        # Not final: the sample may end inside a multi-byte character
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+    try:
+        sample.decode("cp1252")
+        return "cp1252"
+    except UnicodeDecodeError:
+        # Every byte sequence is valid latin-1
+        return "latin-1"
+
+
+def _decimal(rows: list[list[str]]) -> str:
+    comma = point = 0
+    for row in rows:
+        for field in row:
+            if COMMA_DECIMAL.fullmatch(field):
+                comma += 1
+            elif POINT_DECIMAL.fullmatch(field):
+                point += 1
+    return "," if comma > point else "."
+
+
+def sniff_dialect(sample: bytes) -> dict:
+    """
+    Dialect of a CSV from its first bytes.
+
+    A header row is assumed unless the first row holds numbers and the
+    csv module's heuristics also find no header; headerless files get the
+    column names column_1, column_2, ...
+
+    Returns:
+        encoding, delimiter, quotechar, header and decimal, plus names when
+        there is no header row
+    """
+    dialect = dict(DEFAULT_DIALECT)
+    dialect["encoding"] = _detect_encoding(sample)
+    text = codecs.getincrementaldecoder(dialect["encoding"])(errors="replace").decode(sample)
+    lines = text.splitlines(keepends=True)
+    if len(sample) >= DIALECT_SAMPLE_BYTES and len(lines) > 1:
+        # The last line is probably cut short
+        lines = lines[:-1]
+    text = "".join(lines[:SAMPLE_LINES])
+    if not text.strip():
+        return dialect
+
+    sniffer = csv.Sniffer()
+    try:
+        sniffed = sniffer.sniff(text, delimiters=DELIMITERS)
+        dialect["delimiter"] = sniffed.delimiter
+        dialect["quotechar"] = sniffed.quotechar or '"'
+    except csv.Error:
+        # A single column, or nothing consistent enough to tell
+        pass
+
+    rows = [
+        row for row in csv.reader(
+            text.splitlines(), delimiter=dialect["delimiter"], quotechar=dialect["quotechar"]
+        ) if row
+    ]
+    if dialect["delimiter"] != ",":
+        dialect["decimal"] = _decimal(rows[1:])
+
+    if rows and any(NUMBER.fullmatch(field) for field in rows[0]):
+        try:
+            dialect["header"] = sniffer.has_header(text)
+        except csv.Error:
+            pass
+    if not dialect["header"]:
+        dialect["names"] = [f"column_{i}" for i in range(1, len(rows[0]) + 1)]
+    return dialect
+
+
+def read_csv_options(dialect: dict | None) -> dict:
+    """pd.read_csv keyword arguments for a stored dialect (none for jobs without one)"""
+    if not dialect:
+        return {}
+    options = {
+        "sep": dialect["delimiter"],
+        "encoding": dialect["encoding"],
+        "quotechar": dialect["quotechar"],
+        "decimal": dialect["decimal"],
+    }
+    if not dialect["header"]:
+        options["header"] = None
+        options["names"] = dialect["names"]
+    return options
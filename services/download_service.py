@@ -0,0 +1,133 @@
+"""
+Precompressed, cacheable downloads of cleaned data.
+
+The cleaned CSV is compressed once at apply time into a copy per
+CSV_ENCODINGS entry, so a download costs no compression CPU and a fraction of
+the egress. Every served file gets a strong ETag, the SHA-256 of its bytes,
+recorded in the job's digest file and recomputed only when the file's size or
+mtime changes.
+"""
+import hashlib
+import json
+import os
+import shutil
+
+import pyarrow as pa
+
+from services.export_service import _write_atomically
+from storage.object_store import cleaned_path, digests_path, encoded_path, CSV_ENCODINGS
+
+BLOCK_SIZE = 1024 * 1024
+
+# Tie-break between encodings a client accepts equally; zstd decompresses
+# faster and compresses CSV better than gzip
+ENCODING_PREFERENCE = ["zstd", "gzip"]
+
+
+def _sha256(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _load_digests(job_id: str) -> dict:
+    try:
+        with open(digests_path(job_id), encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _save_digests(job_id: str, digests: dict):
+    def write(path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(digests, f, indent=2)
+
+    _write_atomically(digests_path(job_id), write)
+
+
+def content_digest(job_id: str, path) -> str:
+    """SHA-256 of one of the job's files, hashed at most once per version of it"""
+    stat = os.stat(path)
+    # Taken before hashing, so a file replaced meanwhile is hashed again next time
+    stamp = [stat.st_size, stat.st_mtime_ns]
+
+    digests = _load_digests(job_id)
+    entry = digests.get(path.name)
+    if entry and entry["stamp"] == stamp:
+        return entry["sha256"]
+
+    digests[path.name] = {"sha256": _sha256(path), "stamp": stamp}
+    _save_digests(job_id, digests)
+    return digests[path.name]["sha256"]
+
+
+def remove_encoded_copies(job_id: str):
+    """Drop compressed copies and hashes of an earlier run's cleaned CSV"""
+    for encoding in CSV_ENCODINGS:
+        encoded_path(job_id, encoding).unlink(missing_ok=True)
+    digests_path(job_id).unlink(missing_ok=True)
+
+
+def _compress(source, path, encoding: str):
+    # CSV_ENCODINGS names are also pyarrow codec names
+    with open(source, "rb") as src, pa.CompressedOutputStream(str(path), encoding) as out:
+        shutil.copyfileobj(src, out, BLOCK_SIZE)
+
+
+def write_encoded_copies(job_id: str):
+    """Compress the cleaned CSV into every CSV_ENCODINGS copy and hash all of them"""
+    source = cleaned_path(job_id)
+    for encoding in CSV_ENCODINGS:
+        _write_atomically(
+            encoded_path(job_id, encoding),
+            lambda path: _compress(source, path, encoding),
+        )
+
+    content_digest(job_id, source)
+    for encoding in CSV_ENCODINGS:
+        content_digest(job_id, encoded_path(job_id, encoding))
+
+
+def negotiate_encoding(accept_encoding: str | None, available: list[str]) -> str | None:
+    """
+    Content-Encoding to serve, from an Accept-Encoding header.
+
+    Returns:
+        The available encoding with the highest q-value (ties broken by
+        ENCODING_PREFERENCE), or None to serve the file unencoded
+    """
+    if not accept_encoding:
+        return None
+
+    qualities = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qualities[coding.strip().lower()] = q
+
+    best, best_q = None, 0.0
+    for encoding in sorted(available, key=ENCODING_PREFERENCE.index):
+        q = qualities.get(encoding, qualities.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Whether an If-None-Match header lists etag (weak comparison, RFC 9110)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = (tag.strip() for tag in if_none_match.split(","))
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in tags)
@@ -0,0 +1,108 @@
+"""
+Conversion of Excel uploads into the CSV every pipeline phase reads.
+
+Workbooks are opened with openpyxl in read-only mode, which parses a sheet's
+XML as rows are requested instead of building the whole workbook in memory,
+and rows are written out settings.EXCEL_BATCH_ROWS at a time, so memory is
+bounded by the batch rather than by the workbook.
+"""
+import csv
+from contextlib import contextmanager
+from datetime import datetime, time
+from zipfile import BadZipFile
+
+from openpyxl import load_workbook
+from openpyxl.utils.exceptions import InvalidFileException
+
+from core.config import settings
+
+# Leading bytes of an .xlsx (a ZIP container) and of a legacy .xls (OLE2)
+XLSX_MAGIC = b"PK\x03\x04"
+XLS_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+
+
+class EmptySheetError(ValueError):
+    """A worksheet without a header row, which gives no dataset"""
+
+
+def sniff_format(head: bytes) -> str:
+    """
+    Format of an upload from its first bytes.
+
+    Raises:
+        ValueError: For legacy .xls workbooks, which openpyxl cannot read
+    """
+    if head.startswith(XLSX_MAGIC):
+        return "xlsx"
+    if head.startswith(XLS_MAGIC):
+        raise ValueError("Legacy .xls workbooks are not supported; save as .xlsx or CSV")
+    return "csv"
+
+
+@contextmanager
+def _open(path):
+    # Opened from a file object: openpyxl rejects paths without an Excel
+    # extension, and uploads are stored under temporary names
+    with open(path, "rb") as f:
+        try:
+            workbook = load_workbook(f, read_only=True, data_only=True)
+        except (BadZipFile, InvalidFileException, KeyError) as e:
+            raise ValueError(f"Not a readable Excel workbook: {e}")
+        try:
+            yield workbook
+        finally:
+            workbook.close()
+
+
+def sheet_names(path) -> list[str]:
+    """Names of a workbook's worksheets, in workbook order"""
+    with _open(path) as workbook:
+        return [ws.title for ws in workbook.worksheets]
+
+
+def _cell(value):
+    # Excel has no date type; dates are datetimes at midnight
+    if isinstance(value, datetime) and value.time() == time():
+        return value.date().isoformat()
+    return value
+
+
+def convert_sheet(path, sheet: str, output_path):
+    """
+    Write one worksheet of a workbook to output_path as CSV.
+
+    The first row is the header. Rows are padded or cut to the header's width
+    and blank rows are skipped.
+
+    Raises:
+        EmptySheetError: If the sheet's first row is empty
+        ValueError: If the workbook cannot be read or has no such sheet
+    """
+    with _open(path) as workbook:
+        if sheet not in workbook.sheetnames:
+            raise ValueError(f"Sheet {sheet!r} not found; sheets: {', '.join(workbook.sheetnames)}")
+
+        rows = workbook[sheet].iter_rows(values_only=True)
+        header = list(next(rows, ()))
+        # Read-only sheets report stale dimensions, so trailing empty
+        # cells are common
+        while header and header[-1] is None:
+            header.pop()
+        if not header:
+            raise EmptySheetError(f"Sheet {sheet!r} is empty or has no header row")
+
+        with open(output_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f, lineterminator="\n")
+            writer.writerow(header)
+            width = len(header)
+
+            batch = []
+            for row in rows:
+                if all(value is None for value in row):
+                    continue
+                row = [_cell(value) for value in row[:width]]
+                batch.append(row + [None] * (width - len(row)))
+                if len(batch) >= settings.EXCEL_BATCH_ROWS:
+                    writer.writerows(batch)
+                    batch.clear()
+            writer.writerows(batch)
@@ -0,0 +1,123 @@
+"""
+Typed columnar exports of cleaned datasets.
+
+CSV loses dtypes such as datetime64, Int64 and category, so the cleaned data
+is also offered as:
+
+- parquet: zstd-compressed Parquet, written at apply time when the cleaned
+  frame is in memory
+- feather: Arrow IPC file (random access), zstd-compressed
+- arrow: Arrow IPC stream, zstd-compressed, readable batch by batch
+
+Exports that do not exist yet are built on first request and kept next to
+the cleaned CSV: feather and arrow from the Parquet export, and Parquet
+(after a chunked apply) by streaming the cleaned CSV with the column types
+recorded in the dtype metadata.
+"""
+import json
+import os
+import uuid
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+from storage.object_store import cleaned_path, dtypes_path, export_path, EXPORT_EXTENSIONS
+
+EXPORT_MEDIA_TYPES = {
+    "parquet": "application/vnd.apache.parquet",
+    "feather": "application/vnd.apache.arrow.file",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+COMPRESSION = "zstd"
+
+
+def _write_atomically(path, write):
+    """Write through a temporary file so readers never see a partial export"""
+    tmp_path = path.with_name(f".{path.name}-{uuid.uuid4().hex}.tmp")
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def remove_exports(job_id: str):
+    """Drop exports of an earlier run before the cleaned data is rewritten"""
+    for fmt in EXPORT_EXTENSIONS:
+        export_path(job_id, fmt).unlink(missing_ok=True)
+
+
+def write_parquet_export(job_id: str, df: pd.DataFrame):
+    """Write the Parquet export from the cleaned frame, keeping its pandas dtypes"""
+    _write_atomically(
+        export_path(job_id, "parquet"),
+        lambda path: df.to_parquet(path, index=False, compression=COMPRESSION),
+    )
+
+
+def _arrow_type(dtype: str) -> pa.DataType:
+    """Arrow type to parse a cleaned CSV column as, from its recorded pandas dtype"""
+    if dtype.startswith("datetime64"):
+        return pa.timestamp("ns")
+    if dtype == "category":
+        return pa.dictionary(pa.int32(), pa.string())
+    if dtype in ("bool", "boolean"):
+        return pa.bool_()
+    try:
+        # int64, Int64, float32, UInt8, ... (nullable dtypes share numpy names)
+        return pa.from_numpy_dtype(dtype.lower())
+    except (TypeError, pa.ArrowNotImplementedError):
+        return pa.string()
+
+
+def _parquet_from_csv(job_id: str, path):
+    """Stream the cleaned CSV into Parquet without loading it whole"""
+    with open(dtypes_path(job_id), encoding="utf-8") as f:
+        dtypes = json.load(f)["dtypes"]
+
+    reader = pa_csv.open_csv(
+        cleaned_path(job_id),
+        convert_options=pa_csv.ConvertOptions(
+            column_types={col: _arrow_type(dtype) for col, dtype in dtypes.items()},
+            # pandas writes missing strings as empty fields
+            strings_can_be_null=True,
+        ),
+    )
+    with pq.ParquetWriter(path, reader.schema, compression=COMPRESSION) as writer:
+        for batch in reader:
+            writer.write_batch(batch)
+
+
+def _ipc_from_parquet(job_id: str, path, fmt: str):
+    source = pq.ParquetFile(export_path(job_id, "parquet"))
+    schema = source.schema_arrow
+    options = ipc.IpcWriteOptions(compression=COMPRESSION)
+    new_writer = ipc.new_file if fmt == "feather" else ipc.new_stream
+    with new_writer(path, schema, options=options) as writer:
+        for batch in source.iter_batches():
+            writer.write_batch(batch)
+
+
+def ensure_export(job_id: str, fmt: str):
+    """
+    Path of the job's export in fmt, building and caching it if needed.
+
+    Raises:
+        FileNotFoundError: If the job has no cleaned data
+    """
+    path = export_path(job_id, fmt)
+    if path.exists():
+        return path
+    if not cleaned_path(job_id).exists():
+        raise FileNotFoundError(f"Cleaned data for job {job_id} not found")
+
+    if fmt == "parquet":
+        _write_atomically(path, lambda tmp: _parquet_from_csv(job_id, tmp))
+    else:
+        ensure_export(job_id, "parquet")
+        _write_atomically(path, lambda tmp: _ipc_from_parquet(job_id, tmp, fmt))
+    return path
@@ -0,0 +1,188 @@
+import pandas as pd
+
+from core.config import settings
+from services.dialect_service import read_csv_options
+from storage.object_store import raw_path, artifact_path
+
+
+def merge_dtypes(dtypes: dict, chunk: pd.DataFrame) -> dict:
+    """
+    Column dtypes (as strings) that hold both dtypes and those of chunk, as
+    one parse of all the rows would infer them: integers become floats next
+    to floats or missing values, any other mix becomes object.
+    """
+    merged = dict(dtypes)
+    for col, dtype in chunk.dtypes.astype(str).items():
+        current = merged.setdefault(col, dtype)
+        if current == dtype:
+            continue
+        if {current, dtype} <= {"int64", "float64"}:
+            merged[col] = "float64"
+        else:
+            merged[col] = "object"
+    return merged
+
+
+def read_schema_options(schema: dict | None, columns: list | None = None) -> dict:
+    """
+    pd.read_csv keyword arguments for a job's read schema (see
+    build_read_schema): the profiled dtypes, so nothing is inferred, and
+    usecols when only some columns are needed.
+    """
+    options = {}
+    if schema:
+        options["dtype"] = schema["dtype"]
+    if columns is not None:
+        options["usecols"] = columns
+    return options
+
+
+# Raised by pd.read_csv for a value the read schema's dtype cannot hold
+SCHEMA_MISFIT_ERRORS = (ValueError, TypeError)
+
+
+def _check_schema_misfit(job_id: str, schema: dict | None, error: Exception):
+    """Re-raise a read error that no schema caused; reads with one fall back instead"""
+    if not schema:
+        raise error
+    print(f"Warning: Could not read job {job_id} with its read schema: {error}")
+
+
+def ingest(job_id: str, dialect: dict | None = None, schema: dict | None = None) -> pd.DataFrame:
+    """
+    Parse the uploaded CSV once and persist it as a Parquet artifact.
+    dialect is the job's sniffed csv_dialect (pandas' defaults without one);
+    with the profiled read schema the columns are read with their known
+    dtypes instead of being inferred.
+
+    Later phases load the artifact through load_dataframe instead of parsing
+    the CSV again. If the frame cannot be stored as Parquet (pyarrow missing,
+    mixed-type object columns) no artifact is written and load_dataframe
+    falls back to the CSV.
+
+    Returns:
+        The parsed DataFrame
+    """
+    try:
+        df = pd.read_csv(raw_path(job_id), **read_csv_options(dialect), **read_schema_options(schema))
+    except SCHEMA_MISFIT_ERRORS as e:
+        _check_schema_misfit(job_id, schema, e)
+        df = pd.read_csv(raw_path(job_id), **read_csv_options(dialect))
+
+    path = artifact_path(job_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        # Row groups sized like apply chunks so chunked reads stay bounded
+        df.to_parquet(path, index=False, row_group_size=settings.APPLY_CHUNK_SIZE)
+    except (ImportError, ValueError, TypeError, NotImplementedError) as e:
+        path.unlink(missing_ok=True)
+        print(f"Warning: Could not write columnar artifact for job {job_id}: {e}")
+
+    return df
+
+
+def load_dataframe(
+    job_id: str,
+    dialect: dict | None = None,
+    schema: dict | None = None,
+    columns: list | None = None,
+) -> pd.DataFrame:
+    """
+    Load a job's dataset, preferring the artifact written at ingest.
+    Ingests the upload first if no artifact exists yet. columns limits the
+    result to the columns a phase needs (all of them when None).
+    """
+    path = artifact_path(job_id)
+    if path.exists():
+        return pd.read_parquet(path, columns=columns)
+    df = ingest(job_id, dialect, schema)
+    return df if columns is None else df[columns]
+
+
+def iter_chunks(
+    job_id: str,
+    chunk_size: int,
+    dialect: dict | None = None,
+    schema: dict | None = None,
+    columns: list | None = None,
+):
+    """
+    Yield a job's dataset in chunks of at most chunk_size rows.
+
+    Each chunk is indexed by the original row number. Reads the ingest artifact
+    when present so every chunk has the dtypes of the full parse; otherwise
+    reads the CSV in the job's dialect with the dtypes of its read schema, so
+    chunk dtypes stay consistent. If a row does not fit the schema, the
+    columns it misfits are read as object for the rest of the file, so later
+    chunks still share one set of dtypes. columns limits the
+    chunks to the columns a phase needs (all of them when None).
+    """
+    path = artifact_path(job_id)
+    if path.exists():
+        import pyarrow.parquet as pq
+
+        offset = 0
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=columns):
+            chunk = batch.to_pandas()
+            chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+            offset += len(chunk)
+            yield chunk
+        return
+
+    options = read_csv_options(dialect)
+    # Line 0 is the header, if any
+    first = 0 if options.get("header", 0) is None else 1
+    rows = 0
+    while True:
+        # Skip the rows already yielded
+        done = rows
+        try:
+            for chunk in pd.read_csv(
+                raw_path(job_id),
+                chunksize=chunk_size,
+                skiprows=(lambda line: first <= line < first + done) if done else None,
+                **options,
+                **read_schema_options(schema, columns),
+            ):
+                chunk.index += done
+                rows += len(chunk)
+                yield chunk
+            return
+        except SCHEMA_MISFIT_ERRORS as e:
+            _check_schema_misfit(job_id, schema, e)
+            misfits = _misfit_columns(job_id, schema, options, first, rows, chunk_size, columns)
+            if not misfits:
+                raise
+            print(f"Warning: Reading {misfits} as object for the rest of job {job_id}")
+        schema = {**schema, "dtype": {**schema["dtype"], **dict.fromkeys(misfits, "object")}}
+
+
+def _misfit_columns(
+    job_id: str,
+    schema: dict,
+    options: dict,
+    first: int,
+    rows: int,
+    nrows: int,
+    columns: list | None,
+) -> list:
+    """
+    The columns whose pinned dtype cannot hold a value among the nrows rows
+    after the first rows, each re-read on its own with its dtype.
+    """
+    misfits = []
+    for col, dtype in schema["dtype"].items():
+        if dtype == "object" or (columns is not None and col not in columns):
+            continue
+        try:
+            pd.read_csv(
+                raw_path(job_id),
+                skiprows=lambda line: first <= line < first + rows,
+                nrows=nrows,
+                usecols=[col],
+                dtype={col: dtype},
+                **options,
+            )
+        except SCHEMA_MISFIT_ERRORS:
+            misfits.append(col)
+    return misfits
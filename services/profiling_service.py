@@ -1,9 +1,509 @@
-import pandas as pd
-from pathlib import Path
 from sqlalchemy.orm import Session
+import io
+import math
+import re
+
+import numpy as np
+import pandas as pd
 
 from storage.db.repository import JobRepository, ProfilingRepository
-from core.constants import DATA_DIR
+from storage.object_store import artifact_path, raw_path
+from services.dialect_service import DIALECT_SAMPLE_BYTES, read_csv_options, sniff_dialect
+from services.ingest_service import ingest, iter_chunks, merge_dtypes
+from core.config import settings
+from core.sketches import ColumnSketch
+from services.suggestion_service import NON_VALUE_INDICATORS
+from transformations.operations import (
+    _snake_case_strings,
+    infer_datetime_format,
+    parse_datetime,
+)
+
+# Most frequent values kept per column
+TOP_K_VALUES = 10
+
+
+def _json_value(value):
+    """Convert a pandas/numpy scalar into a JSON-serializable value"""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def profile_column(
+    series: pd.Series,
+    top_k: int = TOP_K_VALUES,
+    datetime_format: str | None = None,
+    infer_datetime: bool = True,
+) -> dict:
+    """
+    Compute the statistics of one column in a single pass.
+
+    The column is factorized once; every statistic is then derived from the
+    distinct values weighted by their counts, so string parsing and length
+    checks run once per distinct value rather than once per row.
+
+    Args:
+        series: The column
+        top_k: Number of most frequent values to keep
+        datetime_format: Format for the datetime parse rate; inferred from
+            the column when None and infer_datetime is True
+
+    Returns:
+        Dict with dtype, count (non-null values), null_count, distinct_count,
+        memory_bytes, top_values ([value, count] pairs), min/max, and for
+        string columns the numeric and datetime parse rates plus string
+        length stats
+    """
+    codes, uniques = pd.factorize(series)
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    non_null = int(counts.sum())
+
+    top = np.argsort(-counts, kind="stable")[:top_k]
+    stats = {
+        "dtype": str(series.dtype),
+        "count": non_null,
+        "null_count": len(series) - non_null,
+        "distinct_count": len(uniques),
+        "memory_bytes": int(series.memory_usage(index=False, deep=True)),
+        "top_values": [[_json_value(uniques[i]), int(counts[i])] for i in top],
+        "min": None,
+        "max": None,
+    }
+    if len(uniques) == 0:
+        return stats
+
+    if series.dtype != "object":
+        if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_datetime64_any_dtype(series):
+            stats["min"] = _json_value(uniques.min())
+            stats["max"] = _json_value(uniques.max())
+        return stats
+
+    values = pd.Series(np.asarray(uniques, dtype=object))
+    is_string = values.map(type).eq(str).to_numpy()
+    strings = values[is_string].astype(str)
+    string_counts = counts[is_string]
+    if is_string.all():
+        stats["min"], stats["max"] = strings.min(), strings.max()
+
+    numeric = pd.to_numeric(values, errors="coerce").notna().to_numpy()
+    stats["numeric_parse_rate"] = float(counts[numeric].sum() / non_null)
+
+    if datetime_format is None and infer_datetime:
+        datetime_format = infer_datetime_format(strings)
+    if datetime_format is not None:
+        parsed = parse_datetime(strings, datetime_format).notna().to_numpy()
+        stats["datetime_parse_rate"] = float(string_counts[parsed].sum() / non_null)
+    else:
+        stats["datetime_parse_rate"] = 0.0
+    stats["datetime_format"] = datetime_format
+
+    as_text = values.astype(str)
+    lengths = as_text.str.len().to_numpy()
+    stats["string_length"] = {
+        "min": int(lengths.min()),
+        "max": int(lengths.max()),
+        "mean": float(np.average(lengths, weights=counts)),
+    }
+    # Facts the rule-based suggestions need, counted per row
+    stats["non_value_count"] = int(counts[values.isin(NON_VALUE_INDICATORS).to_numpy()].sum())
+    stats["letter_count"] = int(
+        counts[as_text.str.contains(r"[^\W\d_]", regex=True).to_numpy()].sum()
+    )
+    stats["snake_case_mismatch_count"] = int(
+        counts[(as_text != _snake_case_strings(as_text)).to_numpy()].sum()
+    )
+    return stats
+
+
+def profile_columns(df: pd.DataFrame) -> dict:
+    """Profile every column of df (column name -> profile_column stats)"""
+    return {col: profile_column(df[col]) for col in df.columns}
+
+
+def merge_column_profiles(a: dict, b: dict) -> dict:
+    """
+    Combine the profile_column stats of two chunks of one column.
+
+    Counts add up, rates and mean lengths are weighted by the non-null counts
+    of each chunk. distinct_count and top_values cannot be merged exactly and
+    are left as in a; sketch_columns replaces them with sketch estimates.
+    """
+    if b["count"] == 0:
+        merged = dict(a)
+        merged["null_count"] += b["null_count"]
+        merged["memory_bytes"] += b["memory_bytes"]
+        return merged
+    if a["count"] == 0:
+        return merge_column_profiles(b, a)
+
+    merged = dict(a)
+    total = a["count"] + b["count"]
+    merged["count"] = total
+    merged["null_count"] = a["null_count"] + b["null_count"]
+    merged["memory_bytes"] = a["memory_bytes"] + b["memory_bytes"]
+    if a["min"] is None or b["min"] is None:
+        merged["min"] = merged["max"] = None
+    else:
+        merged["min"] = min(a["min"], b["min"])
+        merged["max"] = max(a["max"], b["max"])
+
+    if "numeric_parse_rate" in a:
+        for key in ("numeric_parse_rate", "datetime_parse_rate"):
+            merged[key] = (a[key] * a["count"] + b[key] * b["count"]) / total
+        merged["string_length"] = {
+            "min": min(a["string_length"]["min"], b["string_length"]["min"]),
+            "max": max(a["string_length"]["max"], b["string_length"]["max"]),
+            "mean": (
+                a["string_length"]["mean"] * a["count"] + b["string_length"]["mean"] * b["count"]
+            ) / total,
+        }
+        for key in ("non_value_count", "letter_count", "snake_case_mismatch_count"):
+            merged[key] = a[key] + b[key]
+    return merged
+
+
+def sketch_columns(chunks) -> tuple[dict, dict, int]:
+    """
+    Profile a dataset chunk by chunk, never holding more than one chunk.
+
+    Exact statistics are computed per chunk and merged; the distinct count and
+    top values come from a fixed-size ColumnSketch per column instead of
+    exact unique()/value_counts() over the whole column. The datetime format of
+    a string column is inferred once, from its first chunk. Duplicate rows are
+    counted exactly from 64-bit row hashes. This part is not fixed-size: one
+    hash is kept per distinct row of each chunk, 8 bytes per row for mostly
+    unique data (80 MB for ten million rows).
+
+    Args:
+        chunks: DataFrames with the same columns and dtypes, e.g. from iter_chunks
+
+    Returns:
+        (column_stats, sketches, duplicate_row_count): profile_column-style
+        stats marked "approximate", the serialized sketch of each column, and
+        the number of rows repeating an earlier row
+    """
+    columns, hashes, rows = {}, [], 0
+    for chunk in chunks:
+        rows += len(chunk)
+        hashes.append(np.unique(pd.util.hash_pandas_object(chunk, index=False).to_numpy()))
+        for col in chunk.columns:
+            series = chunk[col]
+            if col not in columns:
+                columns[col] = {
+                    "stats": None,
+                    "sketch": ColumnSketch(),
+                    "datetime_format": (
+                        infer_datetime_format(series) if series.dtype == "object" else None
+                    ),
+                }
+            column = columns[col]
+            part = profile_column(
+                series, datetime_format=column["datetime_format"], infer_datetime=False
+            )
+            if column["stats"] is not None:
+                part = merge_column_profiles(column["stats"], part)
+            column["stats"] = part
+            column["sketch"].add(series)
+
+    column_stats, sketches = {}, {}
+    for col, column in columns.items():
+        stats, sketch = column["stats"], column["sketch"]
+        summary = sketch.summary(TOP_K_VALUES)
+        stats["distinct_count"] = summary["approx_distinct_count"]
+        stats["top_values"] = summary["heavy_hitters"]
+        stats["approximate"] = True
+        column_stats[col] = stats
+        sketches[col] = sketch.to_dict()
+
+    distinct = len(np.unique(np.concatenate(hashes))) if hashes else 0
+    return column_stats, sketches, rows - distinct
+
+
+def count_rows(path) -> int:
+    """
+    Data rows of a CSV estimated from its line breaks, without parsing it.
+    Quoted line breaks make this an overestimate.
+    """
+    lines, last = 0, b"\n"
+    with open(path, "rb") as f:
+        while block := f.read(1024 * 1024):
+            lines += block.count(b"\n")
+            last = block[-1:]
+    if last != b"\n":
+        lines += 1
+    # Less the header row
+    return max(lines - 1, 0)
+
+
+# dtypes a read schema pins; other columns are left to pandas' inference
+READ_SCHEMA_DTYPES = {"int64", "float64", "bool", "object"}
+
+def build_read_schema(column_types: dict, column_stats: dict) -> dict:
+    """
+    The per-job read schema later phases pass to the CSV reader.
+
+    Returns:
+        Dict with columns (in file order) and dtype (column -> dtype to read
+        with, so pandas skips inference and every chunk gets the same dtypes)
+    """
+    schema = {"columns": list(column_types), "dtype": {}}
+    for col, dtype in column_types.items():
+        if dtype in READ_SCHEMA_DTYPES:
+            schema["dtype"][col] = dtype
+    return schema
+
+
+# Upload bytes buffered before the complete rows among them are profiled
+STREAM_BLOCK_BYTES = 4 * 1024 * 1024
+# Blocks of bytes buffered without a complete row before the profiler gives
+# up (e.g. an unterminated quoted field) and leaves it to the profiling phase
+STREAM_MAX_BUFFER_BLOCKS = 4
+
+# Values read_csv parses as integers and booleans
+INTEGER_PATTERN = r"\s*[+-]?\d+\s*"
+
+# Integers outside this range make read_csv keep the column as text
+INT64_RANGE = (-2 ** 63, 2 ** 63 - 1)
+BOOLEAN_STRINGS = ["True", "False", "TRUE", "FALSE", "true", "false"]
+
+
+def _complete_rows_pattern(delimiter: str, quotechar: str) -> re.Pattern:
+    """
+    Matches the complete rows at the start of a buffer. A field is quoted
+    only if it starts with the quote character (doubled quotes escape one),
+    so a stray quote inside an unquoted field (5'10") is just text, as for
+    read_csv. A row cut off by the end of the buffer is not matched.
+    """
+    d, q = re.escape(delimiter.encode()), re.escape(quotechar.encode())
+    # Possessive quantifiers keep the scan linear
+    field = rb"(?:%s(?:[^%s]++|%s%s)*+%s|[^%s%s\n][^%s\n]*+|)" % (q, q, q, q, q, d, q, d)
+    return re.compile(rb"(?:%s(?:%s%s)*+\r?\n)+" % (field, d, field))
+
+
+class StreamingProfiler:
+    """
+    Profile a CSV from its bytes while it is being uploaded, so the profiling
+    phase has nothing left to do.
+
+    Complete rows are parsed as text a block at a time. Per column, the
+    profile_column stats of the blocks are merged as in sketch_columns, and
+    ColumnSketches of the text and of its numeric values track distinct and
+    frequent values. Counters of integer, numeric and boolean values decide
+    the dtype read_csv would infer for the whole file. Rows are hashed to
+    count duplicates. The dialect is sniffed from the same leading bytes as
+    the job's csv_dialect, so blocks are read exactly like the upload later is.
+
+    A block that does not parse (e.g. the upload is not CSV after all), or
+    STREAM_MAX_BUFFER_BLOCKS blocks without a complete row, disables the
+    profiler, and the profiling phase runs as usual.
+    """
+
+    def __init__(self, block_bytes: int = STREAM_BLOCK_BYTES):
+        self.block_bytes = block_bytes
+        self.failed = False
+        self._buffer = bytearray()
+        self._header = None
+        self._dialect = None
+        self._rows_pattern = None
+        self._next_scan = block_bytes
+        self._rows = 0
+        self._row_hashes = []
+        self._columns = {}
+
+    def feed(self, data: bytes):
+        """Add the next bytes of the upload"""
+        if self.failed:
+            return
+        self._buffer += data
+        if len(self._buffer) < self._next_scan:
+            return
+        if self._dialect is None:
+            if len(self._buffer) < DIALECT_SAMPLE_BYTES:
+                return
+            self._sniff()
+            if self.failed:
+                return
+
+        # Each byte is scanned once per block added, not once per chunk fed
+        match = self._rows_pattern.match(self._buffer)
+        end = match.end() if match else 0
+        if end:
+            self._profile_block(bytes(self._buffer[:end]))
+            del self._buffer[:end]
+        if len(self._buffer) > STREAM_MAX_BUFFER_BLOCKS * self.block_bytes:
+            self.failed = True
+            self._buffer.clear()
+        self._next_scan = len(self._buffer) + self.block_bytes
+
+    def finish(self) -> dict | None:
+        """
+        Profile the rows left in the buffer.
+
+        Returns:
+            ProfilingRepository.create arguments, or None if the upload
+            could not be profiled
+        """
+        if self._buffer:
+            if self._dialect is None:
+                self._sniff()
+            self._profile_block(bytes(self._buffer))
+            self._buffer.clear()
+        if self.failed or self._header is None:
+            return None
+        try:
+            return self._result()
+        except (ValueError, TypeError, OverflowError) as e:
+            # Never fail the upload; the profiling phase reads the file instead
+            print(f"Warning: Could not profile upload while receiving it: {e}")
+            return None
+
+    def _sniff(self):
+        self._dialect = sniff_dialect(bytes(self._buffer[:DIALECT_SAMPLE_BYTES]))
+        if self._dialect["encoding"] == "utf-16":
+            # Rows cannot be split at single newline bytes
+            self.failed = True
+            self._buffer.clear()
+            return
+        if not self._dialect["header"]:
+            self._header = b""
+        self._rows_pattern = _complete_rows_pattern(
+            self._dialect["delimiter"], self._dialect["quotechar"]
+        )
+
+    def _profile_block(self, block: bytes):
+        if self.failed:
+            return
+        options = read_csv_options(self._dialect)
+        try:
+            if self._header is None:
+                self._header = block[:block.index(b"\n") + 1] if b"\n" in block else block
+                df = pd.read_csv(io.BytesIO(block), dtype=str, **options)
+            else:
+                df = pd.read_csv(io.BytesIO(self._header + block), dtype=str, **options)
+            if self._columns and list(df.columns) != list(self._columns):
+                raise ValueError("Columns changed between blocks")
+            self._add(df)
+        except (ValueError, TypeError):
+            # ParserError, UnicodeDecodeError and EmptyDataError included
+            self.failed = True
+            self._buffer.clear()
+
+    def _add(self, df: pd.DataFrame):
+        self._rows += len(df)
+        if len(df):
+            self._row_hashes.append(pd.util.hash_pandas_object(df, index=False).to_numpy())
+        for col in df.columns:
+            column = self._columns.setdefault(col, {
+                "stats": None,
+                "datetime_format": None,
+                "text": ColumnSketch(),
+                "numbers": ColumnSketch(),
+                "integers": 0,
+                "big_integers": 0,
+                "numeric": 0,
+                "booleans": 0,
+                "trues": 0,
+                "min": None,
+                "max": None,
+            })
+            series = df[col]
+            values = series.dropna()
+            if column["stats"] is None or (column["stats"]["count"] == 0 and len(values)):
+                column["datetime_format"] = infer_datetime_format(values)
+
+            part = profile_column(
+                series, datetime_format=column["datetime_format"], infer_datetime=False
+            )
+            column["stats"] = part if column["stats"] is None else merge_column_profiles(column["stats"], part)
+            column["text"].add(series)
+
+            if self._dialect["decimal"] != ".":
+                numbers = values.str.replace(self._dialect["decimal"], ".", regex=False)
+            else:
+                numbers = values
+            numbers = pd.to_numeric(numbers, errors="coerce").dropna()
+            column["numbers"].add(numbers)
+            column["numeric"] += len(numbers)
+            if len(numbers):
+                low, high = float(numbers.min()), float(numbers.max())
+                column["min"] = low if column["min"] is None else min(column["min"], low)
+                column["max"] = high if column["max"] is None else max(column["max"], high)
+            integers = values[values.str.fullmatch(INTEGER_PATTERN)]
+            # Only numbers of 19 digits or more can leave the int64 range
+            long = integers[integers.str.strip().str.lstrip("+-").str.len() > 18]
+            big = sum(not INT64_RANGE[0] <= int(value) <= INT64_RANGE[1] for value in long)
+            column["integers"] += len(integers) - big
+            column["big_integers"] += big
+            column["booleans"] += int(values.isin(BOOLEAN_STRINGS).sum())
+            column["trues"] += int(values.str.lower().eq("true").sum())
+
+    def _dtype(self, column: dict) -> str:
+        count, nulls = column["stats"]["count"], column["stats"]["null_count"]
+        if count == 0:
+            return "float64"
+        if column["big_integers"]:
+            return "object"
+        if column["integers"] == count:
+            return "int64" if nulls == 0 else "float64"
+        if column["numeric"] == count:
+            return "float64"
+        if column["booleans"] == count and nulls == 0:
+            return "bool"
+        return "object"
+
+    def _result(self) -> dict:
+        column_types, column_stats, sketches = {}, {}, {}
+        for col, column in self._columns.items():
+            dtype = self._dtype(column)
+            stats = column["stats"]
+            if dtype == "object":
+                sketch = column["text"]
+                summary = sketch.summary(TOP_K_VALUES)
+                stats = {**stats, "top_values": summary["heavy_hitters"]}
+            else:
+                # Text statistics do not apply once the column is parsed as numbers
+                sketch = column["text"] if dtype == "bool" else column["numbers"]
+                summary = sketch.summary(TOP_K_VALUES)
+                top_values, low, high = summary["heavy_hitters"], column["min"], column["max"]
+                if dtype == "bool":
+                    top_values = [[value.lower() == "true", count] for value, count in top_values]
+                    low, high = column["trues"] == stats["count"], column["trues"] > 0
+                elif dtype == "int64":
+                    top_values = [[int(value), count] for value, count in top_values]
+                    low, high = int(low), int(high)
+                stats = {
+                    "count": stats["count"],
+                    "null_count": stats["null_count"],
+                    "memory_bytes": self._rows * (1 if dtype == "bool" else 8),
+                    "top_values": top_values,
+                    "min": low,
+                    "max": high,
+                }
+            stats["dtype"] = dtype
+            stats["distinct_count"] = summary["approx_distinct_count"]
+            stats["approximate"] = True
+            column_types[col] = dtype
+            column_stats[col] = stats
+            sketches[col] = sketch.to_dict()
+
+        hashes = np.concatenate(self._row_hashes) if self._row_hashes else np.empty(0, np.uint64)
+        return {
+            "row_count": self._rows,
+            "column_count": len(self._columns),
+            "column_types": column_types,
+            "null_counts": {col: column["stats"]["null_count"] for col, column in self._columns.items()},
+            "column_stats": column_stats,
+            "duplicate_row_count": int(len(hashes) - len(np.unique(hashes))),
+            "sketches": sketches,
+            "read_schema": build_read_schema(column_types, column_stats),
+        }
 
 
 class ProfilingService:
@@ -12,35 +512,97 @@ class ProfilingService:
         self.job_repo = JobRepository(db)
         self.profile_repo = ProfilingRepository(db)
 
-    def run(self, job_id: str):
+    def run(self, job_id: str, chain: bool = True):
+        """
+        Profile the upload and record the column statistics.
+
+        Args:
+            job_id: The job to profile
+            chain: Run the suggesting phase in-process afterwards. Queue
+                workers pass False and run it as its own task.
+        """
         try:
             job = self.job_repo.get(job_id)
             if not job:
                 raise ValueError("Job not found")
 
-            file_path = Path(DATA_DIR) / f"{job_id}.csv"
-            df = pd.read_csv(file_path)
+            existing = self.profile_repo.get_by_job_id(job_id)
+            if existing is not None and existing.from_upload:
+                # Profiled while it was uploaded; the next phase ingests it
+                self._finish(job_id, chain)
+                return
 
-            self.profile_repo.delete_by_job_id(job_id)
+            # Profiling again (e.g. on retry) reads with the schema it found
+            schema = existing.read_schema if existing else None
+
+            # Large datasets are streamed and summarized with fixed-size
+            # sketches instead of exact unique()/value_counts() over whole columns
+            sketch_rows = settings.PROFILING_SKETCH_ROWS
+            if sketch_rows and count_rows(raw_path(job_id)) >= sketch_rows:
+                profile = self._sketch(job_id, job.csv_dialect, schema)
+            else:
+                # Parse the upload once; later phases reuse the columnar artifact
+                df = ingest(job_id, job.csv_dialect, schema)
+                column_stats = profile_columns(df)
+                profile = {
+                    "row_count": len(df),
+                    "column_count": len(df.columns),
+                    "column_types": df.dtypes.astype(str).to_dict(),
+                    "null_counts": df.isnull().sum().to_dict(),
+                    "column_stats": column_stats,
+                    "duplicate_row_count": int(df.duplicated().sum()),
+                    "sketches": None,
+                }
 
+            self.profile_repo.delete_by_job_id(job_id)
             self.profile_repo.create(
                 job_id=job_id,
-                row_count=len(df),
-                column_count=len(df.columns),
-                column_types=df.dtypes.astype(str).to_dict(),
-                null_counts=df.isnull().sum().to_dict(),
+                read_schema=build_read_schema(profile["column_types"], profile["column_stats"]),
+                **profile,
             )
 
-            self.job_repo.update_status(job_id, "suggesting")
-            
-            # Auto-trigger suggesting phase
-            # Note: This creates an in-process orchestration flow.
-            # In production, consider using a message queue (Celery, RabbitMQ)
-            # or workflow engine (n8n, Temporal) to avoid circular imports
-            from services.suggestion_service import SuggestionService
-            suggestion_service = SuggestionService(self.db, None)
-            suggestion_service.run(job_id)
+            self._finish(job_id, chain)
 
         except Exception as e:
             self.job_repo.update_status(job_id, "failed")
             raise
+
+    def _sketch(self, job_id: str, dialect: dict | None, schema: dict | None) -> dict:
+        """
+        Profile a large upload from iter_chunks, never holding more than
+        settings.PROFILING_CHUNK_SIZE rows. Without a read schema, a first pass
+        finds the dtypes that fit every chunk (as one full parse would infer
+        them), so all chunks are read alike.
+        """
+        def chunks():
+            return iter_chunks(job_id, settings.PROFILING_CHUNK_SIZE, dialect, schema)
+
+        if schema is None and not artifact_path(job_id).exists():
+            dtypes = {}
+            for chunk in chunks():
+                dtypes = merge_dtypes(dtypes, chunk)
+            schema = {"dtype": dtypes}
+
+        column_stats, sketches, duplicates = sketch_columns(chunks())
+        column_types = {col: stats["dtype"] for col, stats in column_stats.items()}
+        first = next(iter(column_stats.values()), {"count": 0, "null_count": 0})
+        return {
+            "row_count": first["count"] + first["null_count"],
+            "column_count": len(column_stats),
+            "column_types": column_types,
+            "null_counts": {col: stats["null_count"] for col, stats in column_stats.items()},
+            "column_stats": column_stats,
+            "duplicate_row_count": duplicates,
+            "sketches": sketches,
+        }
+
+    def _finish(self, job_id: str, chain: bool):
+        self.job_repo.update_status(job_id, "suggesting")
+        if not chain:
+            return
+
+        # Auto-trigger suggesting phase in-process (the worker queues it
+        # as a separate task instead; see services/worker.py)
+        from services.suggestion_service import SuggestionService
+        suggestion_service = SuggestionService(self.db, None)
+        suggestion_service.run(job_id)
@@ -1,6 +1,8 @@
 import os
+import json
 from pathlib import Path
 from storage.db.repository import JobRepository, SuggestionRepository
+from storage.object_store import plan_path
 from core.constants import DATA_DIR
 
 class ReportService:
@@ -16,15 +18,35 @@ class ReportService:
             return "No report available."
         report = f"# Cleaning Report for Job {job_id}\n\n"
         report += f"**Original file:** {job.original_filename}\n\n"
+        # Prefer the optimized plan recorded by the apply phase
+        executed = self._load_executed_plan(job_id)
+        steps = executed["steps"] if executed else suggestions.suggestions
         report += "## Cleaning Steps Applied\n"
-        for i, step in enumerate(suggestions.suggestions, 1):
+        for i, step in enumerate(steps, 1):
             op = step.get("operation", "unknown")
             params = step.get("params", {})
             report += f"{i}. **{op}**: {params}\n"
+        if executed and executed.get("optimizations"):
+            report += "\n## Plan Optimizations\n"
+            report += (
+                f"{len(suggestions.suggestions)} suggested steps ran as {len(steps)}.\n"
+            )
+            for note in executed["optimizations"]:
+                report += f"- {note}\n"
         report += "\n---\n"
         report += "This report was generated automatically."
         return report
 
+    def _load_executed_plan(self, job_id: str):
+        path = plan_path(job_id)
+        if not path.exists():
+            return None
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (IOError, OSError, json.JSONDecodeError):
+            return None
+
     def save_report(self, job_id: str, report: str):
         report_dir = Path(DATA_DIR) / "reports"
         report_dir.mkdir(exist_ok=True)
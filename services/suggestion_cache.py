@@ -0,0 +1,128 @@
+"""
+Cache of generated suggestions keyed by a schema and profile fingerprint.
+
+Recurring feeds usually arrive with the same columns and similar statistics,
+so their suggestions can be reused instead of calling the LLM (or re-running
+the rules) again. Entries live in the suggestion_cache table, expire after
+settings.SUGGESTION_CACHE_TTL_SECONDS and are evicted least recently used
+beyond settings.SUGGESTION_CACHE_MAX_ENTRIES.
+"""
+import hashlib
+import json
+
+from sqlalchemy.orm import Session
+
+from storage.db.repository import SuggestionCacheRepository
+from services.suggestion_service import (
+    NUMERIC_DETECTION_THRESHOLD,
+    DATETIME_DETECTION_THRESHOLD,
+)
+from transformations.operations import _to_snake_case
+from transformations.registry import TRANSFORMATION_REGISTRY
+from core.config import settings
+
+
+def _bucket(ratio: float) -> int:
+    """Tenths bucket (0-10) of a ratio"""
+    return min(int(ratio * 10), 10)
+
+
+def profile_fingerprint(profiling, generator: str) -> str | None:
+    """
+    Hash column names, dtypes and bucketed profile statistics.
+
+    Ratios are bucketed into tenths. The features the rule-based engine
+    thresholds on are included as flags, so two profiles with the same
+    fingerprint get the same rule-based suggestions. The rule-based generator
+    needs the per-column statistics; without them it returns None (not
+    cacheable).
+    """
+    column_stats = profiling.column_stats or {}
+    if generator == "rules" and (
+        profiling.duplicate_row_count is None
+        or any(col not in column_stats for col in profiling.column_types)
+    ):
+        return None
+
+    row_count = max(profiling.row_count, 1)
+    features = {
+        "generator": generator,
+        "row_magnitude": len(str(profiling.row_count)),
+        "has_duplicates": bool(profiling.duplicate_row_count),
+        "columns": [],
+    }
+    for col, dtype in profiling.column_types.items():
+        null_count = profiling.null_counts.get(col, 0)
+        feature = [col, dtype, null_count > 0, _bucket(null_count / row_count)]
+        stats = column_stats.get(col, {})
+        if "numeric_parse_rate" in stats:
+            feature += [
+                _bucket(stats["numeric_parse_rate"]),
+                stats["numeric_parse_rate"] > NUMERIC_DETECTION_THRESHOLD,
+                _bucket(stats["datetime_parse_rate"]),
+                stats["datetime_parse_rate"] >= DATETIME_DETECTION_THRESHOLD,
+                stats["datetime_format"],
+                stats["non_value_count"] > 0,
+                stats["letter_count"] > 0,
+                stats["snake_case_mismatch_count"] > 0,
+                stats["distinct_count"] > 1,
+            ]
+        features["columns"].append(feature)
+
+    encoded = json.dumps(features, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def validate_suggestions(suggestions: list[dict], columns) -> bool:
+    """
+    Check that every step is supported and names columns that exist at that
+    point of the plan (after any standardize_column_names or drop_column).
+    """
+    current = list(columns)
+    for step in suggestions:
+        op_name = step.get("operation")
+        params = step.get("params", {})
+        if op_name not in TRANSFORMATION_REGISTRY:
+            return False
+        if op_name == "standardize_column_names":
+            current = [_to_snake_case(col) for col in current]
+            continue
+
+        named = [params["column"]] if isinstance(params.get("column"), str) else []
+        named += list(params.get("columns") or []) + list(params.get("subset") or [])
+        if any(col not in current for col in named):
+            return False
+        if op_name == "drop_column":
+            current.remove(params["column"])
+    return True
+
+
+class SuggestionCache:
+    def __init__(self, db: Session):
+        self.repo = SuggestionCacheRepository(db)
+
+    def get(self, profiling, generator: str) -> list[dict] | None:
+        """Cached suggestions for this profile, if any are live and still valid"""
+        if not settings.SUGGESTION_CACHE_TTL_SECONDS:
+            return None
+        fingerprint = profile_fingerprint(profiling, generator)
+        if fingerprint is None:
+            return None
+
+        entry = self.repo.get(fingerprint, settings.SUGGESTION_CACHE_TTL_SECONDS)
+        if entry is None:
+            return None
+        if not validate_suggestions(entry.suggestions, profiling.column_types):
+            self.repo.delete(fingerprint)
+            return None
+        return entry.suggestions
+
+    def put(self, profiling, generator: str, suggestions: list[dict]):
+        if not settings.SUGGESTION_CACHE_TTL_SECONDS:
+            return
+        fingerprint = profile_fingerprint(profiling, generator)
+        if fingerprint is None or not validate_suggestions(suggestions, profiling.column_types):
+            return
+        self.repo.put(
+            fingerprint, generator, suggestions, settings.SUGGESTION_CACHE_MAX_ENTRIES
+        )
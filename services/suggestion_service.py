@@ -1,6 +1,10 @@
 from sqlalchemy.orm import Session
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import math
+import os
+
+import numpy as np
 import pandas as pd
-from pathlib import Path
 
 from storage.db.repository import (
     JobRepository,
@@ -9,8 +13,14 @@ from storage.db.repository import (
 )
 from agents.data_cleaning_agent import DataCleaningAgent
 from services.job_service import can_transition
-from core.constants import DATA_DIR
-from transformations.operations import _to_snake_case
+from services.ingest_service import load_dataframe
+from transformations.operations import (
+    _to_snake_case,
+    _snake_case_strings,
+    infer_datetime_format,
+    parse_datetime,
+)
+from core.config import settings
 
 from agents.mcp_client import MCPClient
 
@@ -20,28 +30,276 @@ NUMERIC_DETECTION_THRESHOLD = 0.5
 # Threshold for considering a column as datetime (ratio of convertible values)
 DATETIME_DETECTION_THRESHOLD = 0.8
 
+# Number of contiguous row blocks a stratified sample is spread across
+SAMPLE_STRATA = 20
+
+# z-score of the 95% confidence intervals reported for sampled decisions
+CONFIDENCE_Z = 1.96
+
+# Common non-value indicators to check for
+NON_VALUE_INDICATORS = [
+    'UNKNOWN', 'unknown', 'Unknown',
+    'ERROR', 'error', 'Error',
+    'N/A', 'n/a', 'NA', 'na',
+    'NULL', 'null', 'Null',
+    'NONE', 'none', 'None',
+]
+
+
+def _stratified_sample(df: pd.DataFrame, size: int, strata: int = SAMPLE_STRATA) -> pd.DataFrame:
+    """
+    Sample rows evenly from contiguous blocks of the frame.
+
+    Exports are often sorted (by date, by source system), so each block
+    contributes rows in proportion to its length instead of the sample
+    clustering in one region. Seeded, so repeated runs pick the same rows.
+    """
+    if size >= len(df):
+        return df
+
+    rng = np.random.default_rng(0)
+    bounds = np.linspace(0, len(df), strata + 1).astype(int)
+    quotas = np.diff(np.linspace(0, size, strata + 1).astype(int))
+    positions = [
+        np.sort(rng.choice(np.arange(start, end), size=min(quota, end - start), replace=False))
+        for start, end, quota in zip(bounds[:-1], bounds[1:], quotas)
+        if end > start
+    ]
+    return df.iloc[np.concatenate(positions)]
+
 
-def _is_datetime_column(series: pd.Series, threshold: float = DATETIME_DETECTION_THRESHOLD) -> bool:
+def _wilson_interval(successes: int, total: int, z: float = CONFIDENCE_Z) -> tuple[float, float]:
+    """Wilson score confidence interval for a proportion"""
+    if total == 0:
+        return 0.0, 1.0
+    p = successes / total
+    denominator = 1 + z * z / total
+    center = (p + z * z / (2 * total)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / total + z * z / (4 * total * total)) / denominator
+    return max(0.0, center - margin), min(1.0, center + margin)
+
+
+def _evidence(successes: int, total: int, full_scan: bool = False) -> dict:
+    """Describe a sampled decision: the observed rate and its 95% interval"""
+    low, high = _wilson_interval(successes, total)
+    if full_scan:
+        low = high = successes / total if total else 0.0
+    return {
+        "rate": round(successes / total, 4) if total else 0.0,
+        "ci95": [round(low, 4), round(high, 4)],
+        "sample_size": total,
+        "full_scan": full_scan,
+    }
+
+
+def _numeric_parse_counts(series: pd.Series) -> tuple[int, int]:
+    """(values that convert to numbers, non-null values)"""
+    numeric_test = pd.to_numeric(series, errors='coerce')
+    return int(numeric_test.notna().sum()), int(series.notna().sum())
+
+
+def _datetime_parse_counts(series: pd.Series, datetime_format: str = None) -> tuple[int, int, str | None]:
+    """(values that parse as datetimes, non-null values, format used)"""
+    non_null_count = int(series.notna().sum())
+    if non_null_count == 0:
+        return 0, 0, None
+    if datetime_format is None:
+        datetime_format = infer_datetime_format(series)
+    parsed = parse_datetime(series, datetime_format)
+    return int(parsed.notna().sum()), non_null_count, datetime_format
+
+
+def _detect_datetime_column(
+    series: pd.Series, threshold: float = DATETIME_DETECTION_THRESHOLD
+) -> tuple[bool, str | None]:
     """
     Check if a pandas Series contains datetime values.
     
+    The format is inferred from a sample of distinct values and the column is
+    parsed once with it, so the format can be recorded in the suggestion and
+    reused by auto_cast_datetime instead of being guessed again.
+    
     Args:
         series: Pandas Series to check
         threshold: Minimum ratio of values that must convert successfully (default: 0.8)
     
     Returns:
-        True if the series can be converted to datetime with success rate >= threshold
+        (is_datetime, format): is_datetime is True if the series can be converted
+        to datetime with success rate >= threshold; format is the inferred
+        strftime format or None
     """
     try:
-        non_null_values = series.dropna()
-        if len(non_null_values) == 0:
-            return False
-        
-        datetime_test = pd.to_datetime(non_null_values, errors='coerce')
-        success_rate = datetime_test.notna().sum() / len(non_null_values)
-        return success_rate >= threshold
+        parsed_count, non_null_count, datetime_format = _datetime_parse_counts(series)
+        if non_null_count == 0:
+            return False, None
+        return bool(parsed_count / non_null_count >= threshold), datetime_format
+    except (ValueError, TypeError):
+        return False, None
+
+
+def _is_likely_id(col: str) -> bool:
+    """Check whether a column name looks like an identifier or code"""
+    col_lower = col.lower()
+    # More precise ID detection: check for ID as a word (at start, end, or surrounded by non-letters)
+    return (
+        col_lower.endswith('_id') or 
+        col_lower.endswith('_key') or
+        col_lower.endswith('_code') or
+        col_lower.startswith('id_') or
+        col_lower.startswith('key_') or
+        col_lower.startswith('code_') or
+        col_lower in ['id', 'key', 'code']
+    )
+
+
+def _is_likely_date(col: str) -> bool:
+    """Check if it's a date/time column by name patterns"""
+    col_lower = col.lower()
+    return (
+        'date' in col_lower or
+        'time' in col_lower or
+        col_lower.endswith('_at') or
+        col_lower.endswith('_on') or
+        col_lower in ['created', 'updated', 'modified', 'deleted']
+    )
+
+
+def _analyze_column(col: str, series: pd.Series, sample: pd.Series = None) -> dict:
+    """
+    Decide which rule-based operations a string column needs.
+
+    Decisions are taken on sample, or on the full series when sample is None.
+    Numeric and datetime decisions whose 95% confidence interval contains
+    their detection threshold are re-checked on the full series.
+
+    Returns:
+        Dict with the decided operations ("replace_non_values",
+        "standardize_case", "auto_cast_type", "auto_cast_datetime"), the
+        inferred datetime format, and per-operation evidence when sampled
+    """
+    if sample is None:
+        sample = series
+    sampled = len(sample) < len(series)
+    decisions = {"operations": set(), "datetime_format": None, "evidence": {}}
+
+    non_null = sample.dropna()
+
+    # Check if any non-value indicators exist using vectorized operation
+    non_value_hits = int(non_null.isin(NON_VALUE_INDICATORS).sum())
+    if non_value_hits:
+        decisions["operations"].add("replace_non_values")
+        decisions["evidence"]["replace_non_values"] = _evidence(non_value_hits, len(non_null))
+
+    # Check if column is datetime stored as string
+    # Do this BEFORE standardization check so we can skip standardizing dates
+    if _is_likely_date(col):
+        try:
+            parsed, total, datetime_format = _datetime_parse_counts(sample)
+            low, high = _wilson_interval(parsed, total)
+            full_scan = sampled and low <= DATETIME_DETECTION_THRESHOLD <= high
+            if full_scan:
+                parsed, total, datetime_format = _datetime_parse_counts(series, datetime_format)
+            if total > 0 and parsed / total >= DATETIME_DETECTION_THRESHOLD:
+                decisions["operations"].add("auto_cast_datetime")
+                decisions["datetime_format"] = datetime_format
+                decisions["evidence"]["auto_cast_datetime"] = _evidence(parsed, total, full_scan)
+                if not sampled:
+                    decisions["evidence"] = {}
+                return decisions  # Skip standardization and numeric checks for datetime columns
+        except (ValueError, TypeError):
+            pass
+
+    # Check if column needs standardization (mixed casing or inconsistent formatting)
+    # Skip columns that look like IDs or codes (contain mostly numbers/underscores)
+    # We'll standardize if there are multiple unique values with letters
+    value_counts = non_null.astype(str).value_counts()
+    if len(value_counts) > 1 and not _is_likely_id(col):
+        # Vectorized checks over the distinct values only
+        unique_series = pd.Series(value_counts.index, dtype=object)
+        # Check if values contain letters (not just numbers/symbols)
+        has_letters = unique_series.str.contains(r'[^\W\d_]', regex=True).any()
+        if has_letters:
+            # Check if any value differs from its snake_case version
+            # This is the primary check for needing standardization
+            differs = (unique_series != _snake_case_strings(unique_series)).to_numpy()
+            if differs.any():
+                decisions["operations"].add("standardize_case")
+                decisions["evidence"]["standardize_case"] = _evidence(
+                    int(value_counts.to_numpy()[differs].sum()), len(non_null)
+                )
+
+    # Check if column is numeric stored as string
+    try:
+        converted, total = _numeric_parse_counts(sample)
+        low, high = _wilson_interval(converted, total)
+        full_scan = sampled and low <= NUMERIC_DETECTION_THRESHOLD <= high
+        if full_scan:
+            converted, total = _numeric_parse_counts(series)
+        # If most non-null values convert successfully, it's likely numeric
+        if total > 0 and converted / total > NUMERIC_DETECTION_THRESHOLD:
+            decisions["operations"].add("auto_cast_type")
+            decisions["evidence"]["auto_cast_type"] = _evidence(converted, total, full_scan)
     except (ValueError, TypeError):
-        return False
+        pass
+
+    if not sampled:
+        decisions["evidence"] = {}
+    return decisions
+
+
+def _analyze_profile(col: str, stats: dict) -> dict:
+    """
+    Take the decisions of _analyze_column from a stored column profile.
+
+    The profile is computed over every row at profiling time, so the
+    decisions match a full scan and no evidence is attached. A datetime column
+    is only detected when profiling inferred a format for it.
+    """
+    decisions = {"operations": set(), "datetime_format": None, "evidence": {}}
+
+    if stats.get("non_value_count"):
+        decisions["operations"].add("replace_non_values")
+
+    if _is_likely_date(col) and stats.get("datetime_parse_rate", 0.0) >= DATETIME_DETECTION_THRESHOLD:
+        decisions["operations"].add("auto_cast_datetime")
+        decisions["datetime_format"] = stats.get("datetime_format")
+        return decisions
+
+    if (
+        stats.get("distinct_count", 0) > 1
+        and not _is_likely_id(col)
+        and stats.get("letter_count")
+        and stats.get("snake_case_mismatch_count")
+    ):
+        decisions["operations"].add("standardize_case")
+
+    if stats.get("numeric_parse_rate", 0.0) > NUMERIC_DETECTION_THRESHOLD:
+        decisions["operations"].add("auto_cast_type")
+
+    return decisions
+
+
+def _analyze_columns(df: pd.DataFrame, sample: pd.DataFrame | None, columns: list) -> list[dict]:
+    """
+    Run _analyze_column for each column, fanned out over a worker pool.
+
+    Columns are independent, so they are analyzed concurrently on
+    settings.SUGGESTION_WORKERS threads or processes. Results are returned in
+    the order of columns, so the suggestions match a serial run.
+    """
+    workers = settings.SUGGESTION_WORKERS or os.cpu_count() or 1
+    samples = [None if sample is None else sample[col] for col in columns]
+    series = [df[col] for col in columns]
+
+    if workers <= 1 or len(columns) < 2:
+        return list(map(_analyze_column, columns, series, samples))
+
+    if settings.SUGGESTION_EXECUTOR == "process":
+        executor = ProcessPoolExecutor(max_workers=workers)
+    else:
+        executor = ThreadPoolExecutor(max_workers=workers)
+    with executor:
+        return list(executor.map(_analyze_column, columns, series, samples))
 
 
 class SuggestionService:
@@ -52,7 +310,15 @@ class SuggestionService:
         self.suggestion_repo = SuggestionRepository(db)
         self.agent = None if llm_client is None else DataCleaningAgent(llm_client)
 
-    def run(self, job_id: str):
+    def run(self, job_id: str, chain: bool = True):
+        """
+        Generate (or reuse cached) suggestions for a profiled job.
+
+        Args:
+            job_id: The job to suggest cleaning steps for
+            chain: Run the applying phase in-process afterwards. Queue
+                workers pass False and run it as its own task.
+        """
         try:
             job = self.job_repo.get(job_id)
             if not job:
@@ -67,26 +333,37 @@ class SuggestionService:
             if not profiling:
                 raise ValueError("Profiling missing")
 
-            # Generate simple rule-based suggestions if no LLM
-            if self.agent is None:
-                suggestions = self._generate_simple_suggestions(job_id, profiling)
-            else:
-                suggestions = self.agent.suggest(
-                    {
-                        "row_count": profiling.row_count,
-                        "column_count": profiling.column_count,
-                        "column_types": profiling.column_types,
-                        "null_counts": profiling.null_counts,
-                    }
-                )
+            # Reuse suggestions generated for a matching schema and profile
+            from services.suggestion_cache import SuggestionCache
+
+            cache = SuggestionCache(self.db)
+            generator = "rules" if self.agent is None else "llm"
+            suggestions = cache.get(profiling, generator)
+
+            if suggestions is None:
+                # Generate simple rule-based suggestions if no LLM
+                if self.agent is None:
+                    suggestions = self._generate_simple_suggestions(
+                        job_id, profiling, job.csv_dialect
+                    )
+                else:
+                    suggestions = self.agent.suggest(
+                        {
+                            "row_count": profiling.row_count,
+                            "column_count": profiling.column_count,
+                            "column_types": profiling.column_types,
+                            "null_counts": profiling.null_counts,
+                        }
+                    )
+                cache.put(profiling, generator, suggestions)
 
             self.suggestion_repo.create(job_id, suggestions)
             self.job_repo.update_status(job_id, "applying")
-            
-            # Auto-trigger applying phase
-            # Note: This creates an in-process orchestration flow.
-            # In production, consider using a message queue (Celery, RabbitMQ)
-            # or workflow engine (n8n, Temporal) to avoid circular imports
+            if not chain:
+                return
+
+            # Auto-trigger applying phase in-process (the worker queues it
+            # as a separate task instead; see services/worker.py)
             from services.apply_service import ApplyService
             apply_service = ApplyService(self.db)
             apply_service.run(job_id)
@@ -95,17 +372,28 @@ class SuggestionService:
             self.job_repo.update_status(job_id, "failed")
             raise
 
-    def _generate_simple_suggestions(self, job_id: str, profiling) -> list[dict]:
+    def _generate_simple_suggestions(
+        self, job_id: str, profiling, dialect: dict | None = None
+    ) -> list[dict]:
         """Generate basic cleaning suggestions based on profiling data and actual data analysis"""
         suggestions = []
         
-        # Load the actual data for more detailed analysis
-        file_path = Path(DATA_DIR) / f"{job_id}.csv"
-        df = pd.read_csv(file_path)
+        # Decide from the stored column profile when profiling recorded one;
+        # otherwise load the actual data for more detailed analysis
+        column_stats = profiling.column_stats or {}
+        from_profile = profiling.duplicate_row_count is not None and all(
+            col in column_stats for col in profiling.column_types
+        )
+        if from_profile:
+            df = None
+            columns = list(profiling.column_types)
+        else:
+            df = load_dataframe(job_id, dialect, profiling.read_schema)
+            columns = list(df.columns)
         
         # Check if column names need standardization
         needs_column_standardization = any(
-            col != _to_snake_case(col) for col in df.columns
+            col != _to_snake_case(col) for col in columns
         )
         
         # Helper function to get the correct column name for suggestions
@@ -120,123 +408,81 @@ class SuggestionService:
                 "params": {}
             })
         
-        # Common non-value indicators to check for
-        non_value_indicators = [
-            'UNKNOWN', 'unknown', 'Unknown',
-            'ERROR', 'error', 'Error',
-            'N/A', 'n/a', 'NA', 'na',
-            'NULL', 'null', 'Null',
-            'NONE', 'none', 'None',
+        # Track which columns need which transformations, in column order
+        columns_needing_non_value_replacement = []
+        columns_needing_standardization = []
+        columns_needing_auto_cast = []
+        columns_needing_datetime_cast = {}  # column -> inferred datetime format
+        evidence = {}  # (operation, column) -> confidence of a sampled decision
+        
+        # Only string columns need rule-based analysis
+        string_columns = [
+            col for col in columns
+            if profiling.column_types.get(col, "object") == "object"
         ]
         
-        # Track which columns need which transformations
-        columns_needing_non_value_replacement = set()
-        columns_needing_standardization = set()
-        columns_needing_auto_cast = set()
-        columns_needing_datetime_cast = set()
+        if from_profile:
+            column_decisions = [_analyze_profile(col, column_stats[col]) for col in string_columns]
+        else:
+            # Decide string-column rules from a stratified sample on large frames;
+            # borderline numeric/datetime decisions fall back to a full scan
+            sample = None
+            if settings.SUGGESTION_SAMPLE_ROWS and len(df) > settings.SUGGESTION_SAMPLE_ROWS:
+                sample = _stratified_sample(df, settings.SUGGESTION_SAMPLE_ROWS)
+            # Analyze each column (concurrently; results come back in column order)
+            column_decisions = _analyze_columns(df, sample, string_columns)
         
-        # Analyze each column
-        for col in df.columns:
-            col_type = profiling.column_types.get(col, "object")
-            
-            # Check for non-value indicators in string columns
-            if col_type == "object":
-                # Get unique non-null values
-                unique_values = df[col].dropna().astype(str).unique()
-                
-                # Check if any non-value indicators exist using vectorized operation
-                has_non_values = df[col].isin(non_value_indicators).any()
-                
-                if has_non_values:
-                    columns_needing_non_value_replacement.add(col)
-                
-                # Check if column needs standardization (mixed casing or inconsistent formatting)
-                # Skip columns that look like IDs or codes (contain mostly numbers/underscores)
-                # We'll standardize if there are multiple unique values with letters
-                col_lower = col.lower()
-                # More precise ID detection: check for ID as a word (at start, end, or surrounded by non-letters)
-                is_likely_id = (
-                    col_lower.endswith('_id') or 
-                    col_lower.endswith('_key') or
-                    col_lower.endswith('_code') or
-                    col_lower.startswith('id_') or
-                    col_lower.startswith('key_') or
-                    col_lower.startswith('code_') or
-                    col_lower in ['id', 'key', 'code']
-                )
-                
-                # Check if it's a date/time column by name patterns
-                is_likely_date = (
-                    'date' in col_lower or
-                    'time' in col_lower or
-                    col_lower.endswith('_at') or
-                    col_lower.endswith('_on') or
-                    col_lower in ['created', 'updated', 'modified', 'deleted']
-                )
-                
-                # Check if column is datetime stored as string
-                # Do this BEFORE standardization check so we can skip standardizing dates
-                if is_likely_date and _is_datetime_column(df[col]):
-                    columns_needing_datetime_cast.add(col)
-                    continue  # Skip standardization and numeric checks for datetime columns
-                
-                if len(unique_values) > 1 and not is_likely_id:
-                    # Check if values contain letters (not just numbers/symbols)
-                    has_letters = any(any(c.isalpha() for c in str(v)) for v in unique_values)
-                    if has_letters:
-                        # Check if any value differs from its snake_case version
-                        # This is the primary check for needing standardization
-                        needs_standardization = any(
-                            str(v) != _to_snake_case(str(v)) for v in unique_values
-                        )
-                        
-                        if needs_standardization:
-                            columns_needing_standardization.add(col)
-                
-                # Check if column is numeric stored as string
-                try:
-                    # Try to convert to numeric
-                    numeric_test = pd.to_numeric(df[col], errors='coerce')
-                    # If most non-null values convert successfully, it's likely numeric
-                    non_null_count = df[col].notna().sum()
-                    if non_null_count > 0:
-                        converted_count = numeric_test.notna().sum()
-                        if converted_count / non_null_count > NUMERIC_DETECTION_THRESHOLD:
-                            columns_needing_auto_cast.add(col)
-                except (ValueError, TypeError):
-                    pass
+        for col, decisions in zip(string_columns, column_decisions):
+            operations = decisions["operations"]
+            if "replace_non_values" in operations:
+                columns_needing_non_value_replacement.append(col)
+            if "auto_cast_datetime" in operations:
+                columns_needing_datetime_cast[col] = decisions["datetime_format"]
+            if "standardize_case" in operations:
+                columns_needing_standardization.append(col)
+            if "auto_cast_type" in operations:
+                columns_needing_auto_cast.append(col)
+            for op_name, op_evidence in decisions["evidence"].items():
+                evidence[(op_name, col)] = op_evidence
+        
+        def suggestion(op_name: str, col: str, params: dict) -> dict:
+            """Build a suggestion, attaching the confidence of sampled decisions"""
+            step = {"operation": op_name, "params": params}
+            if (op_name, col) in evidence:
+                step["confidence"] = evidence[(op_name, col)]
+            return step
         
         # Generate suggestions in the right order:
         # 1. Replace non-values first (converts ERROR/UNKNOWN to NaN)
         for col in columns_needing_non_value_replacement:
-            suggestions.append({
-                "operation": "replace_non_values",
-                "params": {"column": get_suggestion_column_name(col)}
-            })
+            suggestions.append(suggestion(
+                "replace_non_values", col, {"column": get_suggestion_column_name(col)}
+            ))
         
         # 2. Then standardize case for remaining string values
         for col in columns_needing_standardization:
-            suggestions.append({
-                "operation": "standardize_case",
-                "params": {"column": get_suggestion_column_name(col)}
-            })
+            suggestions.append(suggestion(
+                "standardize_case", col, {"column": get_suggestion_column_name(col)}
+            ))
         
         # 3. Then auto-cast numeric strings
         for col in columns_needing_auto_cast:
-            suggestions.append({
-                "operation": "auto_cast_type",
-                "params": {"column": get_suggestion_column_name(col)}
-            })
+            suggestions.append(suggestion(
+                "auto_cast_type", col, {"column": get_suggestion_column_name(col)}
+            ))
         
-        # 4. Auto-cast datetime strings
-        for col in columns_needing_datetime_cast:
-            suggestions.append({
-                "operation": "auto_cast_datetime",
-                "params": {"column": get_suggestion_column_name(col)}
-            })
+        # 4. Auto-cast datetime strings, reusing the format inferred above
+        for col, datetime_format in columns_needing_datetime_cast.items():
+            params = {"column": get_suggestion_column_name(col)}
+            if datetime_format is not None:
+                params["format"] = datetime_format
+            suggestions.append(suggestion("auto_cast_datetime", col, params))
         
         # 5. Check for duplicate rows and suggest removal
-        duplicate_count = df.duplicated().sum()
+        if from_profile:
+            duplicate_count = profiling.duplicate_row_count
+        else:
+            duplicate_count = df.duplicated().sum()
         if duplicate_count > 0:
             suggestions.append({
                 "operation": "remove_duplicates",
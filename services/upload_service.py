@@ -0,0 +1,258 @@
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+import hashlib
+import uuid
+
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from services.dialect_service import DEFAULT_DIALECT, DIALECT_SAMPLE_BYTES, sniff_dialect
+from services.excel_service import (
+    XLS_MAGIC, XLSX_MAGIC, EmptySheetError, convert_sheet, sheet_names, sniff_format,
+)
+from services.profiling_service import StreamingProfiler
+from storage.db.models import JobModel
+from storage.db.repository import JobRepository, ProfilingRepository, SuggestionRepository
+from storage.object_store import raw_path, cleaned_path, job_files, link_file
+from core.constants import DATA_DIR
+
+# Bytes read from the request body at a time while hashing an upload
+UPLOAD_READ_SIZE = 1024 * 1024
+
+# Sheet value that makes every sheet of a workbook its own job
+ALL_SHEETS = "*"
+
+# Leading bytes of an upload inspected to tell its format
+SNIFF_BYTES = 512
+
+
+class UploadTooLargeError(ValueError):
+    """An upload is larger than settings.MAX_UPLOAD_BYTES"""
+
+
+class UploadWriter:
+    """
+    Receives an upload chunk by chunk into a temporary file under DATA_DIR,
+    hashing it on the way, so memory use is one chunk whatever the upload's
+    size. Call finish once every chunk is written.
+
+    With profile=True, a CSV upload is also profiled as it arrives (see
+    StreamingProfiler) and finish leaves the result in profile.
+
+    Use as a context manager: the temporary file is removed on exit unless a
+    job took it over.
+    """
+
+    def __init__(self, max_bytes: int | None = None, profile: bool = False):
+        self.max_bytes = settings.MAX_UPLOAD_BYTES if max_bytes is None else max_bytes
+        self.profiler = StreamingProfiler() if profile else None
+        self.profile = None
+        data_dir = Path(DATA_DIR)
+        data_dir.mkdir(exist_ok=True)
+        self.path = data_dir / f".upload-{uuid.uuid4()}.tmp"
+        self.size = 0
+        self.format = None
+        self.content_hash = None
+        self._digest = hashlib.sha256()
+        self._file = open(self.path, "wb")
+
+    def write(self, chunk: bytes):
+        """
+        Raises:
+            UploadTooLargeError: If the upload grows past max_bytes (0 is unlimited)
+        """
+        self.size += len(chunk)
+        if self.max_bytes and self.size > self.max_bytes:
+            raise UploadTooLargeError(f"Upload exceeds the limit of {self.max_bytes} bytes")
+        self._digest.update(chunk)
+        self._file.write(chunk)
+        if self.profiler is not None:
+            if self.size == len(chunk) and chunk.startswith((XLSX_MAGIC, XLS_MAGIC)):
+                # Workbooks are profiled after conversion, by the profiling phase
+                self.profiler = None
+            else:
+                self.profiler.feed(chunk)
+
+    def finish(self):
+        """
+        Close the file and sniff the upload's format.
+
+        Raises:
+            ValueError: For formats that cannot be ingested (legacy .xls)
+        """
+        self._file.close()
+        self.content_hash = self._digest.hexdigest()
+        with open(self.path, "rb") as f:
+            self.format = sniff_format(f.read(SNIFF_BYTES))
+        if self.profiler is not None and self.format == "csv":
+            self.profile = self.profiler.finish()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self._file.close()
+        self.path.unlink(missing_ok=True)
+
+
+class UploadService:
+    def __init__(self, db: Session):
+        self.db = db
+        self.job_repo = JobRepository(db)
+        self.profile_repo = ProfilingRepository(db)
+        self.suggestion_repo = SuggestionRepository(db)
+
+    def store(self, file_obj, filename: str, sheet: str | None = None) -> JobModel:
+        """
+        Stream an upload to disk, hashing it on the way, and create its job.
+
+        Excel workbooks (recognized by content, not by filename) are converted
+        to CSV: the given sheet, or the first one.
+
+        If a completed job already processed byte-identical content, the new
+        job is created as done and shares that job's stored files (raw upload,
+        artifact, cleaned output and metadata) and copies its profile and
+        suggestions instead of running the pipeline again. The job's
+        upload_cache records "hit" or "miss".
+
+        Raises:
+            UploadTooLargeError: If the upload is larger than settings.MAX_UPLOAD_BYTES
+            ValueError: If the upload is an unreadable workbook, or has no such
+                sheet or only an empty one
+        """
+        with self._receive(file_obj) as upload:
+            return self.store_upload(upload, filename, sheet)
+
+    def store_sheets(self, file_obj, filename: str) -> list[JobModel]:
+        """
+        Like store, but a workbook gives one job per sheet, so its sheets are
+        cleaned as independent datasets (concurrently, by the worker pool).
+        Empty sheets are skipped. A CSV upload gives a single job.
+
+        Raises:
+            ValueError: If no sheet of the workbook has data
+        """
+        with self._receive(file_obj) as upload:
+            return self.store_upload_sheets(upload, filename)
+
+    def store_upload(self, upload: UploadWriter, filename: str, sheet: str | None = None) -> JobModel:
+        """
+        Create the job for an upload already received by an UploadWriter (see
+        store). A profile the writer computed is stored with a new job, so
+        its profiling phase does not read the file again.
+        """
+        if upload.format == "csv":
+            return self._create_job(upload.path, upload.content_hash, filename, profile=upload.profile)
+        if sheet is None:
+            sheet = sheet_names(upload.path)[0]
+        return self._create_sheet_job(upload.path, filename, sheet)
+
+    def store_upload_sheets(self, upload: UploadWriter, filename: str) -> list[JobModel]:
+        """Create the jobs for an upload already received (see store_sheets)"""
+        if upload.format == "csv":
+            return [self._create_job(upload.path, upload.content_hash, filename, profile=upload.profile)]
+        jobs = []
+        for sheet in sheet_names(upload.path):
+            try:
+                jobs.append(self._create_sheet_job(upload.path, filename, sheet))
+            except EmptySheetError:
+                continue
+        if not jobs:
+            raise ValueError("Workbook has no sheets with data")
+        return jobs
+
+    @contextmanager
+    def _receive(self, file_obj):
+        with UploadWriter(profile=settings.PROFILE_DURING_UPLOAD) as upload:
+            while chunk := file_obj.read(UPLOAD_READ_SIZE):
+                upload.write(chunk)
+            upload.finish()
+            yield upload
+
+    def _create_sheet_job(self, workbook_path: Path, filename: str, sheet: str) -> JobModel:
+        # Jobs are keyed by the converted CSV, so each sheet is deduplicated
+        # on its own (and against CSV uploads of the same data)
+        csv_path = workbook_path.with_name(f".upload-{uuid.uuid4()}.tmp")
+        try:
+            convert_sheet(workbook_path, sheet, csv_path)
+            digest = hashlib.sha256()
+            with open(csv_path, "rb") as f:
+                while chunk := f.read(UPLOAD_READ_SIZE):
+                    digest.update(chunk)
+            # convert_sheet writes UTF-8 with the sheet's first row as header
+            return self._create_job(
+                csv_path, digest.hexdigest(), filename, sheet, dialect=dict(DEFAULT_DIALECT)
+            )
+        finally:
+            csv_path.unlink(missing_ok=True)
+
+    def _create_job(
+        self,
+        path: Path,
+        content_hash: str,
+        filename: str,
+        sheet: str | None = None,
+        profile: dict | None = None,
+        dialect: dict | None = None,
+    ) -> JobModel:
+        """
+        Create the job for a received CSV, moving it into place or reusing
+        results. Its dialect is sniffed from the file unless given.
+        """
+        source = self.job_repo.get_latest_done_by_content_hash(content_hash)
+        if source is not None and not self._results_available(source.id):
+            source = None
+
+        if dialect is None:
+            with open(path, "rb") as f:
+                dialect = sniff_dialect(f.read(DIALECT_SAMPLE_BYTES))
+
+        job = JobModel(
+            id=str(uuid.uuid4()),
+            original_filename=filename,
+            content_hash=content_hash,
+            upload_cache="miss" if source is None else "hit",
+            sheet_name=sheet,
+            csv_dialect=dialect,
+        )
+        if source is None:
+            path.replace(raw_path(job.id))
+            job = self.job_repo.create(job)
+            if profile is not None:
+                self.profile_repo.create(job_id=job.id, **profile, from_upload=True)
+            return job
+
+        for source_file, target_file in zip(job_files(source.id), job_files(job.id)):
+            if source_file.exists():
+                link_file(source_file, target_file)
+        job.status = "done"
+        job.reused_from = source.id
+        job.completed_at = datetime.utcnow()
+        job = self.job_repo.create(job)
+        self._copy_results(source.id, job.id)
+        return job
+
+    def _results_available(self, job_id: str) -> bool:
+        return (
+            raw_path(job_id).exists()
+            and cleaned_path(job_id).exists()
+            and self.profile_repo.get_by_job_id(job_id) is not None
+            and self.suggestion_repo.get_by_job_id(job_id) is not None
+        )
+
+    def _copy_results(self, source_id: str, job_id: str):
+        profiling = self.profile_repo.get_by_job_id(source_id)
+        self.profile_repo.create(
+            job_id=job_id,
+            row_count=profiling.row_count,
+            column_count=profiling.column_count,
+            column_types=profiling.column_types,
+            null_counts=profiling.null_counts,
+            column_stats=profiling.column_stats,
+            duplicate_row_count=profiling.duplicate_row_count,
+            sketches=profiling.sketches,
+            read_schema=profiling.read_schema,
+        )
+        suggestions = self.suggestion_repo.get_by_job_id(source_id)
+        self.suggestion_repo.create(job_id, suggestions.suggestions)
@@ -0,0 +1,261 @@
+"""
+Resumable uploads, sent as numbered parts over several requests.
+
+A session is a directory under DATA_DIR/uploads holding session.json and one
+file per received part. Parts may arrive in any order and in parallel; each
+is written to a temporary file and renamed into place, so a part is either
+complete or absent and an interrupted one is simply sent again. Completing
+the session streams the parts in order into an UploadWriter, deleting each
+part once copied so the upload is never on disk twice, and creates the job
+exactly like a single-request upload.
+
+Sessions idle for settings.UPLOAD_SESSION_TTL_SECONDS are deleted whenever a
+new session is created.
+"""
+from datetime import datetime, timedelta
+import json
+import math
+import os
+import shutil
+import time
+import uuid
+
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from services.upload_service import (
+    ALL_SHEETS, UPLOAD_READ_SIZE, UploadService, UploadTooLargeError, UploadWriter,
+)
+from storage.db.models import JobModel
+from storage.object_store import upload_session_dir, uploads_dir
+
+# Parts one session may be split into
+MAX_PARTS = 10_000
+
+SESSION_FILE = "session.json"
+
+
+def _part_name(number: int) -> str:
+    return f"{number:05d}.part"
+
+
+class PartWriter:
+    """
+    Receives one part into a temporary file; on a clean exit the part is
+    checked against its expected size and renamed into place.
+    """
+
+    def __init__(self, session_dir, number: int, expected_size: int):
+        self.path = session_dir / _part_name(number)
+        self.expected_size = expected_size
+        self.size = 0
+        self._session_file = session_dir / SESSION_FILE
+        self._tmp_path = session_dir / f".{number}-{uuid.uuid4().hex}.tmp"
+        self._file = open(self._tmp_path, "wb")
+
+    def write(self, chunk: bytes):
+        """
+        Raises:
+            UploadTooLargeError: If the part grows past its expected size
+        """
+        self.size += len(chunk)
+        if self.size > self.expected_size:
+            raise UploadTooLargeError(f"Part exceeds its size of {self.expected_size} bytes")
+        self._file.write(chunk)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._file.close()
+        try:
+            if exc_type is None:
+                if self.size != self.expected_size:
+                    raise ValueError(
+                        f"Part has {self.size} bytes, expected {self.expected_size}"
+                    )
+                os.replace(self._tmp_path, self.path)
+                # The session's last activity, for garbage collection
+                os.utime(self._session_file)
+        finally:
+            self._tmp_path.unlink(missing_ok=True)
+
+
+class UploadSessionService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def create(
+        self,
+        filename: str,
+        size: int,
+        sheet: str | None = None,
+        part_size: int | None = None,
+        profile: bool | None = None,
+    ) -> dict:
+        """
+        Start a session for an upload of size bytes. With profile, the upload
+        is profiled while the parts are assembled (default:
+        settings.PROFILE_DURING_UPLOAD).
+
+        Raises:
+            UploadTooLargeError: If size is over settings.MAX_UPLOAD_BYTES
+            ValueError: If the upload would need more than MAX_PARTS parts
+        """
+        limit = settings.MAX_UPLOAD_BYTES
+        if limit and size > limit:
+            raise UploadTooLargeError(f"Upload exceeds the limit of {limit} bytes")
+        part_size = part_size or settings.UPLOAD_PART_SIZE
+        part_count = max(1, math.ceil(size / part_size))
+        if part_count > MAX_PARTS:
+            raise ValueError(f"Upload needs {part_count} parts, at most {MAX_PARTS} allowed")
+
+        remove_stale_sessions()
+
+        upload_id = str(uuid.uuid4())
+        session_dir = upload_session_dir(upload_id)
+        session_dir.mkdir(parents=True)
+        session = {
+            "filename": filename,
+            "sheet": sheet,
+            "profile": settings.PROFILE_DURING_UPLOAD if profile is None else profile,
+            "size": size,
+            "part_size": part_size,
+            "part_count": part_count,
+        }
+        tmp_path = session_dir / f".{SESSION_FILE}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(session, f)
+        os.replace(tmp_path, session_dir / SESSION_FILE)
+        return self.status(upload_id)
+
+    def _load(self, upload_id: str) -> dict | None:
+        try:
+            # Also rejects ids that are not plain uuids, e.g. "../cleaned"
+            uuid.UUID(upload_id)
+            with open(upload_session_dir(upload_id) / SESSION_FILE, encoding="utf-8") as f:
+                return json.load(f)
+        except (ValueError, FileNotFoundError):
+            return None
+
+    def _part_size(self, session: dict, number: int) -> int:
+        if number < session["part_count"]:
+            return session["part_size"]
+        return session["size"] - session["part_size"] * (session["part_count"] - 1)
+
+    def status(self, upload_id: str) -> dict | None:
+        """The session's parts received so far and still missing, or None if unknown"""
+        session = self._load(upload_id)
+        if session is None:
+            return None
+
+        session_dir = upload_session_dir(upload_id)
+        received = [
+            number for number in range(1, session["part_count"] + 1)
+            if (session_dir / _part_name(number)).exists()
+        ]
+        last_activity = (session_dir / SESSION_FILE).stat().st_mtime
+        return {
+            "upload_id": upload_id,
+            **session,
+            "received_parts": received,
+            "missing_parts": sorted(set(range(1, session["part_count"] + 1)) - set(received)),
+            "received_bytes": sum(self._part_size(session, number) for number in received),
+            "expires_at": datetime.utcfromtimestamp(last_activity)
+            + timedelta(seconds=settings.UPLOAD_SESSION_TTL_SECONDS),
+        }
+
+    def open_part(self, upload_id: str, number: int) -> PartWriter:
+        """
+        Writer for part number (1-based) of a session. Sending a part again
+        replaces it.
+
+        Raises:
+            KeyError: If the session does not exist
+            ValueError: If the session has no such part
+        """
+        session = self._load(upload_id)
+        if session is None:
+            raise KeyError(upload_id)
+        if not 1 <= number <= session["part_count"]:
+            raise ValueError(f"Part number must be between 1 and {session['part_count']}")
+        return PartWriter(upload_session_dir(upload_id), number, self._part_size(session, number))
+
+    def complete(self, upload_id: str) -> list[JobModel]:
+        """
+        Assemble the parts into the upload and create its job (one per sheet
+        if the session's sheet is ALL_SHEETS). Each part is deleted as soon as
+        it is copied, so the session is used up by the attempt: if assembling
+        or creating the job fails, the upload has to be sent again.
+
+        Raises:
+            KeyError: If the session does not exist (or is being completed)
+            ValueError: If parts are missing, or the upload cannot be ingested
+        """
+        session = self._load(upload_id)
+        if session is None:
+            raise KeyError(upload_id)
+        missing = self.status(upload_id)["missing_parts"]
+        if missing:
+            shown = ", ".join(str(number) for number in missing[:20])
+            raise ValueError(f"{len(missing)} parts missing: {shown}")
+
+        # Renaming claims the session, so concurrent completions cannot both
+        # create a job and new parts can no longer arrive
+        session_dir = upload_session_dir(upload_id)
+        claimed_dir = session_dir.with_name(f".{upload_id}.completing")
+        try:
+            os.rename(session_dir, claimed_dir)
+        except FileNotFoundError:
+            raise KeyError(upload_id)
+
+        try:
+            with UploadWriter(profile=session.get("profile", False)) as upload:
+                for number in range(1, session["part_count"] + 1):
+                    part_path = claimed_dir / _part_name(number)
+                    with open(part_path, "rb") as f:
+                        while chunk := f.read(UPLOAD_READ_SIZE):
+                            upload.write(chunk)
+                    part_path.unlink()
+                upload.finish()
+
+                service = UploadService(self.db)
+                if session["sheet"] == ALL_SHEETS:
+                    jobs = service.store_upload_sheets(upload, session["filename"])
+                else:
+                    jobs = [service.store_upload(upload, session["filename"], session["sheet"])]
+        finally:
+            shutil.rmtree(claimed_dir, ignore_errors=True)
+        return jobs
+
+    def abort(self, upload_id: str) -> bool:
+        """Delete a session and its parts; False if it does not exist"""
+        if self._load(upload_id) is None:
+            return False
+        shutil.rmtree(upload_session_dir(upload_id), ignore_errors=True)
+        return True
+
+
+def remove_stale_sessions() -> int:
+    """
+    Delete sessions idle for longer than settings.UPLOAD_SESSION_TTL_SECONDS,
+    including ones whose completion was interrupted.
+
+    Returns:
+        The number of sessions deleted
+    """
+    if not uploads_dir().exists():
+        return 0
+
+    cutoff = time.time() - settings.UPLOAD_SESSION_TTL_SECONDS
+    removed = 0
+    for session_dir in uploads_dir().iterdir():
+        session_file = session_dir / SESSION_FILE
+        try:
+            last_activity = (session_file if session_file.exists() else session_dir).stat().st_mtime
+        except FileNotFoundError:
+            continue
+        if last_activity < cutoff:
+            shutil.rmtree(session_dir, ignore_errors=True)
+            removed += 1
+    return removed
@@ -0,0 +1,192 @@
+"""
+Worker processes that run queued pipeline phases.
+
+The API only queues a job's next phase in the tasks table. Workers claim
+tasks, run each phase with their own database session and queue the phase
+that follows when it succeeds, so pandas work never runs in the web process:
+
+    python -m services.worker [--concurrency N]
+
+A claim leases the task for settings.WORKER_VISIBILITY_TIMEOUT_SECONDS and a
+heartbeat thread renews the lease while the phase runs. When a worker process
+dies its lease expires and another worker claims the task again; after
+settings.WORKER_MAX_ATTEMPTS claims the task and its job are marked failed.
+"""
+from contextlib import contextmanager
+import argparse
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import traceback
+import uuid
+
+from storage.db import SessionLocal, create_schema, session_scope
+from storage.db.repository import JobRepository, TaskRepository
+from services.job_service import can_transition
+from services.profiling_service import ProfilingService
+from services.suggestion_service import SuggestionService
+from services.apply_service import ApplyService
+from core.config import settings
+
+# How each phase runs; each phase leaves chaining to the queue
+PHASES = {
+    "profile": lambda db, job_id: ProfilingService(db).run(job_id, chain=False),
+    "suggest": lambda db, job_id: SuggestionService(db, None).run(job_id, chain=False),
+    "apply": lambda db, job_id: ApplyService(db).run(job_id),
+}
+# Phase queued after each phase succeeds
+NEXT_PHASE = {"profile": "suggest", "suggest": "apply", "apply": None}
+# Job status a phase leaves behind; a recovered task whose job already reached
+# it finished before its worker died and is not run again
+FINISHED_STATUS = {"profile": "suggesting", "suggest": "applying", "apply": "done"}
+
+
+class Worker:
+    def __init__(self, session_factory=SessionLocal, worker_id: str | None = None):
+        self.session_factory = session_factory
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.stopping = threading.Event()
+
+    def run(self):
+        """Process tasks until stop is requested, polling while the queue is empty"""
+        while not self.stopping.is_set():
+            try:
+                busy = self.run_once()
+            except Exception as e:
+                # e.g. the database is briefly locked; the task lease covers crashes
+                print(f"Warning: worker {self.worker_id} could not process the queue: {e}")
+                busy = False
+            if not busy:
+                self.stopping.wait(settings.WORKER_POLL_INTERVAL_SECONDS)
+
+    def run_once(self) -> bool:
+        """Claim and run one task; False when nothing was runnable"""
+        # Each task gets its own session, separate from any request
+        with session_scope(self.session_factory) as db:
+            tasks = TaskRepository(db)
+            task = tasks.claim(self.worker_id, settings.WORKER_VISIBILITY_TIMEOUT_SECONDS)
+            if task is None:
+                return False
+
+            job_repo = JobRepository(db)
+            if task.attempts > settings.WORKER_MAX_ATTEMPTS:
+                tasks.fail(task.id, self.worker_id, f"Abandoned {task.attempts - 1} times")
+                job = job_repo.get(task.job_id)
+                if job and can_transition(job.status, "failed"):
+                    job_repo.update_status(task.job_id, "failed")
+                return True
+
+            job = job_repo.get(task.job_id)
+            if job is None or job.status != FINISHED_STATUS[task.phase]:
+                with self._heartbeat(task.id):
+                    try:
+                        PHASES[task.phase](db, task.job_id)
+                    except Exception:
+                        # The phase has already marked its job failed
+                        db.rollback()
+                        tasks.fail(task.id, self.worker_id, traceback.format_exc(limit=5))
+                        return True
+
+            tasks.complete(task.id, self.worker_id, NEXT_PHASE[task.phase])
+            return True
+
+    @contextmanager
+    def _heartbeat(self, task_id: str):
+        """Renew the task lease in the background while the phase runs"""
+        timeout = settings.WORKER_VISIBILITY_TIMEOUT_SECONDS
+        done = threading.Event()
+
+        def renew():
+            while not done.wait(timeout / 3):
+                try:
+                    with session_scope(self.session_factory) as db:
+                        TaskRepository(db).extend(task_id, self.worker_id, timeout)
+                except Exception as e:
+                    print(f"Warning: could not renew lease of task {task_id}: {e}")
+
+        thread = threading.Thread(target=renew, daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            done.set()
+            thread.join()
+
+
+def _worker_process():
+    worker = Worker()
+    # Finish the current task, then exit
+    signal.signal(signal.SIGTERM, lambda *_: worker.stopping.set())
+    signal.signal(signal.SIGINT, lambda *_: worker.stopping.set())
+    worker.run()
+
+
+class WorkerPool:
+    """Worker processes, restarted if they exit unexpectedly (e.g. out of memory)"""
+
+    def __init__(self, concurrency: int = None):
+        self.concurrency = settings.WORKER_CONCURRENCY if concurrency is None else concurrency
+        # Fresh interpreters: no inherited database connections or threads
+        self.context = multiprocessing.get_context("spawn")
+        self.processes = []
+        self.stopping = threading.Event()
+        self.supervisor = None
+
+    def _spawn(self, index: int):
+        process = self.context.Process(target=_worker_process, name=f"worker-{index}")
+        process.start()
+        return process
+
+    def start(self):
+        self.processes = [self._spawn(i) for i in range(self.concurrency)]
+        self.supervisor = threading.Thread(target=self._supervise, daemon=True)
+        self.supervisor.start()
+
+    def _supervise(self):
+        while not self.stopping.wait(1.0):
+            for i, process in enumerate(self.processes):
+                if not process.is_alive() and not self.stopping.is_set():
+                    print(f"Warning: {process.name} exited with code {process.exitcode}; restarting")
+                    self.processes[i] = self._spawn(i)
+
+    def stop(self, timeout: float = 30):
+        """Let workers finish their current task; kill those still busy after timeout"""
+        self.stopping.set()
+        if self.supervisor is not None:
+            self.supervisor.join()
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            process.join(timeout)
+            if process.is_alive():
+                # Its task lease expires and another worker picks the task up
+                process.kill()
+                process.join()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run queued pipeline phases")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=settings.WORKER_CONCURRENCY,
+        help="Worker processes (default: WORKER_CONCURRENCY)",
+    )
+    args = parser.parse_args(argv)
+
+    create_schema()
+    pool = WorkerPool(args.concurrency)
+    pool.start()
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    print(f"Started {args.concurrency} worker processes")
+    stop.wait()
+    pool.stop()
+
+
+if __name__ == "__main__":
+    main()
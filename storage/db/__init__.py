@@ -1,10 +1,95 @@
 from .models import Base
-from sqlalchemy import create_engine
+from contextlib import contextmanager
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import sessionmaker
 import os
 
+from core.config import settings
+
 # Use /tmp for Cloud Run compatibility (filesystem is read-only except /tmp)
 # Note: sqlite:////tmp/data.db uses 4 slashes (sqlite:/// + /tmp/data.db absolute path)
-engine = create_engine(
-    os.getenv("DATABASE_URL", "sqlite:////tmp/data.db"),
-    connect_args={"check_same_thread": False}
-)
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:////tmp/data.db")
+
+
+def make_engine(url: str = DATABASE_URL):
+    """
+    Create the engine shared by the API, the workers and the scripts.
+
+    SQLite files default to WAL (DB_SQLITE_JOURNAL_MODE), so readers such as
+    status polls and the single writer do not block each other, and to
+    synchronous=NORMAL (DB_SQLITE_SYNCHRONOUS), which only syncs at
+    checkpoints: a power loss can drop the last commits but never corrupts
+    the file. Connections wait up to DB_BUSY_TIMEOUT_SECONDS for the write
+    lock instead of failing with "database is locked".
+    """
+    url = make_url(url)
+    if url.get_backend_name() != "sqlite":
+        return create_engine(
+            url,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_pre_ping=True,
+        )
+
+    # In-memory databases keep SQLAlchemy's single-connection pool
+    in_memory = url.database in (None, "", ":memory:")
+    pool_args = {} if in_memory else {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+    }
+    engine = create_engine(
+        url,
+        connect_args={
+            "check_same_thread": False,
+            "timeout": settings.DB_BUSY_TIMEOUT_SECONDS,
+        },
+        **pool_args,
+    )
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        if not in_memory:
+            cursor.execute(f"PRAGMA journal_mode={settings.DB_SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={settings.DB_SQLITE_SYNCHRONOUS}")
+        cursor.close()
+
+    return engine
+
+
+engine = make_engine()
+SessionLocal = sessionmaker(bind=engine)
+
+
+@contextmanager
+def session_scope(session_factory=SessionLocal):
+    """A session for one unit of work (a request or a pipeline task), always closed"""
+    db = session_factory()
+    try:
+        yield db
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def create_schema(bind=engine):
+    """
+    Create missing tables, and add nullable columns and indexes that were
+    introduced after an existing database was created (create_all never
+    alters tables)
+    """
+    Base.metadata.create_all(bind=bind)
+    inspector = inspect(bind)
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                column_type = column.type.compile(dialect=bind.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+            for index in table.indexes:
+                index.create(bind=conn, checkfirst=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Integer, JSON, ForeignKey
+from sqlalchemy import Boolean, Column, String, DateTime, Integer, JSON, ForeignKey, Index
 from sqlalchemy.orm import declarative_base, relationship
 from datetime import datetime
 import uuid
@@ -8,12 +8,27 @@ Base = declarative_base()
 
 class JobModel(Base):
     __tablename__ = "jobs"
+    # Keyset pagination of GET /jobs, newest first, with and without a status filter
+    __table_args__ = (
+        Index("ix_jobs_status_created_at", "status", "created_at", "id"),
+        Index("ix_jobs_created_at", "created_at", "id"),
+    )
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     original_filename = Column(String, nullable=False)
     status = Column(String, nullable=False, default="pending")
     created_at = Column(DateTime, default=datetime.utcnow)
     completed_at = Column(DateTime, nullable=True)
+    # SHA-256 of the uploaded bytes, used to reuse the results of identical uploads
+    content_hash = Column(String, nullable=True, index=True)
+    # "hit" when the results of an earlier job were reused, otherwise "miss"
+    upload_cache = Column(String, nullable=True)
+    reused_from = Column(String, nullable=True)
+    # Worksheet the data was converted from, for Excel uploads
+    sheet_name = Column(String, nullable=True)
+    # Encoding, delimiter, quoting, header and decimal separator of the
+    # upload, sniffed once when the job is created (see dialect_service)
+    csv_dialect = Column(JSON, nullable=True)
 
     profiling = relationship(
         "ProfilingResult",
@@ -23,6 +38,16 @@ class JobModel(Base):
     )
 
 
+class JobStatusEvent(Base):
+    """When a job entered each status (kept if settings.JOB_STATUS_HISTORY)"""
+    __tablename__ = "job_status_history"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    job_id = Column(String, ForeignKey("jobs.id"), nullable=False, index=True)
+    status = Column(String, nullable=False)
+    at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
 class ProfilingResult(Base):
     __tablename__ = "profiling_results"
 
@@ -31,6 +56,16 @@ class ProfilingResult(Base):
     column_count = Column(Integer, nullable=False)
     column_types = Column(JSON, nullable=False)
     null_counts = Column(JSON, nullable=False)
+    # Per-column statistics from the single profiling pass (see profile_column)
+    column_stats = Column(JSON, nullable=True)
+    duplicate_row_count = Column(Integer, nullable=True)
+    # Mergeable per-column sketches, only for datasets profiled in sketch mode
+    sketches = Column(JSON, nullable=True)
+    # dtypes and column facts later reads pass to the CSV reader (see
+    # build_read_schema)
+    read_schema = Column(JSON, nullable=True)
+    # Profiled from the upload's bytes as they arrived (see StreamingProfiler)
+    from_upload = Column(Boolean, nullable=True)
 
     job = relationship("JobModel", back_populates="profiling")
 
@@ -45,3 +80,36 @@ class SuggestionModel(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
     job = relationship("JobModel")
+
+
+class SuggestionCacheEntry(Base):
+    __tablename__ = "suggestion_cache"
+
+    # Hash of the generator and the schema/profile features it decides from
+    fingerprint = Column(String, primary_key=True)
+    generator = Column(String, nullable=False)
+    suggestions = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_used_at = Column(DateTime, default=datetime.utcnow, index=True)
+    hit_count = Column(Integer, nullable=False, default=0)
+
+
+class TaskModel(Base):
+    """A queued pipeline phase, claimed and run by a worker process"""
+    __tablename__ = "tasks"
+    __table_args__ = (Index("ix_tasks_status_available_at", "status", "available_at"),)
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    job_id = Column(String, ForeignKey("jobs.id"), nullable=False, index=True)
+    # "profile", "suggest" or "apply"
+    phase = Column(String, nullable=False)
+    # "queued", "running", "done" or "failed"
+    status = Column(String, nullable=False, default="queued")
+    attempts = Column(Integer, nullable=False, default=0)
+    available_at = Column(DateTime, default=datetime.utcnow)
+    # A running task whose lease expired (its worker died) is claimed again
+    locked_by = Column(String, nullable=True)
+    locked_until = Column(DateTime, nullable=True)
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
@@ -1,8 +1,25 @@
+from sqlalchemy import and_, or_, select, tuple_, update
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 
-from storage.db.models import JobModel, ProfilingResult, SuggestionModel
-from core.constants import JOB_STATUS_TRANSITIONS
+from datetime import datetime, timedelta
+
+from storage.db.models import (
+    JobModel,
+    JobStatusEvent,
+    ProfilingResult,
+    SuggestionModel,
+    SuggestionCacheEntry,
+    TaskModel,
+)
+from core.constants import JOB_STATUS_TRANSITIONS, TERMINAL_STATUSES
+from core.config import settings
+
+# Statuses each status can be entered from
+_PREVIOUS_STATUSES = {
+    status: [current for current, allowed in JOB_STATUS_TRANSITIONS.items() if status in allowed]
+    for status in JOB_STATUS_TRANSITIONS
+}
 
 
 class JobRepository:
@@ -11,6 +28,9 @@ class JobRepository:
 
     def create(self, job: JobModel):
         self.db.add(job)
+        if settings.JOB_STATUS_HISTORY:
+            self.db.flush()
+            self.db.add(JobStatusEvent(job_id=job.id, status=job.status, at=job.created_at))
         self.db.commit()
         self.db.refresh(job)
         return job
@@ -18,19 +38,93 @@ class JobRepository:
     def get(self, job_id: str):
         return self.db.query(JobModel).filter_by(id=job_id).first()
 
-    def update_status(self, job_id: str, new_status: str):
-        job = self.get(job_id)
-        if not job:
-            raise ValueError("Job not found")
+    def list_jobs(
+        self,
+        statuses: list[str] | None = None,
+        created_after: datetime | None = None,
+        created_before: datetime | None = None,
+        limit: int = 50,
+        after: tuple[datetime, str] | None = None,
+    ):
+        """
+        Jobs newest first. after is the (created_at, id) of the last job of
+        the previous page; seeking past it instead of using OFFSET keeps every
+        page one index range scan.
+        """
+        query = self.db.query(JobModel)
+        if statuses:
+            query = query.filter(JobModel.status.in_(statuses))
+        if created_after is not None:
+            query = query.filter(JobModel.created_at >= created_after)
+        if created_before is not None:
+            query = query.filter(JobModel.created_at < created_before)
+        if after is not None:
+            query = query.filter(tuple_(JobModel.created_at, JobModel.id) < tuple_(*after))
+        return (
+            query.order_by(JobModel.created_at.desc(), JobModel.id.desc())
+            .limit(limit)
+            .all()
+        )
 
-        allowed = JOB_STATUS_TRANSITIONS.get(job.status, [])
-        if new_status not in allowed:
-            raise ValueError(f"Invalid transition {job.status} → {new_status}")
+    def get_statuses(self, job_ids: list[str]):
+        """(id, status, completed_at) rows of the given jobs, in one query"""
+        return self.db.execute(
+            select(JobModel.id, JobModel.status, JobModel.completed_at)
+            .where(JobModel.id.in_(job_ids))
+        ).all()
 
-        job.status = new_status
-        self.db.commit()
-        self.db.refresh(job)
-        return job
+    def update_status(self, job_id: str, new_status: str, commit: bool = True):
+        """
+        Move a job to new_status with one conditional UPDATE, so concurrent
+        workers cannot both make the same transition. Terminal statuses stamp
+        completed_at (cleared again when a failed job is retried). With
+        commit=False the change joins the caller's transaction.
+
+        Raises:
+            ValueError: If the job does not exist or cannot move to new_status
+        """
+        now = datetime.utcnow()
+        result = self.db.execute(
+            update(JobModel)
+            .where(
+                JobModel.id == job_id,
+                JobModel.status.in_(_PREVIOUS_STATUSES.get(new_status, [])),
+            )
+            .values(
+                status=new_status,
+                completed_at=now if new_status in TERMINAL_STATUSES else None,
+            )
+        )
+        if result.rowcount != 1:
+            self.db.rollback()
+            current = self.db.execute(
+                select(JobModel.status).where(JobModel.id == job_id)
+            ).scalar()
+            if current is None:
+                raise ValueError("Job not found")
+            raise ValueError(f"Invalid transition {current} → {new_status}")
+
+        if settings.JOB_STATUS_HISTORY:
+            self.db.add(JobStatusEvent(job_id=job_id, status=new_status, at=now))
+        if commit:
+            self.db.commit()
+
+    def get_status_history(self, job_id: str):
+        return (
+            self.db.query(JobStatusEvent)
+            .filter(JobStatusEvent.job_id == job_id)
+            .order_by(JobStatusEvent.at, JobStatusEvent.id)
+            .all()
+        )
+
+    def get_latest_done_by_content_hash(self, content_hash: str):
+        """The most recent completed job whose upload had this content hash"""
+        return (
+            self.db.query(JobModel)
+            .filter(JobModel.content_hash == content_hash, JobModel.status == "done")
+            .order_by(JobModel.created_at.desc())
+            .first()
+        )
 
 
 class ProfilingRepository:
@@ -50,6 +144,11 @@ class ProfilingRepository:
         column_count: int,
         column_types: dict,
         null_counts: dict,
+        column_stats: dict = None,
+        duplicate_row_count: int = None,
+        sketches: dict = None,
+        from_upload: bool = None,
+        read_schema: dict = None,
     ):
         profiling = ProfilingResult(
             job_id=job_id,
@@ -57,6 +156,11 @@ class ProfilingRepository:
             column_count=column_count,
             column_types=column_types,
             null_counts=null_counts,
+            column_stats=column_stats,
+            duplicate_row_count=duplicate_row_count,
+            sketches=sketches,
+            from_upload=from_upload,
+            read_schema=read_schema,
         )
 
         self.db.add(profiling)
@@ -98,3 +202,162 @@ class SuggestionRepository:
             .order_by(SuggestionModel.created_at.desc())
             .first()
         )
+
+
+class SuggestionCacheRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get(self, fingerprint: str, ttl_seconds: int):
+        """Return a live entry and mark it used; expired entries are deleted"""
+        entry = self.db.get(SuggestionCacheEntry, fingerprint)
+        if entry is None:
+            return None
+        if entry.created_at < datetime.utcnow() - timedelta(seconds=ttl_seconds):
+            self.db.delete(entry)
+            self.db.commit()
+            return None
+
+        entry.last_used_at = datetime.utcnow()
+        entry.hit_count += 1
+        self.db.commit()
+        return entry
+
+    def put(self, fingerprint: str, generator: str, suggestions: list[dict], max_entries: int):
+        """Store an entry, evicting the least recently used beyond max_entries"""
+        entry = self.db.get(SuggestionCacheEntry, fingerprint)
+        now = datetime.utcnow()
+        if entry is None:
+            entry = SuggestionCacheEntry(fingerprint=fingerprint, generator=generator, hit_count=0)
+            self.db.add(entry)
+        entry.suggestions = suggestions
+        entry.created_at = now
+        entry.last_used_at = now
+        self.db.flush()
+
+        stale = (
+            self.db.query(SuggestionCacheEntry.fingerprint)
+            .order_by(SuggestionCacheEntry.last_used_at.desc())
+            .offset(max_entries)
+            .all()
+        )
+        if stale:
+            self.db.query(SuggestionCacheEntry).filter(
+                SuggestionCacheEntry.fingerprint.in_([row.fingerprint for row in stale])
+            ).delete(synchronize_session=False)
+        self.db.commit()
+        return entry
+
+    def delete(self, fingerprint: str):
+        self.db.query(SuggestionCacheEntry).filter(
+            SuggestionCacheEntry.fingerprint == fingerprint
+        ).delete()
+        self.db.commit()
+
+
+class TaskRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def enqueue(self, job_id: str, phase: str, status: str | None = None):
+        """
+        Queue a phase of a job. Given a status, the job is moved to it in the
+        same transaction, so a job never shows a phase that was not queued.
+
+        Raises:
+            ValueError: If the job cannot move to status
+        """
+        if status is not None:
+            JobRepository(self.db).update_status(job_id, status, commit=False)
+        task = TaskModel(job_id=job_id, phase=phase, available_at=datetime.utcnow())
+        self.db.add(task)
+        self.db.commit()
+        self.db.refresh(task)
+        return task
+
+    def get(self, task_id: str):
+        return self.db.get(TaskModel, task_id)
+
+    def claim(self, worker_id: str, visibility_timeout: int):
+        """
+        Lease the oldest runnable task to this worker for visibility_timeout
+        seconds. Queued tasks and running tasks whose lease expired are
+        runnable; the conditional UPDATE makes the claim atomic, so two
+        workers never take the same task.
+        """
+        now = datetime.utcnow()
+        runnable = or_(
+            and_(TaskModel.status == "queued", TaskModel.available_at <= now),
+            and_(TaskModel.status == "running", TaskModel.locked_until < now),
+        )
+        candidates = (
+            self.db.query(TaskModel.id)
+            .filter(runnable)
+            .order_by(TaskModel.available_at, TaskModel.created_at)
+            .limit(10)
+            .all()
+        )
+        for (task_id,) in candidates:
+            claimed = (
+                self.db.query(TaskModel)
+                .filter(TaskModel.id == task_id, runnable)
+                .update(
+                    {
+                        TaskModel.status: "running",
+                        TaskModel.locked_by: worker_id,
+                        TaskModel.locked_until: now + timedelta(seconds=visibility_timeout),
+                        TaskModel.attempts: TaskModel.attempts + 1,
+                    },
+                    synchronize_session=False,
+                )
+            )
+            self.db.commit()
+            if claimed:
+                return self.get(task_id)
+        return None
+
+    def _update_leased(self, task_id: str, worker_id: str, values: dict) -> bool:
+        """Update a task only while this worker still holds its lease (not committed)"""
+        updated = (
+            self.db.query(TaskModel)
+            .filter(
+                TaskModel.id == task_id,
+                TaskModel.status == "running",
+                TaskModel.locked_by == worker_id,
+            )
+            .update(values, synchronize_session=False)
+        )
+        return bool(updated)
+
+    def extend(self, task_id: str, worker_id: str, visibility_timeout: int) -> bool:
+        """Renew the lease of a task that is still being worked on"""
+        extended = self._update_leased(task_id, worker_id, {
+            TaskModel.locked_until: datetime.utcnow() + timedelta(seconds=visibility_timeout),
+        })
+        self.db.commit()
+        return extended
+
+    def complete(self, task_id: str, worker_id: str, next_phase: str | None = None) -> bool:
+        """Mark a task done and, in the same transaction, queue the next phase"""
+        completed = self._update_leased(task_id, worker_id, {
+            TaskModel.status: "done",
+            TaskModel.locked_until: None,
+            TaskModel.finished_at: datetime.utcnow(),
+        })
+        if completed and next_phase is not None:
+            task = self.get(task_id)
+            self.db.add(TaskModel(
+                job_id=task.job_id, phase=next_phase, available_at=datetime.utcnow()
+            ))
+        self.db.commit()
+        return completed
+
+    def fail(self, task_id: str, worker_id: str, error: str) -> bool:
+        failed = self._update_leased(task_id, worker_id, {
+            TaskModel.status: "failed",
+            TaskModel.locked_until: None,
+            TaskModel.error: error,
+            TaskModel.finished_at: datetime.utcnow(),
+        })
+        self.db.commit()
+        return failed
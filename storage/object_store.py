@@ -0,0 +1,98 @@
+"""
+Filesystem layout for job data stored under DATA_DIR
+"""
+import os
+import shutil
+from pathlib import Path
+
+from core.constants import DATA_DIR
+
+
+def raw_path(job_id: str) -> Path:
+    """Path of the file uploaded for a job"""
+    return Path(DATA_DIR) / f"{job_id}.csv"
+
+
+def artifact_path(job_id: str) -> Path:
+    """Path of the typed columnar copy of the upload, written once at ingest"""
+    return Path(DATA_DIR) / "artifacts" / f"{job_id}.parquet"
+
+
+def cleaned_path(job_id: str) -> Path:
+    """Path of the cleaned CSV produced by the apply phase"""
+    return Path(DATA_DIR) / "cleaned" / f"{job_id}.csv"
+
+
+# File extension of each typed export of the cleaned data
+EXPORT_EXTENSIONS = {"parquet": ".parquet", "feather": ".feather", "arrow": ".arrow"}
+
+
+def export_path(job_id: str, fmt: str) -> Path:
+    """Path of a typed columnar export of the cleaned data"""
+    return Path(DATA_DIR) / "cleaned" / f"{job_id}{EXPORT_EXTENSIONS[fmt]}"
+
+
+# File suffix of each precompressed copy of the cleaned CSV, by Content-Encoding
+CSV_ENCODINGS = {"zstd": ".zst", "gzip": ".gz"}
+
+
+def encoded_path(job_id: str, encoding: str) -> Path:
+    """Path of a precompressed copy of the cleaned CSV"""
+    return Path(DATA_DIR) / "cleaned" / f"{job_id}.csv{CSV_ENCODINGS[encoding]}"
+
+
+def digests_path(job_id: str) -> Path:
+    """Path of the content hashes (ETags) of the job's downloadable files"""
+    return Path(DATA_DIR) / "cleaned" / f"{job_id}_digests.json"
+
+
+def dtypes_path(job_id: str) -> Path:
+    """Path of the dtype metadata written next to the cleaned CSV"""
+    return Path(DATA_DIR) / "cleaned" / f"{job_id}_dtypes.json"
+
+
+def plan_path(job_id: str) -> Path:
+    """Path of the optimized plan the apply phase actually executed"""
+    return Path(DATA_DIR) / "cleaned" / f"{job_id}_plan.json"
+
+
+def uploads_dir() -> Path:
+    """Directory holding the sessions of resumable uploads"""
+    return Path(DATA_DIR) / "uploads"
+
+
+def upload_session_dir(upload_id: str) -> Path:
+    """Directory of a resumable upload session: its metadata and received parts"""
+    return uploads_dir() / upload_id
+
+
+def job_files(job_id: str) -> list[Path]:
+    """Every stored file a job's results consist of, whether or not it exists"""
+    return [
+        raw_path(job_id),
+        artifact_path(job_id),
+        cleaned_path(job_id),
+        dtypes_path(job_id),
+        plan_path(job_id),
+        *(export_path(job_id, fmt) for fmt in EXPORT_EXTENSIONS),
+        *(encoded_path(job_id, encoding) for encoding in CSV_ENCODINGS),
+        digests_path(job_id),
+    ]
+
+
+def link_file(source: Path, target: Path):
+    """
+    Make target share source's data without copying it.
+
+    Uses a hard link, so the filesystem's link count is the file's reference
+    count: unlinking one job's path frees the data only once no other job
+    links it. Falls back to a copy where hard links are not supported.
+    """
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.unlink(missing_ok=True)
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copyfile(source, target)
+    # Age-based cleanup goes by mtime, which a hard link shares with its source
+    os.utime(target)
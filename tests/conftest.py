@@ -0,0 +1,60 @@
+"""
+Fixtures shared by the tests: a data directory and job database per test
+"""
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+import api.routes.apply as apply_route
+import api.routes.download as download
+import api.routes.report as report
+import core.cleanup as cleanup
+import services.report_service as report_service
+import services.upload_service as upload_service
+import storage.object_store as object_store
+from api.deps import get_db
+from api.main import app
+from storage.db import create_schema, make_engine
+
+# Modules that import DATA_DIR, and so keep their own reference to it
+DATA_DIR_MODULES = (
+    object_store, upload_service, cleanup, download, report, report_service, apply_route,
+)
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Point every module that stores files at tmp_path"""
+    for module in DATA_DIR_MODULES:
+        monkeypatch.setattr(module, "DATA_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def session_factory(data_dir):
+    engine = make_engine(f"sqlite:///{data_dir}/jobs.db")
+    create_schema(bind=engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def db(session_factory):
+    session = session_factory()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def client(session_factory):
+    """A TestClient whose requests use the test's database"""
+    def override_get_db():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    yield TestClient(app)
+    app.dependency_overrides.clear()
@@ -0,0 +1,71 @@
+"""
+Tests for sniffing an upload's CSV dialect and reading it back with it
+"""
+import io
+
+import pandas as pd
+import pytest
+
+from services.dialect_service import read_csv_options, sniff_dialect
+from services.profiling_service import ProfilingService
+from storage.db.repository import JobRepository, ProfilingRepository
+from storage.object_store import cleaned_path, raw_path
+
+# A German spreadsheet export: semicolons, decimal commas, Windows-1252
+EXPORT = (
+    "Kunde;Stadt;Umsatz\n"
+    + "".join(f"Müller {i};Köln;{i},5\n" for i in range(200))
+).encode("cp1252")
+
+
+def test_sniff_regional_export():
+    """Test encoding, delimiter and decimal separator of a non-default export"""
+    dialect = sniff_dialect(EXPORT)
+
+    assert dialect == {
+        "encoding": "cp1252", "delimiter": ";", "quotechar": '"', "header": True, "decimal": ",",
+    }
+    df = pd.read_csv(io.BytesIO(EXPORT), **read_csv_options(dialect))
+    assert list(df.columns) == ["Kunde", "Stadt", "Umsatz"]
+    assert df["Umsatz"].dtype == "float64"
+    assert df.loc[0, "Stadt"] == "Köln"
+
+
+def test_sniff_defaults_and_headerless():
+    """Test plain CSV keeps pandas' defaults and a numeric first row is not a header"""
+    assert sniff_dialect(b"name,age\nAlice,25\nBob,\n")["delimiter"] == ","
+    assert sniff_dialect("\ufeffname\tage\nAlice\t25\n".encode("utf-8"))["encoding"] == "utf-8-sig"
+
+    headerless = sniff_dialect(b"1,2.5,x\n2,3.5,y\n3,4.5,z\n")
+    assert headerless["header"] is False
+    df = pd.read_csv(io.BytesIO(b"1,2.5,x\n2,3.5,y\n3,4.5,z\n"), **read_csv_options(headerless))
+    assert list(df.columns) == ["column_1", "column_2", "column_3"]
+    assert len(df) == 3
+
+
+@pytest.mark.parametrize("profile", ["false", "true"])
+def test_pipeline_reads_upload_in_its_dialect(client, session_factory, profile):
+    """Test the stored dialect reaches profiling (on upload or after) and cleaning"""
+    response = client.post(
+        f"/jobs/upload?profile={profile}", files={"file": ("export.csv", io.BytesIO(EXPORT))}
+    )
+    job_id = response.json()["job_id"]
+    assert client.get(f"/jobs/{job_id}").json()["csv_dialect"]["delimiter"] == ";"
+    assert raw_path(job_id).read_bytes() == EXPORT
+
+    db = session_factory()
+    try:
+        JobRepository(db).update_status(job_id, "profiling")
+        ProfilingService(db).run(job_id)
+
+        profile = ProfilingRepository(db).get_by_job_id(job_id)
+        assert profile.row_count == 200
+        assert profile.column_types["Umsatz"] == "float64"
+        assert JobRepository(db).get(job_id).status == "done"
+    finally:
+        db.close()
+
+    # Cleaned output is always UTF-8 and comma-separated
+    cleaned = pd.read_csv(cleaned_path(job_id))
+    assert len(cleaned) == 200
+    assert cleaned.iloc[0].tolist()[-1] == 0.5
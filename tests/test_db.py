@@ -0,0 +1,75 @@
+"""
+Tests for the shared engine factory and session scopes
+"""
+import threading
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+import api.deps
+import storage.db
+from storage.db import create_schema, make_engine, session_scope
+from storage.db.models import JobModel
+from storage.db.repository import JobRepository
+
+
+@pytest.fixture
+def file_engine(tmp_path):
+    engine = make_engine(f"sqlite:///{tmp_path}/jobs.db")
+    create_schema(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+def test_sqlite_connections_use_wal_and_normal_sync(file_engine):
+    """Test that every pooled connection gets the pragmas"""
+    with file_engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        # 1 is NORMAL
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1
+
+
+def test_api_and_workers_share_one_engine():
+    """Test that request sessions come from the storage layer's engine"""
+    assert api.deps.SessionLocal is storage.db.SessionLocal
+    assert storage.db.SessionLocal.kw["bind"] is storage.db.engine
+
+
+def test_session_scope_rolls_back_and_closes(file_engine):
+    """Test that a failed unit of work leaves nothing behind"""
+    session_factory = sessionmaker(bind=file_engine)
+
+    with pytest.raises(RuntimeError):
+        with session_scope(session_factory) as db:
+            db.add(JobModel(original_filename="a.csv"))
+            db.flush()
+            raise RuntimeError("boom")
+
+    with session_scope(session_factory) as db:
+        assert db.query(JobModel).count() == 0
+
+
+def test_reads_do_not_wait_for_a_writer(file_engine):
+    """Test that a status read succeeds while another connection holds the write lock"""
+    session_factory = sessionmaker(bind=file_engine)
+    with session_scope(session_factory) as db:
+        job_id = JobRepository(db).create(JobModel(original_filename="a.csv")).id
+
+    writer = file_engine.raw_connection()
+    writer.execute("BEGIN EXCLUSIVE")
+    writer.execute("UPDATE jobs SET status = 'profiling'")
+    try:
+        result = {}
+
+        def read():
+            with session_scope(session_factory) as db:
+                result["status"] = JobRepository(db).get(job_id).status
+
+        reader = threading.Thread(target=read)
+        reader.start()
+        reader.join(timeout=2)
+        assert result == {"status": "pending"}
+    finally:
+        writer.rollback()
+        writer.close()
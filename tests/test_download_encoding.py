@@ -0,0 +1,105 @@
+"""
+Tests for precompressed, conditional and ranged downloads of the cleaned CSV
+"""
+import gzip
+import io
+
+import pyarrow as pa
+import pytest
+from fastapi.testclient import TestClient
+
+from api.main import app
+from services.apply_service import ApplyService
+from services.download_service import negotiate_encoding
+from services.profiling_service import ProfilingService
+from services.suggestion_service import SuggestionService
+from services.upload_service import UploadService
+from storage.db.repository import JobRepository
+from storage.object_store import cleaned_path, encoded_path
+
+CSV = b"Name,Score\n" + b"".join(b"name_%d,%d\n" % (i, i % 7) for i in range(200))
+
+IDENTITY = {"Accept-Encoding": "identity"}
+
+
+@pytest.fixture
+def job_id(db):
+    job = UploadService(db).store(io.BytesIO(CSV), "scores.csv")
+    JobRepository(db).update_status(job.id, "profiling")
+    ProfilingService(db).run(job.id, chain=False)
+    SuggestionService(db, None).run(job.id, chain=False)
+    ApplyService(db).run(job.id)
+    return job.id
+
+
+def test_apply_writes_compressed_copies(job_id):
+    """Test that the gzip and zstd copies decompress to the cleaned CSV"""
+    cleaned = cleaned_path(job_id).read_bytes()
+
+    assert gzip.decompress(encoded_path(job_id, "gzip").read_bytes()) == cleaned
+    with pa.CompressedInputStream(str(encoded_path(job_id, "zstd")), "zstd") as f:
+        assert f.read() == cleaned
+    assert encoded_path(job_id, "zstd").stat().st_size < len(cleaned)
+
+
+def test_accept_encoding_negotiation():
+    """Test q-values, wildcards and the zstd-over-gzip tie-break"""
+    both = ["zstd", "gzip"]
+
+    assert negotiate_encoding("gzip, deflate, br, zstd", both) == "zstd"
+    assert negotiate_encoding("gzip, zstd;q=0.5", both) == "gzip"
+    assert negotiate_encoding("*", ["gzip"]) == "gzip"
+    assert negotiate_encoding("gzip;q=0, *;q=0.1", both) == "zstd"
+    assert negotiate_encoding("identity", both) is None
+    assert negotiate_encoding(None, both) is None
+
+
+def test_download_serves_negotiated_encoding(job_id):
+    """Test Content-Encoding, Vary and distinct ETags per representation"""
+    client = TestClient(app)
+    cleaned = cleaned_path(job_id).read_bytes()
+
+    gzipped = client.get(f"/jobs/{job_id}/download", headers={"Accept-Encoding": "gzip"})
+    zstd = client.get(f"/jobs/{job_id}/download", headers={"Accept-Encoding": "zstd, gzip"})
+    plain = client.get(f"/jobs/{job_id}/download", headers=IDENTITY)
+
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert gzipped.content == cleaned
+    assert zstd.headers["content-encoding"] == "zstd"
+    assert "content-encoding" not in plain.headers
+    assert plain.content == cleaned
+    assert "Accept-Encoding" in plain.headers["vary"]
+    assert len({r.headers["etag"] for r in (gzipped, zstd, plain)}) == 3
+
+
+def test_conditional_get_returns_304(job_id):
+    """Test If-None-Match with the current ETag, and after a re-apply"""
+    client = TestClient(app)
+    url = f"/jobs/{job_id}/download"
+    etag = client.get(url, headers=IDENTITY).headers["etag"]
+
+    not_modified = client.get(url, headers={**IDENTITY, "If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert client.get(url, headers={**IDENTITY, "If-None-Match": '"stale"'}).status_code == 200
+
+    cleaned_path(job_id).write_bytes(CSV)
+    assert client.get(url, headers={**IDENTITY, "If-None-Match": etag}).status_code == 200
+
+
+def test_range_resumes_download(job_id):
+    """Test that a Range request returns the remaining bytes unless If-Range is stale"""
+    client = TestClient(app)
+    url = f"/jobs/{job_id}/download"
+    full = client.get(url, headers=IDENTITY)
+
+    rest = client.get(url, headers={
+        **IDENTITY, "Range": "bytes=100-", "If-Range": full.headers["etag"]
+    })
+    assert rest.status_code == 206
+    assert rest.headers["content-range"] == f"bytes 100-{len(full.content) - 1}/{len(full.content)}"
+    assert full.content[:100] + rest.content == full.content
+
+    stale = client.get(url, headers={**IDENTITY, "Range": "bytes=100-", "If-Range": '"stale"'})
+    assert stale.status_code == 200
+    assert stale.content == full.content
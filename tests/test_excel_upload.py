@@ -0,0 +1,107 @@
+"""
+Tests for Excel uploads converted to CSV with openpyxl's read-only mode
+"""
+import io
+from datetime import datetime
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+from core.config import settings
+from services.excel_service import XLS_MAGIC
+from services.upload_service import UploadService
+from storage.object_store import raw_path
+
+
+def _workbook() -> bytes:
+    workbook = Workbook()
+    sales = workbook.active
+    sales.title = "Sales"
+    sales.append(["Item", "Quantity", "Date", None])
+    for i in range(25):
+        sales.append(["Coffee", i, datetime(2023, 9, 8)])
+    sales.append([])
+    sales.append(["Cake", 3, datetime(2023, 9, 9, 14, 30), None, "stray"])
+    stock = workbook.create_sheet("Stock")
+    stock.append(["Item", "On Hand"])
+    stock.append(["Coffee", 12])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def test_first_sheet_converted_in_batches(session_factory, monkeypatch):
+    """Test that the first sheet becomes the job's CSV, batch size aside"""
+    monkeypatch.setattr(settings, "EXCEL_BATCH_ROWS", 4)
+    job = UploadService(session_factory()).store(io.BytesIO(_workbook()), "sales.xlsx")
+
+    df = pd.read_csv(raw_path(job.id))
+    assert job.sheet_name == "Sales"
+    assert list(df.columns) == ["Item", "Quantity", "Date"]
+    assert len(df) == 26
+    assert df["Date"].iloc[0] == "2023-09-08"
+    assert df["Date"].iloc[-1] == "2023-09-09 14:30:00"
+
+
+def test_sheet_selection(session_factory):
+    """Test a named sheet, and the error for a missing one"""
+    service = UploadService(session_factory())
+
+    job = service.store(io.BytesIO(_workbook()), "sales.xlsx", sheet="Stock")
+    assert raw_path(job.id).read_bytes() == b"Item,On Hand\nCoffee,12\n"
+
+    with pytest.raises(ValueError, match="Sheet 'Missing' not found; sheets: Sales, Stock"):
+        service.store(io.BytesIO(_workbook()), "sales.xlsx", sheet="Missing")
+
+
+def test_upload_every_sheet_as_a_job(client):
+    """Test sheet=* returns one pending job per sheet"""
+    response = client.post(
+        "/jobs/upload",
+        files={"file": ("sales.xlsx", _workbook())},
+        data={"sheet": "*"},
+    ).json()
+
+    assert [job["sheet"] for job in response["jobs"]] == ["Sales", "Stock"]
+    assert {job["status"] for job in response["jobs"]} == {"pending"}
+    assert len({job["job_id"] for job in response["jobs"]}) == 2
+
+
+def test_empty_sheets_rejected_or_skipped(client):
+    """Test an empty sheet answers 400 and is left out of sheet=*"""
+    workbook = Workbook()
+    workbook.active.title = "Notes"
+    workbook.create_sheet("Stock").append(["Item", "On Hand"])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+
+    empty = client.post("/jobs/upload", files={"file": ("stock.xlsx", buffer.getvalue())})
+    assert empty.status_code == 400
+    assert "Sheet 'Notes' is empty" in empty.json()["detail"]
+
+    response = client.post(
+        "/jobs/upload", files={"file": ("stock.xlsx", buffer.getvalue())}, data={"sheet": "*"}
+    ).json()
+    assert [job["sheet"] for job in response["jobs"]] == ["Stock"]
+
+    del workbook["Stock"]
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    none = client.post(
+        "/jobs/upload", files={"file": ("notes.xlsx", buffer.getvalue())}, data={"sheet": "*"}
+    )
+    assert none.status_code == 400
+
+
+def test_unreadable_uploads_rejected(client):
+    """Test legacy .xls and broken workbooks answer 400, and CSV is unaffected"""
+    xls = client.post("/jobs/upload", files={"file": ("old.xls", XLS_MAGIC + b"\0" * 64)})
+    broken = client.post("/jobs/upload", files={"file": ("bad.xlsx", b"PK\x03\x04garbage")})
+    csv = client.post("/jobs/upload", files={"file": ("a.csv", b"a,b\n1,2\n")})
+
+    assert xls.status_code == 400
+    assert "xls" in xls.json()["detail"]
+    assert broken.status_code == 400
+    assert csv.status_code == 200
+    assert "sheet" not in csv.json()
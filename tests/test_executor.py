@@ -0,0 +1,58 @@
+"""
+Tests for column-parallel execution of cleaning plans
+"""
+import pandas as pd
+import pytest
+
+from transformations.executor import execute_plan
+from transformations.registry import TRANSFORMATION_REGISTRY
+
+
+def _apply_serially(df, steps):
+    for step in steps:
+        df = TRANSFORMATION_REGISTRY[step["operation"]](df, **step.get("params", {}))
+    return df
+
+
+@pytest.fixture
+def dirty_df():
+    return pd.DataFrame({
+        'Item': ['Coffee', 'Cake', 'Coffee', None, 'Coffee'],
+        'Total Spent': ['4', '12', '4', 'ERROR', '4'],
+        'Payment Method': ['Credit Card', 'Cash', 'Credit Card', 'UNKNOWN', 'Credit Card'],
+        'Location': ['In-store', 'Takeaway', 'In-store', 'UNKNOWN', 'In-store'],
+        'Transaction Date': ['2023-09-08', '2023-05-16', '2023-09-08', 'ERROR', '2023-09-08'],
+    })
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_execute_plan_matches_serial(dirty_df, executor):
+    """Test that concurrent column chains give the same frame as a serial run"""
+    steps = [
+        {"operation": "standardize_column_names", "params": {}},
+        {"operation": "replace_non_values", "params": {"column": "total_spent"}},
+        {"operation": "replace_non_values", "params": {"column": "payment_method"}},
+        {"operation": "replace_non_values", "params": {"column": "location"}},
+        {"operation": "standardize_case", "params": {"column": "payment_method"}},
+        {"operation": "standardize_case", "params": {"column": "location"}},
+        {"operation": "auto_cast_type", "params": {"column": "total_spent"}},
+        {"operation": "auto_cast_datetime", "params": {"column": "transaction_date"}},
+        {"operation": "remove_duplicates", "params": {"keep": "first"}},
+        {"operation": "drop_null_rows", "params": {"column": "item"}},
+        {"operation": "fill_nulls", "params": {"column": "total_spent", "value": 0}},
+        {"operation": "unsupported_op", "params": {}},
+    ]
+
+    expected = _apply_serially(dirty_df.copy(), steps[:-1])
+    result = execute_plan(dirty_df.copy(), steps, workers=3, executor=executor)
+
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_execute_plan_missing_column_behaves_like_serial(dirty_df):
+    """Test that a step naming a missing column still runs against the whole frame"""
+    steps = [{"operation": "standardize_case", "params": {"column": "missing"}}]
+
+    result = execute_plan(dirty_df.copy(), steps, workers=2)
+
+    pd.testing.assert_frame_equal(result, dirty_df)
@@ -0,0 +1,119 @@
+"""
+Tests for typed Parquet, Feather and Arrow exports of cleaned data
+"""
+import io
+import json
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+from fastapi.testclient import TestClient
+
+import services.apply_service as apply_service
+from api.main import app
+from core.config import settings
+from services.apply_service import ApplyService
+from services.export_service import ensure_export
+from services.profiling_service import ProfilingService
+from services.suggestion_service import SuggestionService
+from services.upload_service import UploadService
+from storage.db.repository import JobRepository
+from storage.object_store import dtypes_path, export_path
+
+CSV = (
+    b"Transaction ID,Quantity,Total Spent,Transaction Date\n"
+    b"TXN_1,2,4.0,2023-09-08\n"
+    b"TXN_2,,12.0,2023-05-16\n"
+    b"TXN_3,4,ERROR,ERROR\n"
+    b"TXN_4,1,10.0,2023-04-27\n"
+    b"TXN_5,3,6.5,2023-06-11\n"
+    b"TXN_6,2,4.0,2023-09-08\n"
+)
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(settings, "APPLY_CHUNK_SIZE", 2)
+
+
+def _clean(db, chunked: bool) -> str:
+    job = UploadService(db).store(io.BytesIO(CSV), "export.csv")
+    JobRepository(db).update_status(job.id, "profiling")
+    ProfilingService(db).run(job.id, chain=False)
+    SuggestionService(db, None).run(job.id, chain=False)
+    ApplyService(db).run(job.id, chunked=chunked)
+    return job.id
+
+
+def _recorded_dtypes(job_id: str) -> dict:
+    return json.loads(dtypes_path(job_id).read_text())["dtypes"]
+
+
+def test_parquet_written_at_apply_time_keeps_dtypes(db):
+    """Test the in-memory apply writes a Parquet export with the cleaned dtypes"""
+    job_id = _clean(db, chunked=False)
+
+    assert export_path(job_id, "parquet").exists()
+    df = pd.read_parquet(export_path(job_id, "parquet"))
+    assert df.dtypes.astype(str).to_dict() == _recorded_dtypes(job_id)
+    assert pd.api.types.is_datetime64_any_dtype(df["transaction_date"])
+
+
+def test_exports_built_lazily_after_chunked_apply(db):
+    """Test that Parquet is streamed from the CSV and IPC formats from Parquet"""
+    job_id = _clean(db, chunked=True)
+    assert not export_path(job_id, "parquet").exists()
+
+    parquet = pd.read_parquet(ensure_export(job_id, "parquet"))
+    feather = pd.read_feather(ensure_export(job_id, "feather"))
+    with pa.ipc.open_stream(ensure_export(job_id, "arrow")) as reader:
+        stream = reader.read_pandas()
+
+    assert parquet.dtypes.astype(str).to_dict() == _recorded_dtypes(job_id)
+    pd.testing.assert_frame_equal(feather, parquet)
+    pd.testing.assert_frame_equal(stream, parquet)
+
+
+def test_chunked_apply_records_dtypes_of_all_chunks(db, monkeypatch):
+    """Test dtypes.json holds the dtype every chunk fits, not the last chunk's"""
+    job = UploadService(db).store(io.BytesIO(CSV), "export.csv")
+    JobRepository(db).update_status(job.id, "profiling")
+    ProfilingService(db).run(job.id, chain=False)
+    SuggestionService(db, None).run(job.id, chain=False)
+
+    def chunks(*args, **kwargs):
+        # Read without a schema, only the first chunk has a missing quantity
+        yield pd.DataFrame({"Quantity": [2.0, None]}, index=[0, 1])
+        yield pd.DataFrame({"Quantity": [4, 1]}, index=[2, 3])
+
+    monkeypatch.setattr(apply_service, "iter_chunks", chunks)
+    ApplyService(db).run(job.id, chunked=True)
+
+    assert _recorded_dtypes(job.id)["quantity"] == "float64"
+
+
+def test_reapply_replaces_stale_exports(db):
+    """Test that a new apply run drops exports of the previous one"""
+    job_id = _clean(db, chunked=False)
+    ensure_export(job_id, "feather")
+
+    JobRepository(db).get(job_id).status = "applying"
+    db.commit()
+    ApplyService(db).run(job_id, chunked=True)
+
+    assert not export_path(job_id, "feather").exists()
+
+
+def test_download_format_parameter(db):
+    """Test media types of the download formats"""
+    job_id = _clean(db, chunked=False)
+    client = TestClient(app)
+
+    csv = client.get(f"/jobs/{job_id}/download")
+    parquet = client.get(f"/jobs/{job_id}/download", params={"format": "parquet"})
+
+    assert csv.headers["content-type"].startswith("text/csv")
+    assert parquet.headers["content-type"] == "application/vnd.apache.parquet"
+    assert len(pd.read_parquet(io.BytesIO(parquet.content))) == 6
+    assert client.get(f"/jobs/{job_id}/download", params={"format": "xlsx"}).status_code == 422
+    assert client.get("/jobs/missing/download", params={"format": "arrow"}).status_code == 404
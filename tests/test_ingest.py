@@ -0,0 +1,85 @@
+"""
+Tests for the ingest stage that parses an upload once into a columnar artifact
+"""
+import warnings
+
+import pandas as pd
+
+from services.ingest_service import ingest, iter_chunks, load_dataframe
+
+
+def test_ingest_writes_artifact(data_dir):
+    """Test that ingest parses the CSV and writes a Parquet artifact"""
+    (data_dir / "job1.csv").write_text("name,age\nAlice,25\nBob,\n")
+
+    df = ingest("job1")
+
+    assert list(df.columns) == ["name", "age"]
+    assert (data_dir / "artifacts" / "job1.parquet").exists()
+
+
+def test_load_dataframe_uses_artifact(data_dir):
+    """Test that later phases load the artifact instead of re-parsing the CSV"""
+    (data_dir / "job1.csv").write_text("name,age\nAlice,25\nBob,\n")
+    ingest("job1")
+    (data_dir / "job1.csv").unlink()
+
+    df = load_dataframe("job1")
+
+    assert len(df) == 2
+    assert df["age"].dtype == "float64"
+    assert pd.isna(df.loc[1, "age"])
+
+
+def test_load_dataframe_ingests_when_artifact_missing(data_dir):
+    """Test that load_dataframe ingests the upload if no artifact exists yet"""
+    (data_dir / "job1.csv").write_text("name,age\nAlice,25\n")
+
+    df = load_dataframe("job1")
+
+    assert len(df) == 1
+    assert (data_dir / "artifacts" / "job1.parquet").exists()
+
+
+def test_chunks_read_with_schema_keep_dtypes(data_dir):
+    """Test chunks of a column that turns textual late get one dtype and no warning"""
+    rows = [f"{i},{i}\n" for i in range(10)] + ["10,X\n"]
+    (data_dir / "job1.csv").write_text("id,code\n" + "".join(rows))
+    schema = {"columns": ["id", "code"], "dtype": {"id": "int64", "code": "object"}}
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        chunks = list(iter_chunks("job1", 4, schema=schema, columns=["code"]))
+
+    assert [list(chunk.columns) for chunk in chunks] == [["code"]] * 3
+    assert {str(chunk["code"].dtype) for chunk in chunks} == {"object"}
+    assert chunks[0].loc[0, "code"] == "0"
+    assert list(chunks[-1].index) == [8, 9, 10]
+
+
+def test_ingest_falls_back_when_schema_does_not_fit(data_dir):
+    """Test a value the schema's dtype cannot hold makes ingest infer instead of fail"""
+    (data_dir / "job1.csv").write_text("name,age\nAlice,25\nBob,unknown\n")
+
+    df = ingest("job1", schema={"columns": ["name", "age"], "dtype": {"age": "int64"}})
+
+    assert df["age"].tolist() == ["25", "unknown"]
+
+
+def test_chunks_fall_back_when_schema_does_not_fit(data_dir):
+    """Test a late value the schema cannot hold widens its column to object for the remaining chunks"""
+    rows = [f'{i},"line\n{i}"\n' for i in range(10)]
+    rows[7] = 'unknown,"x"\n'
+    (data_dir / "job1.csv").write_text("age,note\n" + "".join(rows))
+    schema = {"columns": ["age", "note"], "dtype": {"age": "int64", "note": "object"}}
+
+    chunks = list(iter_chunks("job1", 3, schema=schema))
+    df = pd.concat(chunks)
+
+    assert list(df.index) == list(range(10))
+    assert [str(value) for value in df["age"]] == [
+        "0", "1", "2", "3", "4", "5", "6", "unknown", "8", "9"
+    ]
+    assert df.loc[9, "note"] == "line\n9"
+    assert [str(chunk["age"].dtype) for chunk in chunks] == ["int64", "int64", "object", "object"]
+    assert df.loc[9, "age"] == "9"
@@ -0,0 +1,97 @@
+"""
+Tests for the paginated job listing and the bulk status endpoint
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+from api.deps import get_db
+from api.main import app
+from storage.db import create_schema, make_engine
+from storage.db.models import JobModel
+
+START = datetime(2024, 1, 1)
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = make_engine(f"sqlite:///{tmp_path}/jobs.db")
+    create_schema(bind=engine)
+    db = sessionmaker(bind=engine)()
+    # Two jobs per timestamp, so pages have to break ties by id
+    for i in range(12):
+        db.add(JobModel(
+            id=f"job-{i:02d}",
+            original_filename=f"{i}.csv",
+            status="done" if i % 3 == 0 else "pending",
+            created_at=START + timedelta(minutes=i // 2),
+        ))
+    db.commit()
+    db.close()
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def client(engine):
+    session_factory = sessionmaker(bind=engine)
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def test_keyset_pages_cover_every_job_once(client):
+    """Test that following next_cursor returns each job exactly once, newest first"""
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 5, **({"cursor": cursor} if cursor else {})}
+        page = client.get("/jobs", params=params).json()
+        seen += [job["id"] for job in page["jobs"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == [f"job-{i:02d}" for i in reversed(range(12))]
+
+
+def test_list_filters_by_status_and_creation_time(client):
+    """Test the status and created_at filters"""
+    page = client.get("/jobs", params={
+        "status": "done",
+        "created_after": (START + timedelta(minutes=1)).isoformat(),
+    }).json()
+
+    assert [job["id"] for job in page["jobs"]] == ["job-09", "job-06", "job-03"]
+    assert client.get("/jobs", params={"cursor": "not-a-cursor"}).status_code == 400
+
+
+def test_bulk_status_answers_many_jobs(client):
+    """Test repeated and comma-separated ids, and unknown ids"""
+    response = client.get("/jobs/status?ids=job-00,job-01&ids=job-02&ids=missing").json()
+
+    assert {job_id: job["status"] for job_id, job in response["jobs"].items()} == {
+        "job-00": "done", "job-01": "pending", "job-02": "pending"
+    }
+    assert response["missing"] == ["missing"]
+
+
+def test_status_filter_uses_index(engine):
+    """Test that a filtered page is an index range scan"""
+    with engine.connect() as conn:
+        plan = conn.execute(text(
+            "EXPLAIN QUERY PLAN SELECT * FROM jobs WHERE status = 'done' "
+            "ORDER BY created_at DESC, id DESC LIMIT 50"
+        )).all()
+
+    assert "ix_jobs_status_created_at" in " ".join(row[-1] for row in plan)
@@ -0,0 +1,81 @@
+"""
+Tests for atomic job status transitions and the status history
+"""
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from core.config import settings
+from storage.db import create_schema, make_engine
+from storage.db.models import JobModel, JobStatusEvent
+from storage.db.repository import JobRepository
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = make_engine(f"sqlite:///{tmp_path}/jobs.db")
+    create_schema(bind=engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def job_id(session_factory):
+    db = session_factory()
+    job_id = JobRepository(db).create(JobModel(original_filename="a.csv")).id
+    db.close()
+    return job_id
+
+
+def test_terminal_status_stamps_completed_at(session_factory, job_id):
+    """Test completed_at is set on failure and cleared by a retry"""
+    db = session_factory()
+    repo = JobRepository(db)
+
+    repo.update_status(job_id, "profiling")
+    assert repo.get(job_id).completed_at is None
+    repo.update_status(job_id, "failed")
+    assert repo.get(job_id).completed_at is not None
+    repo.update_status(job_id, "profiling")
+    assert repo.get(job_id).completed_at is None
+
+    assert [event.status for event in repo.get_status_history(job_id)] == [
+        "pending", "profiling", "failed", "profiling"
+    ]
+
+
+def test_concurrent_transition_succeeds_once(session_factory, job_id):
+    """Test that two workers holding the same job cannot both move it"""
+    first, second = session_factory(), session_factory()
+    JobRepository(first).update_status(job_id, "profiling")
+    # Both sessions have loaded the job in the same status
+    assert JobRepository(first).get(job_id).status == "profiling"
+    assert JobRepository(second).get(job_id).status == "profiling"
+
+    JobRepository(first).update_status(job_id, "suggesting")
+    with pytest.raises(ValueError, match="Invalid transition suggesting → suggesting"):
+        JobRepository(second).update_status(job_id, "suggesting")
+
+    assert JobRepository(second).get(job_id).status == "suggesting"
+
+
+def test_invalid_transitions_raise(session_factory, job_id):
+    """Test unknown jobs and disallowed transitions leave nothing behind"""
+    db = session_factory()
+    repo = JobRepository(db)
+
+    with pytest.raises(ValueError, match="Job not found"):
+        repo.update_status("missing", "profiling")
+    with pytest.raises(ValueError, match="Invalid transition pending → done"):
+        repo.update_status(job_id, "done")
+    assert repo.get(job_id).status == "pending"
+    assert len(repo.get_status_history(job_id)) == 1
+
+
+def test_history_can_be_disabled(session_factory, job_id, monkeypatch):
+    """Test that no events are written while JOB_STATUS_HISTORY is off"""
+    monkeypatch.setattr(settings, "JOB_STATUS_HISTORY", False)
+    db = session_factory()
+
+    JobRepository(db).update_status(job_id, "profiling")
+
+    assert db.query(JobStatusEvent).count() == 1
@@ -0,0 +1,134 @@
+"""
+Tests for the plan optimizer that fuses, reorders and prunes cleaning steps
+"""
+import pandas as pd
+import pytest
+
+from transformations.planner import input_columns, optimize_plan
+from transformations.registry import TRANSFORMATION_REGISTRY
+
+
+def _apply_serially(df, steps):
+    for step in steps:
+        operation = TRANSFORMATION_REGISTRY.get(step["operation"])
+        if operation:
+            df = operation(df, **step.get("params", {}))
+    return df
+
+
+@pytest.fixture
+def dirty_df():
+    return pd.DataFrame({
+        'Item': ['Coffee', 'cake', 'Coffee', None, 'Coffee', 'Cake', 'Tea', 'Tea'],
+        'Total Spent': ['4', '12', '4', 'ERROR', '4', '12', None, '3'],
+        'Quantity': [1, 2, 1, 3, 1, 2, 4, 4],
+        'Payment Method': ['Credit Card', 'Cash', 'Credit Card', 'UNKNOWN',
+                           'Credit Card', 'cash', 'Cash', 'Cash'],
+        'Transaction Date': ['2023-09-08', '2023-05-16', '2023-09-08', 'ERROR',
+                             '2023-09-08', '2023-05-16', '2023-01-01', '2023-01-01'],
+    })
+
+
+@pytest.mark.parametrize("keep", ["first", "last", False])
+def test_optimized_plan_matches_original(dirty_df, keep):
+    """Test that the optimized plan produces the same frame as the suggested plan"""
+    steps = [
+        {"operation": "standardize_column_names", "params": {}},
+        {"operation": "replace_non_values", "params": {"column": "total_spent"}},
+        {"operation": "replace_non_values", "params": {"column": "payment_method"}},
+        {"operation": "standardize_case", "params": {"column": "payment_method"}},
+        {"operation": "standardize_case", "params": {"column": "item"}},
+        {"operation": "auto_cast_type", "params": {"column": "total_spent"}},
+        {"operation": "auto_cast_type", "params": {"column": "quantity"}},
+        {"operation": "auto_cast_datetime", "params": {"column": "transaction_date"}},
+        {"operation": "standardize_case", "params": {"column": "payment_method"}},
+        {"operation": "drop_null_rows", "params": {"column": "item"}},
+        {"operation": "drop_null_rows", "params": {"column": "total_spent"}},
+        {"operation": "remove_duplicates", "params": {"keep": keep}},
+        {"operation": "unsupported_op", "params": {}},
+    ]
+    column_types = {col: str(dtype) for col, dtype in dirty_df.dtypes.items()}
+
+    plan, notes = optimize_plan(steps, column_types)
+
+    expected = _apply_serially(dirty_df.copy(), steps)
+    result = _apply_serially(dirty_df.copy(), plan)
+    pd.testing.assert_frame_equal(result, expected)
+    assert len(plan) < len(steps)
+    assert notes
+
+
+def test_adjacent_null_row_drops_are_fused():
+    """Test that consecutive drop_null_rows steps become a single dropna"""
+    steps = [
+        {"operation": "drop_null_rows", "params": {"column": "a"}},
+        {"operation": "standardize_case", "params": {"column": "c"}},
+        {"operation": "drop_null_rows", "params": {"column": "b"}},
+    ]
+
+    plan, _ = optimize_plan(steps)
+
+    assert plan[0] == {"operation": "drop_null_rows", "params": {"columns": ["a", "b"]}}
+    assert plan[1]["operation"] == "standardize_case"
+
+
+def test_null_row_drop_stays_after_steps_on_its_column():
+    """Test that drop_null_rows is not moved ahead of a step that can create nulls in its column"""
+    steps = [
+        {"operation": "replace_non_values", "params": {"column": "a"}},
+        {"operation": "auto_cast_type", "params": {"column": "b"}},
+        {"operation": "drop_null_rows", "params": {"column": "a"}},
+    ]
+
+    plan, _ = optimize_plan(steps)
+
+    # auto_cast_type decides from the whole column, so row filters cannot cross it
+    assert plan == steps
+
+
+def test_keep_false_dedupe_is_not_hoisted():
+    """Test that remove_duplicates(keep=False) only runs where it was suggested"""
+    steps = [
+        {"operation": "standardize_case", "params": {"column": "a"}},
+        {"operation": "remove_duplicates", "params": {"keep": False}},
+    ]
+
+    plan, _ = optimize_plan(steps)
+
+    assert plan == steps
+
+
+def test_noops_pruned_from_profiled_types():
+    """Test that object-only steps on typed or missing columns are pruned"""
+    steps = [
+        {"operation": "standardize_column_names", "params": {}},
+        {"operation": "auto_cast_type", "params": {"column": "quantity"}},
+        {"operation": "standardize_case", "params": {"column": "missing"}},
+        {"operation": "auto_cast_type", "params": {"column": "total_spent"}},
+    ]
+
+    plan, notes = optimize_plan(steps, {"Quantity": "int64", "Total Spent": "object"})
+
+    assert [s["params"].get("column") for s in plan] == [None, "total_spent"]
+    assert len(notes) == 2
+
+
+def test_input_columns_skip_dropped_columns(dirty_df):
+    """Test columns dropped before any step uses them need not be read"""
+    columns = list(dirty_df.columns)
+    steps = [
+        {"operation": "drop_column", "params": {"column": "Item"}},
+        {"operation": "standardize_case", "params": {"column": "Payment Method"}},
+        {"operation": "drop_column", "params": {"column": "Payment Method"}},
+        {"operation": "drop_column", "params": {"column": "Quantity"}},
+        {"operation": "remove_duplicates", "params": {}},
+        {"operation": "drop_column", "params": {"column": "Transaction Date"}},
+    ]
+
+    needed = input_columns(steps, columns)
+
+    assert needed == ["Total Spent", "Payment Method", "Transaction Date"]
+    pd.testing.assert_frame_equal(
+        _apply_serially(dirty_df[needed], steps), _apply_serially(dirty_df, steps)
+    )
+    assert input_columns(steps[1:2], columns) is None
@@ -0,0 +1,102 @@
+"""
+Tests for single-pass column profiling and suggestions taken from the profile
+"""
+import json
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from services.profiling_service import build_read_schema, profile_column, profile_columns
+from services.suggestion_service import SuggestionService, _analyze_column, _analyze_profile
+
+
+@pytest.fixture
+def dirty_df():
+    return pd.DataFrame({
+        'Transaction ID': ['TXN_1', 'TXN_2', 'TXN_3', 'TXN_4', 'TXN_5', 'TXN_1'],
+        'Item': ['Coffee', 'Cake', 'Coffee', None, 'Coffee', 'Coffee'],
+        'Quantity': [2, 4, 4, 2, None, 2],
+        'Total Spent': ['4.0', '12.0', 'ERROR', '10.0', '4.0', '4.0'],
+        'Payment Method': ['Credit Card', 'Cash', 'Credit Card', 'UNKNOWN', 'Cash', 'Credit Card'],
+        'Transaction Date': ['08/09/2023', '16/05/2023', 'ERROR', '27/04/2023', '11/06/2023',
+                             '08/09/2023'],
+    })
+
+
+def test_profile_column_string_stats(dirty_df):
+    """Test distinct, top-k, parse-rate and length statistics of a string column"""
+    stats = profile_column(dirty_df['Total Spent'])
+
+    assert stats['null_count'] == 0
+    assert stats['distinct_count'] == 4
+    assert stats['top_values'][0] == ['4.0', 3]
+    assert stats['numeric_parse_rate'] == pytest.approx(5 / 6)
+    assert stats['non_value_count'] == 1
+    assert stats['string_length'] == {'min': 3, 'max': 5, 'mean': pytest.approx(22 / 6)}
+    assert stats['min'] == '10.0' and stats['max'] == 'ERROR'
+    assert stats['memory_bytes'] > 0
+
+
+def test_profile_column_numeric_and_datetime(dirty_df):
+    """Test min/max of a numeric column and the datetime format of a date column"""
+    quantity = profile_column(dirty_df['Quantity'])
+    assert (quantity['min'], quantity['max'], quantity['null_count']) == (2.0, 4.0, 1)
+    assert 'numeric_parse_rate' not in quantity
+
+    dates = profile_column(dirty_df['Transaction Date'])
+    assert dates['datetime_format'] == '%d/%m/%Y'
+    assert dates['datetime_parse_rate'] == pytest.approx(5 / 6)
+
+
+def test_profile_is_json_serializable(dirty_df):
+    """Test that the profile can be stored in a JSON column"""
+    json.dumps(profile_columns(dirty_df))
+
+
+def test_profile_decisions_match_full_scan(dirty_df):
+    """Test that decisions from the stored profile match analyzing every row"""
+    for col in dirty_df.columns:
+        if dirty_df[col].dtype != 'object':
+            continue
+        expected = _analyze_column(col, dirty_df[col])
+        decided = _analyze_profile(col, profile_column(dirty_df[col]))
+        assert decided['operations'] == expected['operations'], col
+        assert decided['datetime_format'] == expected['datetime_format'], col
+
+
+def test_suggestions_from_profile_do_not_load_data(dirty_df, monkeypatch):
+    """Test that the suggestion engine works from the profile alone"""
+    profiling = SimpleNamespace(
+        column_types=dirty_df.dtypes.astype(str).to_dict(),
+        null_counts=dirty_df.isnull().sum().to_dict(),
+        column_stats=profile_columns(dirty_df),
+        duplicate_row_count=int(dirty_df.duplicated().sum()),
+    )
+    legacy = SimpleNamespace(
+        column_types=profiling.column_types,
+        null_counts=profiling.null_counts,
+        column_stats=None,
+        duplicate_row_count=None,
+        read_schema=None,
+    )
+    service = SuggestionService.__new__(SuggestionService)
+
+    monkeypatch.setattr("services.suggestion_service.load_dataframe", lambda job_id, *read: dirty_df.copy())
+    expected = service._generate_simple_suggestions("job", legacy)
+
+    def fail(job_id):
+        raise AssertionError("raw data loaded")
+
+    monkeypatch.setattr("services.suggestion_service.load_dataframe", fail)
+    assert service._generate_simple_suggestions("job", profiling) == expected
+
+
+def test_read_schema_from_profile(dirty_df):
+    """Test the read schema pins dtypes in file order"""
+    schema = build_read_schema(dirty_df.dtypes.astype(str).to_dict(), profile_columns(dirty_df))
+
+    assert schema['columns'] == list(dirty_df.columns)
+    assert schema['dtype']['Quantity'] == 'float64'
+    assert schema['dtype']['Total Spent'] == 'object'
+    assert set(schema) == {'columns', 'dtype'}
@@ -0,0 +1,135 @@
+"""
+Tests for resumable uploads sent as numbered parts
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import services.upload_session_service as upload_session_service
+from core.config import settings
+from services.upload_session_service import UploadSessionService
+from storage.object_store import raw_path, upload_session_dir
+
+PART_SIZE = 64 * 1024
+CSV = b"Name,Score\n" + b"".join(b"name_%06d,%d\n" % (i, i % 100) for i in range(15000))
+
+
+def _parts(data: bytes) -> list[bytes]:
+    return [data[i:i + PART_SIZE] for i in range(0, len(data), PART_SIZE)]
+
+
+def _create(client, data: bytes = CSV) -> dict:
+    response = client.post("/uploads", json={
+        "filename": "scores.csv", "size": len(data), "part_size": PART_SIZE,
+    })
+    assert response.status_code == 201
+    return response.json()
+
+
+def test_parallel_parts_assemble_in_order(client):
+    """Test parts sent concurrently and out of order become the job's file"""
+    session = _create(client)
+    parts = _parts(CSV)
+    assert session["part_count"] == len(parts) > 2
+
+    def put(number):
+        return client.put(
+            f"/uploads/{session['upload_id']}/parts/{number}", content=parts[number - 1]
+        ).status_code
+
+    with ThreadPoolExecutor(4) as pool:
+        assert set(pool.map(put, reversed(range(1, len(parts) + 1)))) == {200}
+
+    job = client.post(f"/uploads/{session['upload_id']}/complete").json()
+    assert job["status"] == "pending"
+    assert raw_path(job["job_id"]).read_bytes() == CSV
+    assert not upload_session_dir(session["upload_id"]).exists()
+
+
+def test_resume_after_interrupted_part(client):
+    """Test that a truncated part is discarded and reported missing until resent"""
+    session = _create(client)
+    upload_id = session["upload_id"]
+    parts = _parts(CSV)
+    for number, part in enumerate(parts[:-1], start=1):
+        client.put(f"/uploads/{upload_id}/parts/{number}", content=part)
+
+    # The connection dropped halfway through the second part's retry
+    truncated = client.put(f"/uploads/{upload_id}/parts/2", content=parts[1][:1000])
+    assert truncated.status_code == 400
+
+    status = client.get(f"/uploads/{upload_id}").json()
+    assert status["missing_parts"] == [len(parts)]
+    assert status["received_bytes"] == len(CSV) - len(parts[-1])
+    incomplete = client.post(f"/uploads/{upload_id}/complete")
+    assert incomplete.status_code == 400
+    assert "1 parts missing" in incomplete.json()["detail"]
+
+    client.put(f"/uploads/{upload_id}/parts/{len(parts)}", content=parts[-1])
+    job = client.post(f"/uploads/{upload_id}/complete").json()
+    assert raw_path(job["job_id"]).read_bytes() == CSV
+
+
+def test_parts_deleted_while_assembling(client, tmp_path, monkeypatch):
+    """Test each part is deleted once copied, so the upload is not on disk twice"""
+    session = _create(client)
+    upload_id = session["upload_id"]
+    for number, part in enumerate(_parts(CSV), start=1):
+        client.put(f"/uploads/{upload_id}/parts/{number}", content=part)
+
+    left = []
+    write = upload_session_service.UploadWriter.write
+
+    def record(self, chunk):
+        left.append(len(list(tmp_path.glob("uploads/*/*.part"))))
+        write(self, chunk)
+
+    monkeypatch.setattr(upload_session_service.UploadWriter, "write", record)
+    assert client.post(f"/uploads/{upload_id}/complete").status_code == 200
+    assert left[0] == session["part_count"]
+    assert left[-1] == 1
+
+
+def test_failed_completion_discards_session(client, monkeypatch):
+    """Test a completion that fails after consuming parts does not leave a broken session"""
+    session = _create(client)
+    upload_id = session["upload_id"]
+    for number, part in enumerate(_parts(CSV), start=1):
+        client.put(f"/uploads/{upload_id}/parts/{number}", content=part)
+
+    def fail(self, upload, filename, sheet=None):
+        raise ValueError("cannot read upload")
+
+    monkeypatch.setattr(upload_session_service.UploadService, "store_upload", fail)
+    assert client.post(f"/uploads/{upload_id}/complete").status_code == 400
+    assert not upload_session_dir(upload_id).exists()
+    assert client.get(f"/uploads/{upload_id}").status_code == 404
+
+
+def test_part_and_session_limits(client, monkeypatch):
+    """Test oversized parts, unknown part numbers and sessions over the upload limit"""
+    upload_id = _create(client)["upload_id"]
+
+    assert client.put(f"/uploads/{upload_id}/parts/1", content=b"x" * (PART_SIZE + 1)).status_code == 413
+    assert client.put(f"/uploads/{upload_id}/parts/999", content=b"x").status_code == 400
+    assert client.put("/uploads/not-a-session/parts/1", content=b"x").status_code == 404
+    # Session ids are uuids, never paths into DATA_DIR
+    assert UploadSessionService(None).status("../cleaned") is None
+
+    monkeypatch.setattr(settings, "MAX_UPLOAD_BYTES", 1000)
+    assert client.post("/uploads", json={"filename": "a.csv", "size": 1001}).status_code == 413
+
+
+def test_stale_sessions_collected(client):
+    """Test that creating a session deletes ones idle past the TTL"""
+    stale = _create(client)["upload_id"]
+    client.put(f"/uploads/{stale}/parts/1", content=_parts(CSV)[0])
+    idle_since = time.time() - settings.UPLOAD_SESSION_TTL_SECONDS - 60
+    os.utime(upload_session_dir(stale) / "session.json", (idle_since, idle_since))
+    active = _create(client)["upload_id"]
+
+    assert not upload_session_dir(stale).exists()
+    assert client.get(f"/uploads/{stale}").status_code == 404
+    assert client.get(f"/uploads/{active}").status_code == 200
+    assert client.delete(f"/uploads/{active}").status_code == 204
+    assert client.get(f"/uploads/{active}").status_code == 404
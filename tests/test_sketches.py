@@ -0,0 +1,153 @@
+"""
+Tests for mergeable profiling sketches and sketch-mode profiling
+"""
+import io
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import services.profiling_service as profiling_service
+from core.config import settings
+from core.sketches import ColumnSketch, CountMinSketch, HyperLogLog, TDigest, _hash_keys
+from services.profiling_service import ProfilingService, profile_columns, sketch_columns
+from services.upload_service import UploadService
+from storage.db.repository import JobRepository, ProfilingRepository
+
+
+def _chunks(series, size):
+    return [series.iloc[i:i + size] for i in range(0, len(series), size)]
+
+
+def test_hyperloglog_estimate_within_error_bound():
+    """Test the distinct estimate stays within 3 standard errors"""
+    hll = HyperLogLog()
+    hll.add_hashes(_hash_keys(pd.Index([f"TXN_{i}" for i in range(50_000)])))
+
+    standard_error = 1.04 / np.sqrt(2 ** hll.precision)
+    assert abs(hll.estimate() - 50_000) / 50_000 < 3 * standard_error
+
+
+def test_hyperloglog_small_cardinality_is_exact():
+    """Test linear counting gives exact answers for a handful of values"""
+    hll = HyperLogLog()
+    hll.add_hashes(_hash_keys(pd.Index(["a", "b", "c", "a"])))
+
+    assert hll.estimate() == 3
+
+
+def test_merged_sketches_equal_single_scan():
+    """Test that merging chunk sketches gives the registers and table of one scan"""
+    series = pd.Series(np.random.default_rng(0).integers(0, 5_000, 20_000))
+
+    single = ColumnSketch()
+    single.add(series)
+    merged = ColumnSketch()
+    for chunk in _chunks(series, 3_000):
+        part = ColumnSketch()
+        part.add(chunk)
+        merged.merge(part)
+
+    np.testing.assert_array_equal(merged.distinct.registers, single.distinct.registers)
+    np.testing.assert_array_equal(merged.frequent.table, single.frequent.table)
+    assert merged.frequent.total == single.frequent.total == 20_000
+
+
+def test_count_min_never_undercounts_and_finds_heavy_hitters():
+    """Test frequency estimates are upper bounds within e / width of the total"""
+    rng = np.random.default_rng(1)
+    series = pd.Series(np.concatenate([
+        np.repeat(["cash", "card"], [5_000, 3_000]),
+        [f"user_{i}" for i in rng.integers(0, 20_000, 12_000)],
+    ]))
+    sketch = ColumnSketch()
+    for chunk in _chunks(series.sample(frac=1, random_state=0), 2_500):
+        sketch.add(chunk)
+
+    exact = series.value_counts()
+    heavy = dict(sketch.frequent.heavy_hitters(2))
+    assert set(heavy) == {"cash", "card"}
+    for key, estimate in heavy.items():
+        assert exact[key] <= estimate <= exact[key] + np.e / sketch.frequent.width * len(series)
+
+
+def test_tdigest_quantiles_and_merge():
+    """Test merged t-digest quantiles are close to the exact quantiles"""
+    values = np.random.default_rng(2).lognormal(size=100_000)
+    digest = TDigest()
+    for chunk in np.array_split(values, 7):
+        part = TDigest()
+        part.add(chunk)
+        digest.merge(part)
+
+    assert len(digest.means) <= digest.compression
+    assert (digest.min, digest.max) == (values.min(), values.max())
+    for q in (0.01, 0.25, 0.5, 0.75, 0.99):
+        rank = (values < digest.quantile(q)).mean()
+        assert abs(rank - q) < 0.005
+
+
+def test_column_sketch_round_trips_through_json():
+    """Test a stored sketch can be loaded and merged further"""
+    sketch = ColumnSketch()
+    sketch.add(pd.Series([1.5, 2.5, 2.5, None]))
+
+    restored = ColumnSketch.from_dict(json.loads(json.dumps(sketch.to_dict())))
+    restored.merge(sketch)
+
+    assert restored.summary()["approx_distinct_count"] == 2
+    assert restored.summary()["heavy_hitters"][0] == ["2.5", 4]
+    assert isinstance(CountMinSketch.from_dict(sketch.frequent.to_dict()), CountMinSketch)
+
+
+def test_sketch_columns_matches_exact_profile():
+    """Test chunked sketch-mode stats agree with the exact profile"""
+    df = pd.DataFrame({
+        'Item': ['Coffee', 'Cake', None, 'ERROR', 'Coffee', 'cake', 'Tea'] * 30,
+        'Total Spent': ['4.0', '12.0', 'ERROR', '10.0', '4.0', None, '3'] * 30,
+        'Quantity': [2, 4, 4, None, 2, 1, 3] * 30,
+    })
+
+    exact = profile_columns(df)
+    approximate, sketches, duplicates = sketch_columns(
+        df.iloc[start:start + 40] for start in range(0, len(df), 40)
+    )
+
+    for col in df.columns:
+        assert approximate[col]["approximate"] is True
+        assert approximate[col]["distinct_count"] == exact[col]["distinct_count"]
+        for key in exact[col]:
+            if key in ("distinct_count", "top_values"):
+                continue
+            assert approximate[col][key] == pytest.approx(exact[col][key]), (col, key)
+    assert "quantiles" in sketches["Quantity"]["summary"]
+    assert duplicates == df.duplicated().sum()
+
+
+def test_large_upload_profiled_from_chunks(db, monkeypatch):
+    """Test sketch-mode profiling streams the upload and agrees with the full parse"""
+    # Missing values and text only show up in later chunks
+    lines = [f"{i % 50},{i % 7}.5,item {i % 90}" for i in range(900)]
+    lines[700] = ",1.5,item 1"
+    lines[850] = "3,n/a,item 3"
+    data = ("id,price,name\n" + "\n".join(lines) + "\n").encode()
+    expected = pd.read_csv(io.BytesIO(data))
+
+    def fail(*args):
+        raise AssertionError("upload was loaded whole")
+
+    monkeypatch.setattr(profiling_service, "ingest", fail)
+    monkeypatch.setattr(settings, "PROFILING_SKETCH_ROWS", 500)
+    monkeypatch.setattr(settings, "PROFILING_CHUNK_SIZE", 200)
+    job = UploadService(db).store(io.BytesIO(data), "items.csv")
+    JobRepository(db).update_status(job.id, "profiling")
+    ProfilingService(db).run(job.id, chain=False)
+
+    profile = ProfilingRepository(db).get_by_job_id(job.id)
+    assert profile.row_count == len(expected)
+    assert profile.column_types == expected.dtypes.astype(str).to_dict()
+    assert profile.null_counts == expected.isnull().sum().to_dict()
+    assert profile.duplicate_row_count == expected.duplicated().sum()
+    assert profile.column_stats["id"]["approximate"] is True
+    assert profile.read_schema["dtype"]["id"] == "float64"
@@ -0,0 +1,141 @@
+"""
+Tests for chunk-by-chunk application of cleaning plans
+"""
+import pandas as pd
+import pytest
+
+from transformations.registry import TRANSFORMATION_REGISTRY
+from transformations.streaming import ChunkedPipeline
+
+
+def _apply_in_memory(df, steps):
+    for step in steps:
+        df = TRANSFORMATION_REGISTRY[step["operation"]](df, **step.get("params", {}))
+    return df
+
+
+def _apply_chunked(df, steps, chunk_size):
+    chunks = [df.iloc[i:i + chunk_size].copy() for i in range(0, len(df), chunk_size)]
+    pipeline = ChunkedPipeline(steps)
+    while pipeline.needs_planning:
+        for chunk in chunks:
+            pipeline.observe(chunk.copy())
+        pipeline.finalize()
+    return pd.concat([pipeline.transform(chunk) for chunk in chunks])
+
+
+@pytest.fixture
+def dirty_df():
+    return pd.DataFrame({
+        'Item': ['Coffee', 'Cake', 'Coffee', 'Salad', 'Coffee', 'Cake', 'Tea', None],
+        'Total Spent': ['4', '12', '4', 'ERROR', '4', '12', '3', '5'],
+        'Price': ['2.0', '3.0', '2.0', '5.5', '2.0', '3.0', '1.0', '2.5'],
+        'Payment Method': ['Credit Card', 'Cash', 'Credit Card', 'UNKNOWN',
+                           'Credit Card', 'Cash', 'Cash', 'Cash'],
+        'Transaction Date': ['2023-09-08', '2023-05-16', '2023-09-08', '2023-04-27',
+                             '2023-09-08', '2023-05-16', '2023-01-01', 'ERROR'],
+    })
+
+
+def test_chunked_matches_in_memory(dirty_df):
+    """Test that chunked execution produces the same frame as the in-memory path"""
+    steps = [
+        {"operation": "standardize_column_names", "params": {}},
+        {"operation": "replace_non_values", "params": {"column": "total_spent"}},
+        {"operation": "replace_non_values", "params": {"column": "payment_method"}},
+        {"operation": "standardize_case", "params": {"column": "payment_method"}},
+        {"operation": "auto_cast_type", "params": {"column": "total_spent"}},
+        {"operation": "auto_cast_type", "params": {"column": "price"}},
+        {"operation": "auto_cast_datetime", "params": {"column": "transaction_date"}},
+        {"operation": "remove_duplicates", "params": {"keep": "first"}},
+        {"operation": "drop_null_rows", "params": {"column": "item"}},
+    ]
+
+    expected = _apply_in_memory(dirty_df.copy(), steps)
+    result = _apply_chunked(dirty_df, steps, chunk_size=3)
+
+    pd.testing.assert_frame_equal(result, expected)
+    assert result['total_spent'].dtype == 'Int64'
+    assert result['price'].dtype == 'float64'
+
+    # Duplicates that only appear once a deferred cast is applied
+    df = pd.DataFrame({'a': ['4', '5', '4.0', '6'], 'b': ['x', 'y', 'x', 'z']})
+    steps = [
+        {"operation": "auto_cast_type", "params": {"column": "a"}},
+        {"operation": "remove_duplicates", "params": {}},
+    ]
+    expected = _apply_in_memory(df.copy(), steps)
+    assert len(expected) == 3
+    pd.testing.assert_frame_equal(
+        _apply_chunked(df, steps, chunk_size=2), _apply_in_memory(df.copy(), steps)
+    )
+
+
+@pytest.mark.parametrize("steps", [
+    [{"operation": "auto_cast_type", "params": {"column": "d"}},
+     {"operation": "auto_cast_datetime", "params": {"column": "d"}}],
+    [{"operation": "auto_cast_datetime", "params": {"column": "d"}},
+     {"operation": "auto_cast_type", "params": {"column": "d"}}],
+    [{"operation": "optimize_dtypes", "params": {}},
+     {"operation": "auto_cast_type", "params": {"column": "n"}}],
+])
+def test_chunked_steps_on_one_column_match_in_memory(steps):
+    """Test a global step sees the column as the global steps before it left it"""
+    df = pd.DataFrame({
+        'd': ['20230102', '20230215', '20230301', '20230412', '20230530'],
+        'n': ['1', '2', '3', '4', '5'],
+    })
+
+    expected = _apply_in_memory(df.copy(), steps)
+    result = _apply_chunked(df, steps, chunk_size=2)
+
+    pd.testing.assert_frame_equal(result, expected)
+
+
+@pytest.mark.parametrize("keep", ["first", "last", False])
+def test_chunked_remove_duplicates_across_chunks(dirty_df, keep):
+    """Test that duplicates spanning chunk boundaries are removed like drop_duplicates"""
+    steps = [{"operation": "remove_duplicates", "params": {"keep": keep}}]
+
+    expected = _apply_in_memory(dirty_df.copy(), steps)
+    result = _apply_chunked(dirty_df, steps, chunk_size=2)
+
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_chunked_remove_duplicates_with_all_null_chunk():
+    """Test nulls of a chunk whose column became all-NaN float match None elsewhere"""
+    df = pd.DataFrame({'note': ['x', None, 'N/A', 'unknown'], 'k': ['1', '2', '2', '2']})
+    steps = [
+        {"operation": "replace_non_values", "params": {"column": "note"}},
+        {"operation": "remove_duplicates", "params": {}},
+    ]
+
+    expected = _apply_in_memory(df.copy(), steps)
+    result = _apply_chunked(df, steps, chunk_size=2)
+
+    assert len(expected) == 2
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_chunked_cast_decision_is_global():
+    """Test that a non-numeric value in a later chunk prevents casting every chunk"""
+    df = pd.DataFrame({'code': ['1', '2', '3', '4', 'A5']})
+    steps = [{"operation": "auto_cast_type", "params": {"column": "code"}}]
+
+    result = _apply_chunked(df, steps, chunk_size=2)
+
+    assert result['code'].dtype == 'object'
+    assert list(result['code']) == ['1', '2', '3', '4', 'A5']
+
+
+def test_chunked_optimize_dtypes_uses_global_range():
+    """Test that the dtype chosen for every chunk covers the whole column"""
+    df = pd.DataFrame({'qty': [1, 2, 3, 40_000], 'price': [1.5, None, 2.5, 3.0]})
+    steps = [{"operation": "optimize_dtypes", "params": {}}]
+
+    expected = _apply_in_memory(df.copy(), steps)
+    result = _apply_chunked(df, steps, chunk_size=2)
+
+    pd.testing.assert_frame_equal(result, expected)
+    assert result['qty'].dtype == 'int32'
@@ -0,0 +1,158 @@
+"""
+Tests for the suggestion cache keyed by schema and profile fingerprint
+"""
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from core.config import settings
+from services.profiling_service import profile_columns
+from services.suggestion_cache import SuggestionCache, profile_fingerprint, validate_suggestions
+from storage.db.models import Base, SuggestionCacheEntry
+
+LLM_SUGGESTIONS = [
+    {"operation": "standardize_column_names", "params": {}},
+    {"operation": "replace_non_values", "params": {"column": "total_spent"}},
+    {"operation": "auto_cast_type", "params": {"column": "total_spent"}},
+]
+
+
+@pytest.fixture
+def db():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def _profiling(df: pd.DataFrame):
+    return SimpleNamespace(
+        row_count=len(df),
+        column_count=len(df.columns),
+        column_types=df.dtypes.astype(str).to_dict(),
+        null_counts=df.isnull().sum().to_dict(),
+        column_stats=profile_columns(df),
+        duplicate_row_count=int(df.duplicated().sum()),
+    )
+
+
+@pytest.fixture
+def profiling():
+    return _profiling(pd.DataFrame({
+        "Item": ["Coffee", "Cake", "Tea", None],
+        "Total Spent": ["4.0", "12.0", "ERROR", "3.0"],
+    }))
+
+
+def test_similar_profiles_share_a_fingerprint(profiling):
+    """Test that a recurring feed with the same shape maps to the same entry"""
+    recurring = _profiling(pd.DataFrame({
+        "Item": ["Tea", "Cake", "Juice", None],
+        "Total Spent": ["5.0", "2.0", "ERROR", "7.5"],
+    }))
+    renamed = _profiling(pd.DataFrame({
+        "Product": ["Tea", "Cake", "Juice", None],
+        "Total Spent": ["5.0", "2.0", "ERROR", "7.5"],
+    }))
+
+    assert profile_fingerprint(recurring, "llm") == profile_fingerprint(profiling, "llm")
+    assert profile_fingerprint(renamed, "llm") != profile_fingerprint(profiling, "llm")
+    assert profile_fingerprint(profiling, "rules") != profile_fingerprint(profiling, "llm")
+
+
+def test_rules_need_column_stats(profiling):
+    """Test that rule suggestions are only cached when decided from the profile"""
+    profiling.column_stats = None
+    assert profile_fingerprint(profiling, "rules") is None
+    assert profile_fingerprint(profiling, "llm") is not None
+
+
+def test_cache_hit_and_ttl_expiry(db, profiling):
+    """Test that a stored plan is returned until it expires"""
+    cache = SuggestionCache(db)
+    assert cache.get(profiling, "llm") is None
+
+    cache.put(profiling, "llm", LLM_SUGGESTIONS)
+    assert cache.get(profiling, "llm") == LLM_SUGGESTIONS
+    assert db.query(SuggestionCacheEntry).one().hit_count == 1
+
+    entry = db.query(SuggestionCacheEntry).one()
+    entry.created_at = datetime.utcnow() - timedelta(seconds=settings.SUGGESTION_CACHE_TTL_SECONDS + 1)
+    db.commit()
+    assert cache.get(profiling, "llm") is None
+    assert db.query(SuggestionCacheEntry).count() == 0
+
+
+def test_least_recently_used_entries_are_evicted(db, monkeypatch):
+    """Test that the cache keeps at most SUGGESTION_CACHE_MAX_ENTRIES entries"""
+    monkeypatch.setattr(settings, "SUGGESTION_CACHE_MAX_ENTRIES", 2)
+    cache = SuggestionCache(db)
+    profiles = [_profiling(pd.DataFrame({name: ["a", "b"]})) for name in ("x", "y", "z")]
+    steps = [{"operation": "remove_duplicates", "params": {}}]
+
+    cache.put(profiles[0], "llm", steps)
+    cache.put(profiles[1], "llm", steps)
+    cache.get(profiles[0], "llm")
+    cache.put(profiles[2], "llm", steps)
+
+    assert cache.get(profiles[0], "llm") == steps
+    assert cache.get(profiles[1], "llm") is None
+    assert cache.get(profiles[2], "llm") == steps
+
+
+def test_validate_suggestions_tracks_renames_and_drops():
+    """Test that steps must name columns present at that point of the plan"""
+    columns = ["Item", "Total Spent"]
+
+    assert validate_suggestions(LLM_SUGGESTIONS, columns)
+    assert not validate_suggestions(LLM_SUGGESTIONS[1:], columns)
+    assert not validate_suggestions([{"operation": "explode", "params": {}}], columns)
+    assert not validate_suggestions([
+        {"operation": "drop_column", "params": {"column": "Item"}},
+        {"operation": "standardize_case", "params": {"column": "Item"}},
+    ], columns)
+
+
+def test_invalid_cached_plan_is_a_miss(db, profiling):
+    """Test that an entry whose plan no longer fits the columns is discarded"""
+    cache = SuggestionCache(db)
+    cache.put(profiling, "llm", LLM_SUGGESTIONS)
+    db.query(SuggestionCacheEntry).one().suggestions = [
+        {"operation": "drop_column", "params": {"column": "missing"}}
+    ]
+    db.commit()
+
+    assert cache.get(profiling, "llm") is None
+    assert db.query(SuggestionCacheEntry).count() == 0
+
+
+def test_cached_plan_skips_the_llm(db, profiling, monkeypatch):
+    """Test that a second job with a matching profile does not call the agent"""
+    from services.suggestion_service import SuggestionService
+
+    calls = []
+    agent = SimpleNamespace(suggest=lambda summary: calls.append(summary) or LLM_SUGGESTIONS)
+    created = []
+    monkeypatch.setattr("services.suggestion_service.DataCleaningAgent", lambda client: agent)
+
+    for job_id in ("first", "second"):
+        service = SuggestionService(db, llm_client=object())
+        service.job_repo = SimpleNamespace(
+            get=lambda job_id: SimpleNamespace(status="suggesting"),
+            update_status=lambda *args: None,
+        )
+        service.profile_repo = SimpleNamespace(get_by_job_id=lambda job_id: profiling)
+        service.suggestion_repo = SimpleNamespace(create=lambda *args: created.append(args))
+        monkeypatch.setattr("services.apply_service.ApplyService.run", lambda self, job_id: None)
+        service.run(job_id)
+
+    assert len(calls) == 1
+    assert created == [("first", LLM_SUGGESTIONS), ("second", LLM_SUGGESTIONS)]
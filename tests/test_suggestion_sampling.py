@@ -0,0 +1,87 @@
+"""
+Tests for sampled and parallel rule-based suggestion decisions
+"""
+import pandas as pd
+import pytest
+
+from core.config import settings
+from services.suggestion_service import (
+    _analyze_column,
+    _analyze_columns,
+    _stratified_sample,
+    _wilson_interval,
+)
+
+
+def test_stratified_sample_covers_every_block():
+    """Test that the sample draws rows from across the whole frame"""
+    df = pd.DataFrame({'value': range(10_000)})
+    
+    sample = _stratified_sample(df, 200, strata=10)
+    
+    assert len(sample) == 200
+    assert sample.index.is_monotonic_increasing
+    blocks = (sample['value'] // 1000).value_counts()
+    assert len(blocks) == 10
+    assert (blocks == 20).all()
+
+
+def test_wilson_interval_contains_rate():
+    """Test the confidence interval brackets the observed rate"""
+    low, high = _wilson_interval(90, 100)
+    
+    assert low < 0.9 < high
+    assert _wilson_interval(0, 0) == (0.0, 1.0)
+
+
+def test_analyze_column_clear_decision_uses_sample_only():
+    """Test that a clear numeric decision is taken from the sample"""
+    series = pd.Series(['4.0', '12.0', 'ERROR', '10.0'] * 2500, name='total_spent')
+    sample = series.iloc[::7]
+    
+    decisions = _analyze_column('total_spent', series, sample)
+    
+    assert {'replace_non_values', 'auto_cast_type'} <= decisions['operations']
+    evidence = decisions['evidence']['auto_cast_type']
+    assert evidence['full_scan'] is False
+    assert evidence['ci95'][0] > 0.5
+    assert evidence['sample_size'] == len(sample)
+
+
+def test_analyze_column_borderline_falls_back_to_full_scan():
+    """Test that a rate near the numeric threshold is re-checked on every row"""
+    series = pd.Series(['1', 'x'] * 5000, name='amount')
+    sample = series.iloc[:100]
+    
+    decisions = _analyze_column('amount', series, sample)
+    
+    assert 'auto_cast_type' not in decisions['operations']
+    
+    series = pd.Series(['1', '2', '3', 'x', 'y'] * 2000, name='amount')
+    sample = series.iloc[:40]
+    
+    decisions = _analyze_column('amount', series, sample)
+    
+    assert 'auto_cast_type' in decisions['operations']
+    assert decisions['evidence']['auto_cast_type']['full_scan'] is True
+    assert decisions['evidence']['auto_cast_type']['rate'] == 0.6
+    assert decisions['evidence']['auto_cast_type']['sample_size'] == len(series)
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_parallel_column_analysis_matches_serial(monkeypatch, executor):
+    """Test that concurrent column analysis returns the serial results in order"""
+    df = pd.DataFrame({
+        f'col {i}': ['Credit Card', 'UNKNOWN', str(i), '2023-01-01'][i % 4:] + ['x'] * (i % 4)
+        for i in range(12)
+    })
+    columns = list(df.columns)
+    
+    monkeypatch.setattr(settings, "SUGGESTION_WORKERS", 1)
+    serial = _analyze_columns(df, None, columns)
+    
+    monkeypatch.setattr(settings, "SUGGESTION_WORKERS", 4)
+    monkeypatch.setattr(settings, "SUGGESTION_EXECUTOR", executor)
+    parallel = _analyze_columns(df, None, columns)
+    
+    assert parallel == serial
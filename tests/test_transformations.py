@@ -15,6 +15,8 @@ from transformations.operations import (
     auto_cast_type,
     auto_cast_datetime,
     remove_duplicates,
+    infer_datetime_format,
+    optimize_dtypes,
 )
 
 
@@ -351,6 +353,24 @@ def test_standardize_case_with_trailing_spaces():
     assert result['location'].iloc[3] == 'boston'
 
 
+def test_standardize_case_mixed_types():
+    """Test standardizing case leaves non-string values and index untouched"""
+    df = pd.DataFrame(
+        {'code': ['Credit Card', 1, 'credit card', 2.5, None, 'Credit Card']},
+        index=[10, 11, 12, 13, 14, 15],
+    )
+    
+    result = standardize_case(df, 'code')
+    
+    assert list(result.index) == [10, 11, 12, 13, 14, 15]
+    assert result['code'].iloc[0] == 'credit_card'
+    assert result['code'].iloc[1] == 1
+    assert result['code'].iloc[2] == 'credit_card'
+    assert result['code'].iloc[3] == 2.5
+    assert pd.isna(result['code'].iloc[4])
+    assert result['code'].iloc[5] == 'credit_card'
+
+
 def test_standardize_column_names():
     """Test standardizing column names to lowercase snake_case"""
     df = pd.DataFrame({
@@ -419,6 +439,33 @@ def test_auto_cast_datetime_with_time():
     assert result['timestamp'].iloc[0] == pd.Timestamp('2023-01-15 10:30:00')
 
 
+def test_auto_cast_datetime_day_first():
+    """Test that a day-first format is inferred from the distinct values"""
+    df = pd.DataFrame({
+        'date_col': ['05/06/2023', '15/01/2023', '05/06/2023', '28/02/2023']
+    })
+    
+    assert infer_datetime_format(df['date_col']) == '%d/%m/%Y'
+    
+    result = auto_cast_datetime(df, 'date_col')
+    
+    assert result['date_col'].iloc[0] == pd.Timestamp('2023-06-05')
+    assert result['date_col'].iloc[1] == pd.Timestamp('2023-01-15')
+
+
+def test_auto_cast_datetime_with_recorded_format():
+    """Test auto-casting with a format recorded by the suggestion phase"""
+    df = pd.DataFrame({
+        'date_col': ['05/06/2023', '07/08/2023', 'ERROR', '05/06/2023', '01/02/2023']
+    })
+    
+    result = auto_cast_datetime(df, 'date_col', format='%d/%m/%Y')
+    
+    assert pd.api.types.is_datetime64_any_dtype(result['date_col'])
+    assert result['date_col'].iloc[0] == pd.Timestamp('2023-06-05')
+    assert pd.isna(result['date_col'].iloc[2])
+
+
 def test_auto_cast_datetime_non_date_column():
     """Test that non-date columns are not converted"""
     df = pd.DataFrame({
@@ -524,3 +571,48 @@ def test_remove_duplicates_empty_dataframe():
     
     assert len(result) == 0
     assert list(result.columns) == ['name', 'age']
+
+
+def test_optimize_dtypes_integers():
+    """Test downcasting whole numbers to the smallest integer dtype"""
+    df = pd.DataFrame({
+        'quantity': [1, 2, 3],
+        'count': [1.0, None, 300.0],
+        'big': [1, 2, 100_000],
+    })
+    
+    result = optimize_dtypes(df)
+    
+    assert result['quantity'].dtype == 'int8'
+    assert result['count'].dtype == 'Int16'
+    assert pd.isna(result['count'].iloc[1])
+    assert result['big'].dtype == 'int32'
+    assert result.attrs['bytes_saved']['quantity'] > 0
+
+
+def test_optimize_dtypes_floats():
+    """Test float32 is only used when no value loses precision"""
+    df = pd.DataFrame({
+        'price': [2.5, 3.75, 0.1],
+        'precise': [1.123456789, 2.5, 3.5],
+    })
+    
+    result = optimize_dtypes(df)
+    
+    assert result['price'].dtype == 'float32'
+    assert result['precise'].dtype == 'float64'
+    assert 'precise' not in result.attrs['bytes_saved']
+
+
+def test_optimize_dtypes_numeric_strings():
+    """Test that numeric strings are parsed once and non-numeric columns are untouched"""
+    df = pd.DataFrame({
+        'total_spent': ['4', '12', None],
+        'item': ['Coffee', 'Cake', 'Tea'],
+    })
+    
+    result = optimize_dtypes(df, columns=['total_spent', 'item'])
+    
+    assert result['total_spent'].dtype == 'Int8'
+    assert result['total_spent'].iloc[1] == 12
+    assert result['item'].dtype == 'object'
@@ -0,0 +1,55 @@
+"""
+Tests for content-addressed upload deduplication and result reuse
+"""
+import io
+
+from core.cleanup import cleanup_job_files
+from services.profiling_service import ProfilingService
+from services.upload_service import UploadService
+from storage.db.repository import JobRepository, ProfilingRepository
+from storage.object_store import cleaned_path, raw_path
+
+CSV = b"Name,Total Spent\nAlice,4.0\nbob,ERROR\nAlice,4.0\n"
+
+
+def _process(db, data: bytes):
+    job = UploadService(db).store(io.BytesIO(data), "export.csv")
+    if job.status == "pending":
+        JobRepository(db).update_status(job.id, "profiling")
+        ProfilingService(db).run(job.id)
+    return JobRepository(db).get(job.id)
+
+
+def test_identical_upload_reuses_results(db):
+    """Test that a byte-identical upload links the earlier job's results"""
+    first = _process(db, CSV)
+    second = _process(db, CSV)
+
+    assert (first.upload_cache, first.status) == ("miss", "done")
+    assert (second.upload_cache, second.status) == ("hit", "done")
+    assert second.reused_from == first.id
+    assert second.content_hash == first.content_hash
+    assert cleaned_path(second.id).read_bytes() == cleaned_path(first.id).read_bytes()
+    assert ProfilingRepository(db).get_by_job_id(second.id).row_count == 3
+
+
+def test_different_upload_is_a_miss(db):
+    """Test that changed content runs the pipeline again"""
+    first = _process(db, CSV)
+    second = _process(db, CSV + b"Carol,5.0\n")
+
+    assert second.upload_cache == "miss"
+    assert second.reused_from is None
+    assert second.content_hash != first.content_hash
+
+
+def test_cleanup_keeps_files_shared_with_other_jobs(db):
+    """Test that cleaning up one job leaves the shared data of the other"""
+    first = _process(db, CSV)
+    second = _process(db, CSV)
+
+    assert cleanup_job_files(first.id)
+
+    assert not raw_path(first.id).exists()
+    assert raw_path(second.id).read_bytes() == CSV
+    assert cleaned_path(second.id).exists()
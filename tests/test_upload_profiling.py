@@ -0,0 +1,134 @@
+"""
+Tests for profiling uploads while they stream in
+"""
+import io
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+import services.profiling_service as profiling_service
+from services.dialect_service import DIALECT_SAMPLE_BYTES
+from services.profiling_service import ProfilingService, StreamingProfiler
+from storage.db.repository import ProfilingRepository
+
+CSV = b"Name,Score,Active,Note\n" + b"".join(
+    b'name_%d,%d,%s,"line one\nline %d"\n' % (i % 300, i % 7, b"True" if i % 2 else b"False", i % 5)
+    for i in range(3000)
+) + b"name_1,1,True,\n"
+
+
+def _upload(client, data: bytes, filename="scores.csv", profile="true") -> dict:
+    response = client.post(
+        f"/jobs/upload?profile={profile}", files={"file": (filename, io.BytesIO(data))}
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_streamed_profile_matches_full_parse():
+    """Test blocks split mid-row and inside quoted newlines add up to the whole file"""
+    profiler = StreamingProfiler(block_bytes=2048)
+    for start in range(0, len(CSV), 700):
+        profiler.feed(CSV[start:start + 700])
+    profile = profiler.finish()
+
+    df = pd.read_csv(io.BytesIO(CSV))
+    assert profile["row_count"] == len(df)
+    assert profile["column_types"] == df.dtypes.astype(str).to_dict()
+    assert profile["null_counts"] == df.isnull().sum().to_dict()
+    assert profile["duplicate_row_count"] == int(df.duplicated().sum())
+    assert profile["column_stats"]["Score"]["min"] == 0
+    assert profile["column_stats"]["Score"]["max"] == 6
+    assert profile["column_stats"]["Name"]["distinct_count"] == pytest.approx(300, rel=0.05)
+
+
+def test_stray_quote_in_unquoted_field():
+    """Test a quote inside an unquoted field does not stall the row scan"""
+    data = b"Name,Height\n" + b"".join(b"p%d,5'10\"\n" % i for i in range(20000))
+    profiler = StreamingProfiler(block_bytes=4096)
+    for start in range(0, len(data), 1000):
+        profiler.feed(data[start:start + 1000])
+        # Rows are consumed from the dialect sample on
+        if start >= DIALECT_SAMPLE_BYTES:
+            assert len(profiler._buffer) < 2 * 4096
+
+    profile = profiler.finish()
+    assert profile["row_count"] == 20000
+    assert profile["column_stats"]["Height"]["top_values"][0] == ["5'10\"", 20000]
+
+
+def test_unterminated_quote_gives_up():
+    """Test an unterminated quoted field stops buffering and leaves profiling to the phase"""
+    data = b'a,b\n1,"open\n' + b"2,3\n" * 50000
+    profiler = StreamingProfiler(block_bytes=4096)
+    for start in range(0, len(data), 1000):
+        profiler.feed(data[start:start + 1000])
+        assert len(profiler._buffer) <= DIALECT_SAMPLE_BYTES + 1000
+
+    assert profiler.failed
+    assert profiler.finish() is None
+
+
+def test_integers_beyond_int64_are_text(client):
+    """Test a column with integers read_csv cannot hold is profiled as object"""
+    data = b"id,n\n" + b"".join(b"%d,%d\n" % (10 ** 20 + i, i) for i in range(50))
+
+    job = _upload(client, data)
+
+    profile = client.get(f"/jobs/{job['job_id']}/profile").json()
+    df = pd.read_csv(io.BytesIO(data))
+    assert profile["column_types"] == df.dtypes.astype(str).to_dict()
+    assert profile["column_types"]["id"] == "object"
+
+
+def test_unparseable_upload_disables_profiler():
+    """Test a body that is not CSV yields no profile instead of a wrong one"""
+    profiler = StreamingProfiler(block_bytes=16)
+    profiler.feed(b"a,b\n1,2\n")
+    profiler.feed(b"3,4,5,6\n7,8\n")
+    profiler.feed(b"9,10\n")
+
+    assert profiler.finish() is None
+
+
+def test_profile_ready_after_upload(client, session_factory, monkeypatch):
+    """Test the profile exists on upload and the profiling phase does not re-read the file"""
+    job = _upload(client, CSV)
+
+    profile = client.get(f"/jobs/{job['job_id']}/profile").json()
+    assert profile["row_count"] == 3001
+    assert profile["from_upload"] is True
+
+    def fail(job_id):
+        raise AssertionError("upload was parsed again")
+
+    monkeypatch.setattr(profiling_service, "ingest", fail)
+    assert client.post(f"/jobs/{job['job_id']}/profile").status_code == 202
+    db = session_factory()
+    try:
+        ProfilingService(db).run(job["job_id"], chain=False)
+        assert client.get(f"/jobs/{job['job_id']}").json()["status"] == "suggesting"
+    finally:
+        db.close()
+
+
+def test_workbooks_and_opt_out_not_profiled(client, session_factory):
+    """Test workbooks and uploads without profile=true are left to the profiling phase"""
+    workbook = Workbook()
+    workbook.active.append(["Name", "Score"])
+    workbook.active.append(["a", 1])
+    xlsx = io.BytesIO()
+    workbook.save(xlsx)
+
+    jobs = [
+        _upload(client, xlsx.getvalue(), filename="scores.xlsx"),
+        _upload(client, CSV, profile="false"),
+    ]
+
+    db = session_factory()
+    try:
+        repo = ProfilingRepository(db)
+        assert [repo.get_by_job_id(job["job_id"]) for job in jobs] == [None, None]
+    finally:
+        db.close()
@@ -0,0 +1,82 @@
+"""
+Tests for the streaming, size-bounded upload route
+"""
+from core.config import settings
+from storage.object_store import raw_path
+
+CSV = b"Name,Score\n" + b"".join(b"name_%d,%d\n" % (i, i) for i in range(5000))
+BOUNDARY = "upload-test-boundary"
+
+
+def _multipart(data: bytes, filename="scores.csv") -> bytes:
+    return (
+        f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="note"\r\n\r\nhi\r\n'
+        f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        f"Content-Type: text/csv\r\n\r\n"
+    ).encode() + data + f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+def _chunked(body: bytes, size: int = 1000):
+    for start in range(0, len(body), size):
+        yield body[start:start + size]
+
+
+def _leftovers(tmp_path) -> list:
+    return list(tmp_path.glob(".upload-*"))
+
+
+def test_streamed_body_split_across_chunks(client, tmp_path):
+    """Test a body sent in small chunks is stored byte for byte"""
+    response = client.post(
+        "/jobs/upload",
+        content=_chunked(_multipart(CSV)),
+        headers={"Content-Type": f"multipart/form-data; boundary={BOUNDARY}"},
+    )
+
+    assert response.status_code == 200
+    job = client.get(f"/jobs/{response.json()['job_id']}").json()
+    assert job["original_filename"] == "scores.csv"
+    assert raw_path(job["id"]).read_bytes() == CSV
+    assert _leftovers(tmp_path) == []
+
+
+def test_declared_size_over_limit_rejected_early(client, tmp_path, monkeypatch):
+    """Test a Content-Length over the limit is answered 413 before the body is read"""
+    monkeypatch.setattr(settings, "MAX_UPLOAD_BYTES", 1000)
+    body = _multipart(b"x" * 100_000)
+
+    response = client.post(
+        "/jobs/upload",
+        content=body,
+        headers={
+            "Content-Type": f"multipart/form-data; boundary={BOUNDARY}",
+            "Content-Length": str(len(body)),
+        },
+    )
+
+    assert response.status_code == 413
+    assert _leftovers(tmp_path) == []
+
+
+def test_streamed_size_over_limit_rejected(client, tmp_path, monkeypatch):
+    """Test an upload without Content-Length is cut off once it passes the limit"""
+    monkeypatch.setattr(settings, "MAX_UPLOAD_BYTES", len(CSV) - 1)
+
+    response = client.post(
+        "/jobs/upload",
+        content=_chunked(_multipart(CSV)),
+        headers={"Content-Type": f"multipart/form-data; boundary={BOUNDARY}"},
+    )
+
+    assert response.status_code == 413
+    assert _leftovers(tmp_path) == []
+    assert list(tmp_path.glob("*.csv")) == []
+
+
+def test_malformed_uploads_rejected(client):
+    """Test bodies that are not multipart or carry no file"""
+    not_multipart = client.post("/jobs/upload", content=CSV, headers={"Content-Type": "text/csv"})
+    no_file = client.post("/jobs/upload", data={"sheet": "Sales"})
+
+    assert not_multipart.status_code == 400
+    assert no_file.status_code == 400
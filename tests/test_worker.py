@@ -0,0 +1,140 @@
+"""
+Tests for the durable task queue and the workers that run pipeline phases
+"""
+import io
+from datetime import datetime, timedelta
+
+import pytest
+
+import services.worker as worker_module
+from core.config import settings
+from services.upload_service import UploadService
+from services.worker import Worker
+from storage.db.models import TaskModel
+from storage.db.repository import JobRepository, TaskRepository
+from storage.object_store import cleaned_path
+
+CSV = b"Name,Total Spent\nAlice,4.0\nbob,ERROR\nAlice,4.0\n"
+
+
+def _queue_job(db):
+    job = UploadService(db).store(io.BytesIO(CSV), "export.csv")
+    JobRepository(db).update_status(job.id, "profiling")
+    TaskRepository(db).enqueue(job.id, "profile")
+    return job.id
+
+
+def _tasks(db, job_id):
+    db.expire_all()
+    return db.query(TaskModel).filter_by(job_id=job_id).order_by(TaskModel.created_at).all()
+
+
+def test_worker_runs_each_phase_as_its_own_task(db, session_factory):
+    """Test that each phase queues the next one until the job is done"""
+    job_id = _queue_job(db)
+    worker = Worker(session_factory, "w1")
+
+    assert worker.run_once()
+    assert JobRepository(db).get(job_id).status == "suggesting"
+    assert worker.run_once() and worker.run_once()
+    assert not worker.run_once()
+
+    db.expire_all()
+    assert JobRepository(db).get(job_id).status == "done"
+    assert cleaned_path(job_id).exists()
+    assert [(t.phase, t.status) for t in _tasks(db, job_id)] == [
+        ("profile", "done"), ("suggest", "done"), ("apply", "done")
+    ]
+
+
+def test_leased_task_is_not_claimed_twice(db):
+    """Test that a task held by a live worker is invisible to the others"""
+    job_id = _queue_job(db)
+    tasks = TaskRepository(db)
+
+    assert tasks.claim("w1", visibility_timeout=60).job_id == job_id
+    assert tasks.claim("w2", visibility_timeout=60) is None
+
+
+def test_expired_lease_is_recovered(db, session_factory):
+    """Test that a task abandoned by a crashed worker is claimed again"""
+    job_id = _queue_job(db)
+    crashed = TaskRepository(db).claim("crashed", visibility_timeout=60)
+    crashed.locked_until = datetime.utcnow() - timedelta(seconds=1)
+    db.commit()
+
+    assert Worker(session_factory, "w2").run_once()
+
+    profile = _tasks(db, job_id)[0]
+    assert (profile.status, profile.attempts, profile.locked_by) == ("done", 2, "w2")
+    # The crashed worker can no longer complete the task
+    assert not TaskRepository(db).complete(profile.id, "crashed")
+
+
+def test_task_failed_after_max_attempts(db, session_factory, monkeypatch):
+    """Test that a task that keeps crashing workers fails its job"""
+    monkeypatch.setattr(settings, "WORKER_MAX_ATTEMPTS", 1)
+    job_id = _queue_job(db)
+    task = TaskRepository(db).claim("crashed", visibility_timeout=60)
+    task.locked_until = datetime.utcnow() - timedelta(seconds=1)
+    db.commit()
+
+    assert Worker(session_factory, "w2").run_once()
+
+    assert _tasks(db, job_id)[0].status == "failed"
+    assert JobRepository(db).get(job_id).status == "failed"
+
+
+def test_finished_phase_is_not_run_again(db, session_factory, monkeypatch):
+    """Test that a recovered task whose phase already finished only queues the next"""
+    job_id = _queue_job(db)
+    JobRepository(db).update_status(job_id, "suggesting")
+    monkeypatch.setitem(
+        worker_module.PHASES, "profile", lambda db, job_id: pytest.fail("phase ran again")
+    )
+
+    assert Worker(session_factory, "w1").run_once()
+
+    assert [(t.phase, t.status) for t in _tasks(db, job_id)] == [
+        ("profile", "done"), ("suggest", "queued")
+    ]
+
+
+def test_phase_error_fails_task_without_queueing_next(db, session_factory):
+    """Test that a failing phase records the error and stops the chain"""
+    job = UploadService(db).store(io.BytesIO(CSV), "export.csv")
+    JobRepository(db).update_status(job.id, "profiling")
+    TaskRepository(db).enqueue(job.id, "apply")
+
+    assert Worker(session_factory, "w1").run_once()
+
+    [task] = _tasks(db, job.id)
+    assert task.status == "failed"
+    assert "Invalid job state" in task.error
+    assert JobRepository(db).get(job.id).status == "failed"
+
+
+def test_status_and_task_change_together(db):
+    """Test that a refused transition queues no task and a queued one moves the job"""
+    job = UploadService(db).store(io.BytesIO(CSV), "export.csv")
+    tasks = TaskRepository(db)
+
+    with pytest.raises(ValueError, match="Invalid transition"):
+        tasks.enqueue(job.id, "suggest", status="applying")
+    assert _tasks(db, job.id) == []
+
+    task = tasks.enqueue(job.id, "profile", status="profiling")
+    assert [t.id for t in _tasks(db, job.id)] == [task.id]
+    assert JobRepository(db).get(job.id).status == "profiling"
+
+
+def test_phase_routes_check_the_job(db, client):
+    """Test that phases are only queued for existing jobs in a state that allows them"""
+    job = UploadService(db).store(io.BytesIO(CSV), "export.csv")
+    for phase in ("suggestions", "apply"):
+        assert client.post(f"/jobs/missing/{phase}").status_code == 404
+        assert client.post(f"/jobs/{job.id}/{phase}").status_code == 400
+    assert _tasks(db, job.id) == []
+
+    JobRepository(db).update_status(job.id, "profiling")
+    assert client.post(f"/jobs/{job.id}/suggestions").status_code == 202
@@ -0,0 +1,100 @@
+"""
+Column-parallel execution of a cleaning plan.
+
+Steps are grouped into a dependency graph using their column param: between
+two barriers, the steps on one column form a chain that runs in plan order,
+and chains on different columns are independent, so they run concurrently on
+a worker pool. Steps that change the rows or the set of columns, or that do
+not name a single existing column, are barriers: every pending chain finishes
+before a barrier runs on the whole frame.
+"""
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import os
+
+import pandas as pd
+
+from transformations.registry import TRANSFORMATION_REGISTRY
+
+
+# Operations that change rows or columns of the whole frame
+BARRIER_OPERATIONS = {
+    "drop_null_rows",
+    "remove_duplicates",
+    "standardize_column_names",
+    "drop_column",
+    "optimize_dtypes",
+}
+
+
+def _run_chain(frame: pd.DataFrame, chain: list[tuple]) -> pd.Series:
+    """Apply a chain of single-column steps to a one-column frame"""
+    column = frame.columns[0]
+    for op_name, params in chain:
+        frame = TRANSFORMATION_REGISTRY[op_name](frame, **params)
+    return frame[column]
+
+
+def execute_plan(
+    df: pd.DataFrame,
+    steps: list[dict],
+    workers: int = 0,
+    executor: str = "thread",
+) -> pd.DataFrame:
+    """
+    Apply steps to df, running independent column chains concurrently.
+
+    Produces the same frame as applying every step in order. Unsupported
+    operations are skipped.
+
+    Args:
+        df: DataFrame to clean
+        steps: Plan steps ({"operation": ..., "params": {...}})
+        workers: Pool size (0 uses one per CPU, 1 runs every step serially)
+        executor: "thread" or "process"
+    """
+    workers = workers or os.cpu_count() or 1
+    pool = None
+    if workers > 1:
+        pool_class = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+        pool = pool_class(max_workers=workers)
+
+    chains = {}  # column -> [(op_name, params)], in plan order
+
+    def flush(df: pd.DataFrame) -> pd.DataFrame:
+        if not chains:
+            return df
+        columns = list(chains)
+        frames = [df[column].to_frame() for column in columns]
+        if pool is None or len(columns) == 1:
+            results = map(_run_chain, frames, chains.values())
+        else:
+            results = pool.map(_run_chain, frames, chains.values())
+        for column, result in zip(columns, list(results)):
+            df[column] = result
+        chains.clear()
+        return df
+
+    try:
+        for step in steps:
+            op_name = step.get("operation")
+            params = step.get("params", {})
+
+            operation = TRANSFORMATION_REGISTRY.get(op_name)
+            if not operation:
+                continue  # silently skip unsupported ops
+
+            column = params.get("column")
+            if (
+                op_name in BARRIER_OPERATIONS
+                or not isinstance(column, str)
+                or column not in df.columns
+            ):
+                df = flush(df)
+                df = operation(df, **params)
+            else:
+                chains.setdefault(column, []).append((op_name, params))
+
+        return flush(df)
+    finally:
+        if pool is not None:
+            pool.shutdown()
@@ -1,9 +1,24 @@
+import warnings
+
 import pandas as pd
 import numpy as np
 
+try:
+    from pandas.tseries.api import guess_datetime_format
+except ImportError:  # pandas < 2.2
+    from pandas._libs.tslibs.parsing import guess_datetime_format
+
+# Number of distinct values sampled when inferring a datetime format
+DATETIME_FORMAT_SAMPLE_SIZE = 50
+
 
-def drop_null_rows(df: pd.DataFrame, column: str) -> pd.DataFrame:
-    return df.dropna(subset=[column])
+def drop_null_rows(df: pd.DataFrame, column: str = None, columns: list = None) -> pd.DataFrame:
+    """Drop rows with a null in column, or in any of columns (one dropna for several)"""
+    subset = [column] if column is not None else []
+    subset += [c for c in columns or [] if c not in subset]
+    # take() returns an independent frame (dropna returns one flagged as a
+    # slice), so later steps can assign columns without a chained-assignment warning
+    return df.take(np.flatnonzero(df[subset].notna().all(axis=1)))
 
 
 def fill_nulls(df: pd.DataFrame, column: str, value) -> pd.DataFrame:
@@ -38,6 +53,39 @@ def _to_snake_case(text: str) -> str:
     return text.strip().replace(' ', '_').replace('-', '_').lower()
 
 
+def _snake_case_strings(values: pd.Series) -> pd.Series:
+    """Vectorized _to_snake_case for a Series that holds only strings"""
+    return (
+        values.str.strip()
+        .str.replace(' ', '_', regex=False)
+        .str.replace('-', '_', regex=False)
+        .str.lower()
+    )
+
+
+def _transform_unique_strings(series: pd.Series, func) -> pd.Series:
+    """
+    Apply a vectorized string transform to the distinct string values of a Series.
+
+    The column is factorized so func only sees each distinct string once; the
+    results are mapped back through the integer codes. Nulls and non-string
+    values are left untouched.
+    """
+    codes, uniques = pd.factorize(series)
+    uniques = np.asarray(uniques, dtype=object)
+    is_str = np.fromiter((isinstance(u, str) for u in uniques), dtype=bool, count=len(uniques))
+
+    transformed = uniques.copy()
+    if is_str.any():
+        transformed[is_str] = func(pd.Series(uniques[is_str], dtype=object)).to_numpy(dtype=object)
+
+    values = series.to_numpy(dtype=object, copy=True)
+    str_rows = codes >= 0
+    str_rows[str_rows] = is_str[codes[str_rows]]
+    values[str_rows] = transformed[codes[str_rows]]
+    return pd.Series(values, index=series.index, name=series.name, dtype=object)
+
+
 def standardize_case(df: pd.DataFrame, column: str) -> pd.DataFrame:
     """
     Standardize string values to lowercase snake_case (e.g., 'In-store' -> 'in_store', 'Credit Card' -> 'credit_card').
@@ -49,9 +97,7 @@ def standardize_case(df: pd.DataFrame, column: str) -> pd.DataFrame:
     
     # Only process if the column contains string-like values
     if df[column].dtype == 'object':
-        df[column] = df[column].apply(
-            lambda x: _to_snake_case(x) if isinstance(x, str) and pd.notna(x) else x
-        )
+        df[column] = _transform_unique_strings(df[column], _snake_case_strings)
     
     return df
 
@@ -101,6 +147,11 @@ def replace_non_values(df: pd.DataFrame, column: str, non_values: list = None) -
     return df
 
 
+def _is_integral(values: np.ndarray) -> bool:
+    """True if every value is a finite whole number"""
+    return bool(np.isfinite(values).all() and (values == np.trunc(values)).all())
+
+
 def auto_cast_type(df: pd.DataFrame, column: str) -> pd.DataFrame:
     """
     Automatically detect and cast column type if it contains numeric values stored as strings.
@@ -116,24 +167,22 @@ def auto_cast_type(df: pd.DataFrame, column: str) -> pd.DataFrame:
     if df[column].dtype != 'object':
         return df
     
-    # Create a copy of non-null values for testing
-    non_null_values = df[column].dropna()
+    non_null_count = df[column].notna().sum()
     
-    if len(non_null_values) == 0:
+    if non_null_count == 0:
         return df
     
-    # Try to convert to numeric
+    # Try to convert to numeric, parsing the column only once
     try:
-        # Attempt to convert to numeric
-        numeric_values = pd.to_numeric(non_null_values, errors='coerce')
+        numeric_values = pd.to_numeric(df[column], errors='coerce')
         
         # Check if all non-null values were successfully converted
-        if numeric_values.notna().all():
+        if numeric_values.notna().sum() == non_null_count:
             # Check if all values are integers
-            if (numeric_values % 1 == 0).all():
-                df[column] = pd.to_numeric(df[column], errors='coerce').astype('Int64')
+            if _is_integral(numeric_values.dropna().to_numpy(dtype=np.float64)):
+                df[column] = numeric_values.astype('Int64')
             else:
-                df[column] = pd.to_numeric(df[column], errors='coerce')
+                df[column] = numeric_values
     except (ValueError, TypeError):
         # If conversion fails due to type issues, leave as is
         pass
@@ -141,7 +190,200 @@ def auto_cast_type(df: pd.DataFrame, column: str) -> pd.DataFrame:
     return df
 
 
-def auto_cast_datetime(df: pd.DataFrame, column: str) -> pd.DataFrame:
+def numeric_column_stats(series: pd.Series) -> dict | None:
+    """
+    Summarize a column for optimize_dtypes in a single parse.
+
+    Object columns are parsed with pd.to_numeric once. Stats from chunks of the
+    same column can be combined with merge_numeric_column_stats.
+
+    Returns:
+        A dict of mergeable statistics, or None for non-numeric columns
+        (bool, datetime, category, or strings that are not all numeric)
+    """
+    if series.dtype == 'object':
+        values = pd.to_numeric(series, errors='coerce')
+        if values.notna().sum() != series.notna().sum():
+            return None
+    elif pd.api.types.is_bool_dtype(series) or not pd.api.types.is_numeric_dtype(series):
+        return None
+    else:
+        values = series
+
+    non_null = values.dropna().to_numpy(dtype=np.float64)
+    if len(non_null) == 0:
+        return {"non_null": 0, "has_na": len(values) > 0, "integral": True,
+                "float32_safe": True, "min": None, "max": None}
+
+    integral = _is_integral(non_null)
+    float32_safe = integral
+    if not integral:
+        # float32 is safe when every distinct value keeps its shortest decimal form
+        distinct = np.unique(non_null)
+        as_float32 = distinct.astype(np.float32)
+        float32_safe = bool(
+            np.isfinite(as_float32).all()
+            and np.array_equal(as_float32.astype(str).astype(np.float64), distinct)
+        )
+
+    return {
+        "non_null": len(non_null),
+        "has_na": len(non_null) < len(values),
+        "integral": integral,
+        "float32_safe": float32_safe,
+        "min": float(non_null.min()),
+        "max": float(non_null.max()),
+    }
+
+
+def merge_numeric_column_stats(left: dict | None, right: dict | None) -> dict | None:
+    """Combine numeric_column_stats computed on two chunks of the same column"""
+    if left is None or right is None:
+        return None
+    bounds = [v for v in (left["min"], right["min"]) if v is not None]
+    upper = [v for v in (left["max"], right["max"]) if v is not None]
+    return {
+        "non_null": left["non_null"] + right["non_null"],
+        "has_na": left["has_na"] or right["has_na"],
+        "integral": left["integral"] and right["integral"],
+        "float32_safe": left["float32_safe"] and right["float32_safe"],
+        "min": min(bounds) if bounds else None,
+        "max": max(upper) if upper else None,
+    }
+
+
+def smallest_dtype(stats: dict | None) -> str | None:
+    """
+    Pick the smallest dtype that holds every value described by stats.
+
+    Whole numbers get int8/16/32/64, or the nullable Int8/16/32/64 when the
+    column has nulls; other numbers get float32 when no value loses precision,
+    else float64. Returns None when the column should be left alone.
+    """
+    if stats is None or stats["non_null"] == 0:
+        return None
+
+    if stats["integral"]:
+        for bits in (8, 16, 32, 64):
+            info = np.iinfo(f"int{bits}")
+            if info.min <= stats["min"] and stats["max"] <= info.max:
+                return f"Int{bits}" if stats["has_na"] else f"int{bits}"
+
+    return "float32" if stats["float32_safe"] else "float64"
+
+
+def cast_to_dtype(series: pd.Series, dtype: str) -> pd.Series:
+    """Cast a column to a dtype chosen by smallest_dtype, parsing strings first"""
+    if series.dtype == 'object':
+        series = pd.to_numeric(series, errors='coerce')
+    return series.astype(dtype)
+
+
+def optimize_dtypes(df: pd.DataFrame, columns: list = None) -> pd.DataFrame:
+    """
+    Downcast numeric columns to the smallest dtype that holds their values.
+
+    Each column is parsed once. Whole numbers become int8/16/32/64 (nullable
+    Int8/16/32/64 if the column has nulls) and other numbers become float32
+    when no value loses precision. Object columns whose non-null values are
+    all numeric are converted as well; other columns are left unchanged.
+
+    Args:
+        df: DataFrame to process
+        columns: Columns to optimize. If None, every column is considered.
+
+    Returns:
+        DataFrame with optimized dtypes. Bytes saved per column are recorded
+        in df.attrs["bytes_saved"].
+
+    Example:
+        >>> df = pd.DataFrame({'qty': [1, 2, 3], 'price': [2.5, 3.0, None]})
+        >>> optimize_dtypes(df).dtypes
+        qty         int8
+        price    float32
+        dtype: object
+    """
+    bytes_saved = dict(df.attrs.get("bytes_saved", {}))
+
+    for column in (columns if columns is not None else list(df.columns)):
+        if column not in df.columns:
+            continue
+
+        dtype = smallest_dtype(numeric_column_stats(df[column]))
+        if dtype is None or str(df[column].dtype) == dtype:
+            continue
+
+        before = df[column].memory_usage(index=False, deep=True)
+        optimized = cast_to_dtype(df[column], dtype)
+        after = optimized.memory_usage(index=False, deep=True)
+        if after < before:
+            df[column] = optimized
+            bytes_saved[column] = bytes_saved.get(column, 0) + int(before - after)
+
+    df.attrs["bytes_saved"] = bytes_saved
+    return df
+
+
+def infer_datetime_format(series: pd.Series, sample_size: int = DATETIME_FORMAT_SAMPLE_SIZE):
+    """
+    Guess a strftime format for a column of date strings.
+
+    Candidate formats are guessed from a sample of distinct values (month-first
+    and day-first readings), and the candidate that parses the most sampled
+    values wins.
+
+    Returns:
+        The format string, or None if no sampled value looks like a date
+    """
+    uniques = pd.unique(series.dropna())
+    uniques = np.array([v for v in uniques if isinstance(v, str)], dtype=object)
+    if len(uniques) == 0:
+        return None
+    if len(uniques) > sample_size:
+        positions = np.linspace(0, len(uniques) - 1, sample_size).astype(int)
+        uniques = uniques[positions]
+
+    candidates = []
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        for value in uniques:
+            for dayfirst in (False, True):
+                fmt = guess_datetime_format(value.strip(), dayfirst=dayfirst)
+                if fmt and fmt not in candidates:
+                    candidates.append(fmt)
+
+    best_format, best_count = None, 0
+    sample = pd.Series(uniques, dtype=object).str.strip()
+    for fmt in candidates:
+        count = pd.to_datetime(sample, format=fmt, errors='coerce').notna().sum()
+        if count > best_count:
+            best_format, best_count = fmt, count
+    return best_format
+
+
+def parse_datetime(series: pd.Series, format: str = None) -> pd.Series:
+    """
+    Parse a column to datetime, converting each distinct value only once.
+    Values that cannot be parsed become NaT.
+
+    Args:
+        series: Series to parse
+        format: strftime format, e.g. from infer_datetime_format. If None,
+            pandas infers the format itself.
+    """
+    codes, uniques = pd.factorize(series)
+    uniques = pd.Index(uniques, dtype=object)
+    if format is not None:
+        uniques = uniques.str.strip()
+    parsed = pd.to_datetime(uniques, format=format, errors='coerce')
+    return pd.Series(
+        parsed.take(codes, allow_fill=True, fill_value=pd.NaT),
+        index=series.index,
+        name=series.name,
+    )
+
+
+def auto_cast_datetime(df: pd.DataFrame, column: str, format: str = None) -> pd.DataFrame:
     """
     Automatically detect and cast column type if it contains date/datetime values stored as strings.
     Attempts to parse various date formats and convert to datetime64[ns].
@@ -149,12 +391,15 @@ def auto_cast_datetime(df: pd.DataFrame, column: str) -> pd.DataFrame:
     Args:
         df: DataFrame to process
         column: Column name to process
+        format: strftime format recorded by the suggestion phase. If None, the
+                format is inferred from a sample of distinct values.
     
     Returns:
         DataFrame with column cast to datetime if successful, otherwise unchanged
     
     Note:
-        Uses pandas to_datetime for flexible parsing.
+        The column is parsed once with an explicit format; each distinct
+        string is converted only once.
         Handles common date formats like:
         - 2023-01-15, 2023/01/15
         - 01-15-2023, 01/15/2023
@@ -168,24 +413,23 @@ def auto_cast_datetime(df: pd.DataFrame, column: str) -> pd.DataFrame:
     if df[column].dtype != 'object':
         return df
     
-    # Create a copy of non-null values for testing
-    non_null_values = df[column].dropna()
+    non_null_count = df[column].notna().sum()
     
-    if len(non_null_values) == 0:
+    if non_null_count == 0:
         return df
     
     # Try to convert to datetime
     try:
-        # Test conversion on non-null values
-        test_conversion = pd.to_datetime(non_null_values, errors='coerce')
+        if format is None:
+            format = infer_datetime_format(df[column])
+        parsed = parse_datetime(df[column], format)
         
         # Check if at least 80% of non-null values were successfully converted
         # (some flexibility for mixed content)
-        success_rate = test_conversion.notna().sum() / len(test_conversion)
+        success_rate = parsed.notna().sum() / non_null_count
         
         if success_rate >= 0.8:
-            # Convert the entire column
-            df[column] = pd.to_datetime(df[column], errors='coerce')
+            df[column] = parsed
     except (ValueError, TypeError):
         # If conversion fails, leave as is
         pass
@@ -223,4 +467,5 @@ def remove_duplicates(df: pd.DataFrame, subset: list = None, keep: str = 'first'
            A  B
         1  2  y
     """
-    return df.drop_duplicates(subset=subset, keep=keep)
+    # Same rows as drop_duplicates, but not flagged as a slice (see drop_null_rows)
+    return df.take(np.flatnonzero(~df.duplicated(subset=subset, keep=keep)))
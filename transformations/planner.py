@@ -0,0 +1,270 @@
+"""
+Rewrite a cleaning plan into a cheaper plan with the same result.
+
+optimize_plan runs a few passes over the suggested steps:
+
+- prune: drop unsupported operations, steps that are no-ops for the profiled
+  column types (e.g. auto_cast_type on a column that is already numeric) and
+  steps that repeat an earlier identical step whose effect nothing in between
+  could have undone.
+- reorder: move drop_null_rows ahead of element-wise steps on other columns,
+  and run an exact-row remove_duplicates before the first value-changing step
+  so string and cast work touches fewer rows. The original remove_duplicates stays in
+  place whenever an earlier step could have made new duplicates.
+- fuse: merge adjacent drop_null_rows steps into one dropna over every column.
+
+Each rewrite is only applied where the output is identical to running the
+original plan in order.
+"""
+from transformations.registry import TRANSFORMATION_REGISTRY
+from transformations.operations import _to_snake_case
+
+
+# Operations that only remove rows, deciding each row from its own values
+ROW_FILTER_OPERATIONS = {"drop_null_rows", "remove_duplicates"}
+
+# Operations that change the column set or every column at once
+FRAME_OPERATIONS = {"standardize_column_names", "drop_column", "optimize_dtypes"}
+
+# Single-column operations that do nothing when the column is missing
+MISSING_COLUMN_NOOPS = {
+    "standardize_case",
+    "replace_non_values",
+    "auto_cast_type",
+    "auto_cast_datetime",
+    "drop_column",
+}
+
+# Single-column operations that only change object (string) columns
+OBJECT_ONLY_OPERATIONS = {"standardize_case", "auto_cast_type", "auto_cast_datetime"}
+
+# Single-column operations that map each value independently of the others
+# (auto casts decide from the whole column, so removing rows can change them)
+ELEMENTWISE_OPERATIONS = {"standardize_case", "replace_non_values", "fill_nulls", "cast_type"}
+
+
+def optimize_plan(steps: list[dict], column_types: dict | None = None) -> tuple[list[dict], list[str]]:
+    """
+    Optimize a list of plan steps ({"operation": ..., "params": {...}}).
+
+    Args:
+        steps: The suggested steps, in execution order
+        column_types: Profiled dtype of every input column, used to prune
+            no-op steps (None skips that pass)
+
+    Returns:
+        The optimized steps and a human-readable note for each rewrite
+    """
+    notes = []
+    plan = []
+    for step in steps:
+        if step.get("operation") not in TRANSFORMATION_REGISTRY:
+            notes.append(f"Pruned unsupported operation {step.get('operation')!r}")
+            continue
+        plan.append({"operation": step["operation"], "params": dict(step.get("params", {}))})
+
+    if column_types is not None:
+        plan = _prune_noops(plan, column_types, notes)
+    plan = _hoist_duplicate_removal(plan, notes)
+    plan = _hoist_null_row_drops(plan, notes)
+    plan = _prune_repeats(plan, notes)
+    plan = _fuse_null_row_drops(plan, notes)
+    return plan, notes
+
+
+def _column(step: dict):
+    column = step["params"].get("column")
+    return column if isinstance(column, str) else None
+
+
+def _describe(step: dict) -> str:
+    column = _column(step)
+    return f"{step['operation']}({column})" if column else step["operation"]
+
+
+def _prune_noops(plan: list[dict], column_types: dict, notes: list[str]) -> list[dict]:
+    """Drop single-column steps that cannot change the data, tracking dtypes through the plan"""
+    dtypes = dict(column_types)  # current column name -> dtype, None once unknown
+    result = []
+    for step in plan:
+        op_name, params = step["operation"], step["params"]
+        column = _column(step)
+
+        if op_name == "standardize_column_names":
+            dtypes = {_to_snake_case(name): dtype for name, dtype in dtypes.items()}
+        elif op_name == "optimize_dtypes":
+            for name in params.get("columns") or list(dtypes):
+                if name in dtypes:
+                    dtypes[name] = None
+        elif column is not None:
+            if column not in dtypes and op_name in MISSING_COLUMN_NOOPS:
+                notes.append(f"Pruned {_describe(step)}: column does not exist")
+                continue
+            if op_name in OBJECT_ONLY_OPERATIONS and dtypes.get(column) not in (None, "object"):
+                notes.append(f"Pruned {_describe(step)}: column is already {dtypes[column]}")
+                continue
+            if op_name == "drop_column":
+                dtypes.pop(column, None)
+            elif op_name not in ROW_FILTER_OPERATIONS:
+                dtypes[column] = None
+        result.append(step)
+    return result
+
+
+def _changes_values(step: dict) -> bool:
+    """Whether a step can make two different rows equal"""
+    return step["operation"] not in ROW_FILTER_OPERATIONS | {"standardize_column_names"}
+
+
+def _is_exact_row_dedupe(step: dict) -> bool:
+    params = step["params"]
+    return (
+        step["operation"] == "remove_duplicates"
+        and not params.get("subset")
+        and params.get("keep", "first") in ("first", "last")
+    )
+
+
+def _hoist_duplicate_removal(plan: list[dict], notes: list[str]) -> list[dict]:
+    """
+    Run an exact-row remove_duplicates before the first value-changing step.
+
+    Every step is deterministic per row, so rows that are identical before a
+    step are still identical after it; dropping them early keeps the same
+    first (or last) occurrence the later dedupe would keep. keep=False and
+    subset dedupes are left alone: rows that only become duplicates later
+    would be kept or dropped differently.
+    """
+    for i, step in enumerate(plan):
+        if not _is_exact_row_dedupe(step):
+            continue
+        position = next((j for j in range(i) if _changes_values(plan[j])), i)
+        # The datetime success rate and other dedupes count repeated rows, so
+        # the copy has to run after them
+        for j in range(position, i):
+            if plan[j]["operation"] in ("auto_cast_datetime", "remove_duplicates"):
+                position = j + 1
+        if not any(_changes_values(s) for s in plan[position:i]):
+            return plan
+        notes.append(f"Moved a copy of remove_duplicates ahead of {_describe(plan[position])}")
+        early = {"operation": "remove_duplicates", "params": dict(step["params"])}
+        return plan[:position] + [early] + plan[position:]
+    return plan
+
+
+def _commutes_with_null_drop(step: dict, column: str) -> bool:
+    """Whether drop_null_rows(column) can run before step with the same result"""
+    op_name = step["operation"]
+    if op_name == "remove_duplicates":
+        # Identical rows are dropped together either way
+        return not step["params"].get("subset")
+    if op_name not in ELEMENTWISE_OPERATIONS:
+        return False
+    other = _column(step)
+    # standardize_case maps strings to strings, so it never adds or removes nulls
+    return other is not None and (other != column or op_name == "standardize_case")
+
+
+def _hoist_null_row_drops(plan: list[dict], notes: list[str]) -> list[dict]:
+    """
+    Move each drop_null_rows(column) ahead of steps that do not touch its column.
+    It stops at another drop_null_rows so the two can be fused in plan order.
+    """
+    result = []
+    for step in plan:
+        column = _column(step)
+        position = len(result)
+        if step["operation"] == "drop_null_rows" and column is not None:
+            while position > 0 and _commutes_with_null_drop(result[position - 1], column):
+                position -= 1
+            if position < len(result):
+                notes.append(f"Moved {_describe(step)} ahead of {_describe(result[position])}")
+        result.insert(position, step)
+    return result
+
+
+def _undoes(step: dict, target: dict) -> bool:
+    """Whether step, run after target, can make a repeat of target do something again"""
+    if target["operation"] == "standardize_column_names":
+        return False  # nothing else renames columns
+    if target["operation"] == "remove_duplicates":
+        return _changes_values(step)
+    if _column(target) is None or target["operation"] == "optimize_dtypes":
+        return True
+    if step["operation"] in ROW_FILTER_OPERATIONS:
+        return False
+    return step["operation"] in FRAME_OPERATIONS or _column(step) in (None, _column(target))
+
+
+def _prune_repeats(plan: list[dict], notes: list[str]) -> list[dict]:
+    """Drop steps identical to an earlier step whose effect still holds"""
+    result = []
+    for step in plan:
+        repeated = False
+        for previous in reversed(result):
+            if previous == step:
+                repeated = True
+                break
+            if _undoes(previous, step):
+                break
+        if repeated:
+            notes.append(f"Pruned repeated {_describe(step)}")
+            continue
+        result.append(step)
+    return result
+
+
+def _fuse_null_row_drops(plan: list[dict], notes: list[str]) -> list[dict]:
+    """Merge runs of adjacent drop_null_rows steps into a single dropna"""
+    result = []
+    fused = False
+    for step in plan:
+        previous = result[-1] if result else None
+        if (
+            step["operation"] == "drop_null_rows"
+            and previous is not None
+            and previous["operation"] == "drop_null_rows"
+        ):
+            columns = _null_drop_columns(previous)
+            columns += [c for c in _null_drop_columns(step) if c not in columns]
+            result[-1] = {"operation": "drop_null_rows", "params": {"columns": columns}}
+            fused = True
+            continue
+        result.append(step)
+    if fused:
+        notes.append("Fused adjacent drop_null_rows steps into one dropna")
+    return result
+
+
+def _null_drop_columns(step: dict) -> list:
+    params = step["params"]
+    columns = [params["column"]] if params.get("column") is not None else []
+    return columns + [c for c in params.get("columns") or [] if c not in columns]
+
+
+def input_columns(steps: list[dict], columns: list) -> list | None:
+    """
+    The input columns a plan needs: every column except those it drops with
+    drop_column before anything could depend on them. Steps that look at
+    every column (standardize_column_names, an exact-row remove_duplicates,
+    drop_null_rows without columns, ...) stop the search.
+
+    Returns:
+        The needed columns in input order, or None if the plan needs them all
+    """
+    unused, referenced = set(), set()
+    for step in steps:
+        params = step["params"]
+        named = [_column(step)] if _column(step) is not None else []
+        named += list(params.get("columns") or []) + list(params.get("subset") or [])
+        if step["operation"] == "drop_column":
+            if named and named[0] in columns and named[0] not in referenced:
+                unused.add(named[0])
+            continue
+        if step["operation"] in FRAME_OPERATIONS or not named:
+            break
+        referenced.update(named)
+
+    if not unused:
+        return None
+    return [col for col in columns if col not in unused]
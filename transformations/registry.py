@@ -9,6 +9,7 @@ from transformations.operations import (
     auto_cast_type,
     auto_cast_datetime,
     remove_duplicates,
+    optimize_dtypes,
 )
 
 
@@ -23,4 +24,5 @@ TRANSFORMATION_REGISTRY = {
     "auto_cast_type": auto_cast_type,
     "auto_cast_datetime": auto_cast_datetime,
     "remove_duplicates": remove_duplicates,
+    "optimize_dtypes": optimize_dtypes,
 }
@@ -0,0 +1,340 @@
+"""
+Chunk-by-chunk execution of a cleaning plan for datasets larger than memory.
+
+Row-local operations run on each chunk independently. Operations that need
+global state are handled in an extra planning pass over the data:
+
+- auto_cast_type / auto_cast_datetime: the cast decision is taken once from
+  statistics gathered over every chunk, then applied identically to each chunk
+  so the output column has a single dtype. A datetime format missing from the
+  step is inferred once, from the first chunk with values, and reused.
+- optimize_dtypes: per-column numeric statistics are merged across chunks and
+  the smallest dtype is chosen once for the whole column.
+- remove_duplicates: row hashes are collected during planning and the original
+  row numbers to keep are computed once, so duplicates spanning chunks are
+  removed as drop_duplicates would. Rows are compared by their 64-bit hash
+  alone: two distinct rows with the same hash (about n**2 / 2**65 likely for
+  n rows, 3e-6 for ten million) would be taken as duplicates.
+
+During planning, cast and optimize_dtypes steps only observe their columns.
+A global step that reads a column an earlier undecided global step rewrites
+(or any step after a remove_duplicates, which changes the rows) would see
+values as they were before that step ("4" and "4.0" differ, 4 and 4.0 do
+not), so it is planned in a further pass over the chunks, once the steps
+before it are decided and can be applied.
+"""
+import numpy as np
+import pandas as pd
+
+from transformations.registry import TRANSFORMATION_REGISTRY
+from transformations.operations import (
+    infer_datetime_format,
+    parse_datetime,
+    numeric_column_stats,
+    merge_numeric_column_stats,
+    smallest_dtype,
+    cast_to_dtype,
+)
+
+
+# Operations whose output for a row depends only on that row
+ROW_LOCAL_OPERATIONS = {
+    "drop_null_rows",
+    "fill_nulls",
+    "cast_type",
+    "drop_column",
+    "standardize_case",
+    "standardize_column_names",
+    "replace_non_values",
+}
+
+CAST_OPERATIONS = {"auto_cast_type", "auto_cast_datetime"}
+
+# Operations that need a planning pass over every chunk before transforming
+GLOBAL_OPERATIONS = CAST_OPERATIONS | {"optimize_dtypes", "remove_duplicates"}
+
+# Minimum ratio of parseable values for auto_cast_datetime (matches the operation)
+DATETIME_SUCCESS_RATE = 0.8
+
+
+class ChunkedPipeline:
+    """
+    Apply a list of cleaning steps to a stream of DataFrame chunks.
+
+    Chunks must carry the original row number as their index (pd.read_csv with
+    chunksize does this). While needs_planning is True, call observe() on
+    every chunk and then finalize(); some plans need more than one pass.
+    """
+
+    def __init__(self, steps: list[dict]):
+        self.steps = []
+        for step in steps:
+            op_name = step.get("operation")
+            if op_name not in TRANSFORMATION_REGISTRY:
+                continue  # silently skip unsupported ops, as the in-memory path does
+            if op_name not in ROW_LOCAL_OPERATIONS and op_name not in GLOBAL_OPERATIONS:
+                raise ValueError(f"Operation {op_name} cannot be applied chunk by chunk")
+            self.steps.append((op_name, step.get("params", {})))
+
+        self._cast_stats = {}
+        self._duplicate_hashes = {}
+        self._cast_decisions = {}
+        self._datetime_formats = {}
+        self._target_dtypes = {}
+        self._kept_rows = {}
+        self._decided = set()
+        self.bytes_saved = {}
+
+    @property
+    def needs_planning(self) -> bool:
+        return bool(self._planning_stage())
+
+    def _planning_stage(self) -> list[int]:
+        """
+        The undecided global steps the next planning pass decides: those up to
+        the first one that reads what an earlier step of the stage changes
+        """
+        stage = []
+        # Columns the stage's steps rewrite; None once that is every column
+        written = set()
+        for i, (op_name, params) in enumerate(self.steps):
+            if op_name == "standardize_column_names" and written:
+                # Later steps name the rewritten columns differently
+                written = None
+            if op_name not in GLOBAL_OPERATIONS or i in self._decided:
+                continue
+            read = _step_columns(op_name, params)
+            if written is None or (written and (read is None or read & written)):
+                break
+            stage.append(i)
+            if op_name == "remove_duplicates" or read is None:
+                written = None
+            else:
+                written |= read
+        return stage
+
+    def observe(self, chunk: pd.DataFrame):
+        """Planning pass: gather the global state needed by cast and dedupe steps"""
+        stage = self._planning_stage()
+        df = chunk
+        for i, (op_name, params) in enumerate(self.steps):
+            if i in self._decided:
+                df = self._apply_step(i, op_name, params, df, observing=True)
+            elif op_name in GLOBAL_OPERATIONS and i not in stage:
+                # Depends on values decided in this pass; observed in the next
+                break
+            elif op_name == "auto_cast_type":
+                self._observe_numeric(i, df, params["column"])
+            elif op_name == "auto_cast_datetime":
+                self._observe_datetime(i, df, params["column"], params.get("format"))
+            elif op_name == "optimize_dtypes":
+                self._observe_dtypes(i, df, params.get("columns"))
+            elif op_name == "remove_duplicates":
+                self._observe_duplicates(i, df, params.get("subset"))
+                # Rows duplicated within the chunk are duplicates globally too
+                df = TRANSFORMATION_REGISTRY[op_name](df, **params)
+            else:
+                df = TRANSFORMATION_REGISTRY[op_name](df, **params)
+
+    def finalize(self):
+        """Turn the statistics gathered by observe() into per-step decisions"""
+        for i in self._planning_stage():
+            op_name, params = self.steps[i]
+            if op_name == "auto_cast_type":
+                stats = self._cast_stats.get(i)
+                if stats and stats["non_null"] > 0 and stats["numeric"]:
+                    self._cast_decisions[i] = "Int64" if stats["integer"] else "float"
+            elif op_name == "auto_cast_datetime":
+                stats = self._cast_stats.get(i)
+                if stats and stats["non_null"] > 0:
+                    if stats["parsed"] / stats["non_null"] >= DATETIME_SUCCESS_RATE:
+                        self._cast_decisions[i] = "datetime"
+                        self._datetime_formats[i] = stats["format"]
+            elif op_name == "optimize_dtypes":
+                target_dtypes = {}
+                for column, stats in self._cast_stats.get(i, {}).items():
+                    dtype = smallest_dtype(stats)
+                    if dtype is not None:
+                        target_dtypes[column] = dtype
+                self._target_dtypes[i] = target_dtypes
+            elif op_name == "remove_duplicates":
+                self._kept_rows[i] = self._rows_to_keep(i, params.get("keep", "first"))
+            self._decided.add(i)
+
+        self._cast_stats.clear()
+        self._duplicate_hashes.clear()
+
+    def transform(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """Apply every step to a single chunk"""
+        df = chunk
+        for i, (op_name, params) in enumerate(self.steps):
+            df = self._apply_step(i, op_name, params, df)
+        return df
+
+    def _apply_step(
+        self, i: int, op_name: str, params: dict, df: pd.DataFrame, observing: bool = False
+    ) -> pd.DataFrame:
+        if op_name in CAST_OPERATIONS:
+            return self._apply_cast(
+                df,
+                params["column"],
+                self._cast_decisions.get(i),
+                self._datetime_formats.get(i),
+            )
+        if op_name == "optimize_dtypes":
+            return self._apply_dtypes(df, self._target_dtypes.get(i, {}), record=not observing)
+        if op_name == "remove_duplicates":
+            kept = _in_sorted(df.index.to_numpy(), self._kept_rows[i])
+            return df.take(np.flatnonzero(kept))
+        return TRANSFORMATION_REGISTRY[op_name](df, **params)
+
+    def _observe_numeric(self, i: int, df: pd.DataFrame, column: str):
+        stats = self._cast_stats.setdefault(
+            i, {"non_null": 0, "numeric": True, "integer": True}
+        )
+        if column not in df.columns:
+            return
+        if df[column].dtype != "object":
+            stats["numeric"] = False
+            return
+
+        non_null_values = df[column].dropna()
+        if len(non_null_values) == 0:
+            return
+        stats["non_null"] += len(non_null_values)
+        if not stats["numeric"]:
+            return
+
+        numeric_values = pd.to_numeric(non_null_values, errors="coerce")
+        if not numeric_values.notna().all():
+            stats["numeric"] = False
+        elif stats["integer"] and not (numeric_values % 1 == 0).all():
+            stats["integer"] = False
+
+    def _observe_datetime(self, i: int, df: pd.DataFrame, column: str, datetime_format=None):
+        stats = self._cast_stats.setdefault(
+            i, {"non_null": 0, "parsed": 0, "format": datetime_format}
+        )
+        if column not in df.columns or df[column].dtype != "object":
+            return
+
+        non_null_count = int(df[column].notna().sum())
+        if non_null_count == 0:
+            return
+        if stats["format"] is None and stats["non_null"] == 0:
+            stats["format"] = infer_datetime_format(df[column])
+        stats["non_null"] += non_null_count
+        stats["parsed"] += int(parse_datetime(df[column], stats["format"]).notna().sum())
+
+    def _observe_dtypes(self, i: int, df: pd.DataFrame, columns):
+        stats = self._cast_stats.setdefault(i, {})
+        for column in (columns if columns is not None else df.columns):
+            if column not in df.columns:
+                continue
+            chunk_stats = numeric_column_stats(df[column])
+            if column in stats:
+                chunk_stats = merge_numeric_column_stats(stats[column], chunk_stats)
+            stats[column] = chunk_stats
+
+    def _apply_dtypes(self, df: pd.DataFrame, target_dtypes: dict, record: bool = True) -> pd.DataFrame:
+        for column, dtype in target_dtypes.items():
+            if column not in df.columns or str(df[column].dtype) == dtype:
+                continue
+            before = df[column].memory_usage(index=False, deep=True)
+            df[column] = cast_to_dtype(df[column], dtype)
+            if record:
+                saved = int(before - df[column].memory_usage(index=False, deep=True))
+                self.bytes_saved[column] = self.bytes_saved.get(column, 0) + saved
+        return df
+
+    def _observe_duplicates(self, i: int, df: pd.DataFrame, subset):
+        hashes = _row_hashes(df[subset] if subset else df)
+        self._duplicate_hashes.setdefault(i, []).append((hashes, df.index.to_numpy()))
+
+    def _rows_to_keep(self, i: int, keep) -> np.ndarray:
+        parts = self._duplicate_hashes.get(i, [])
+        if not parts:
+            return np.array([], dtype=np.int64)
+
+        hashes = np.concatenate([h for h, _ in parts])
+        rows = np.concatenate([r for _, r in parts])
+        order = np.argsort(rows, kind="stable")
+        hashes, rows = hashes[order], rows[order]
+
+        if keep is False:
+            _, inverse, counts = np.unique(hashes, return_inverse=True, return_counts=True)
+            kept = rows[counts[inverse] == 1]
+        elif keep == "last":
+            _, last_index = np.unique(hashes[::-1], return_index=True)
+            kept = rows[::-1][last_index]
+        else:
+            _, first_index = np.unique(hashes, return_index=True)
+            kept = rows[first_index]
+
+        return np.sort(kept)
+
+    @staticmethod
+    def _apply_cast(df: pd.DataFrame, column: str, decision, datetime_format=None) -> pd.DataFrame:
+        # Like the operations, only string columns are cast
+        if decision is None or column not in df.columns or df[column].dtype != "object":
+            return df
+        if decision == "Int64":
+            df[column] = pd.to_numeric(df[column], errors="coerce").astype("Int64")
+        elif decision == "float":
+            df[column] = pd.to_numeric(df[column], errors="coerce")
+        elif decision == "datetime":
+            df[column] = parse_datetime(df[column], datetime_format)
+        return df
+
+
+# Hash of a missing value, whatever its dtype (NaN, None, NaT, pd.NA)
+NULL_HASH = np.uint64(0x9E3779B97F4A7C15)
+
+# Hashes numbers with a fraction apart from integers with the same bits
+FRACTION_HASH_KEY = "fractional value"
+
+
+def _row_hashes(df: pd.DataFrame) -> np.ndarray:
+    """
+    Row hashes that do not depend on a chunk's dtypes, so rows compare across
+    chunks as they would in one frame: missing values hash alike (a column
+    that is all NaN in one chunk and holds None in another), integers alike
+    whether stored as int or float, and booleans alike whether bool or object.
+    """
+    combined = np.zeros(len(df), dtype=np.uint64)
+    for _, series in df.items():
+        if pd.api.types.is_bool_dtype(series):
+            hashes = pd.util.hash_array(series.astype(object).to_numpy())
+        elif pd.api.types.is_integer_dtype(series):
+            hashes = pd.util.hash_array(series.to_numpy(dtype="int64", na_value=0))
+        elif pd.api.types.is_float_dtype(series):
+            values = series.to_numpy(dtype="float64", na_value=np.nan)
+            with np.errstate(invalid="ignore"):
+                integral = (values % 1 == 0) & (np.abs(values) < 2.0 ** 63)
+            hashes = np.where(
+                integral,
+                pd.util.hash_array(np.where(integral, values, 0).astype("int64")),
+                pd.util.hash_array(values, hash_key=FRACTION_HASH_KEY),
+            )
+        else:
+            hashes = pd.util.hash_pandas_object(series, index=False).to_numpy()
+        hashes = np.where(series.isna().to_numpy(), NULL_HASH, hashes)
+        combined = combined * np.uint64(1_000_003) ^ hashes
+    return combined
+
+
+def _step_columns(op_name: str, params: dict) -> set | None:
+    """Columns a global step reads and rewrites; None for every column"""
+    if op_name in CAST_OPERATIONS:
+        return {params["column"]}
+    columns = params.get("subset" if op_name == "remove_duplicates" else "columns")
+    return set(columns) if columns else None
+
+
+def _in_sorted(values: np.ndarray, sorted_values: np.ndarray) -> np.ndarray:
+    """Boolean mask of which values appear in a sorted array"""
+    if len(sorted_values) == 0:
+        return np.zeros(len(values), dtype=bool)
+    position = np.searchsorted(sorted_values, values)
+    position[position == len(sorted_values)] = 0
+    return sorted_values[position] == values